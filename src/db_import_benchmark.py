@@ -0,0 +1,63 @@
+import glob
+import os
+import time
+
+from layman import app, settings
+from layman.layer import db
+from layman.layer.db.table import delete_layer
+from layman.layer.util import to_safe_layer_name
+
+WORKSPACE = 'db_import_benchmark'
+# each file is imported this number of times under each profile, the fastest import is reported
+REPEAT = 3
+FILE_PATTERNS = [
+    'sample/layman.layer/*.geojson',
+    'sample/layman.layer/*.shp',
+    'sample/data/*.geojson',
+    'sample/data/geometry-types/*.geojson',
+    'tmp/naturalearth/**/*.shp',
+    'tmp/naturalearth/**/*.geojson',
+]
+
+
+def get_file_paths():
+    return sorted({path for pattern in FILE_PATTERNS for path in glob.glob(pattern, recursive=True)})
+
+
+def import_file(file_path, profile):
+    layername = to_safe_layer_name(os.path.splitext(os.path.basename(file_path))[0])
+    durations = []
+    num_features = 0
+    for _ in range(REPEAT):
+        delete_layer(WORKSPACE, layername)
+        start = time.time()
+        db.import_layer_vector_file(WORKSPACE, layername, file_path, None, profile=profile)
+        durations.append(time.time() - start)
+        num_features = db.get_number_of_features(WORKSPACE, layername)
+    delete_layer(WORKSPACE, layername)
+    return num_features, min(durations)
+
+
+def main():
+    file_paths = get_file_paths()
+    print(f"Benchmarking import of {len(file_paths)} files, each imported {REPEAT} times under each profile.")
+    with app.app_context():
+        db.ensure_workspace(WORKSPACE)
+        try:
+            for profile in settings.LAYMAN_DB_IMPORT_PROFILES:
+                total_features = 0
+                total_duration = 0
+                for file_path in file_paths:
+                    num_features, duration = import_file(file_path, profile)
+                    total_features += num_features
+                    total_duration += duration
+                    print(f"{profile:>16} {file_path}: {num_features} features in {duration:.3f} s, "
+                          f"{num_features / duration:.0f} features/s")
+                print(f"{profile:>16} TOTAL: {total_features} features in {total_duration:.3f} s, "
+                      f"{total_features / total_duration:.0f} features/s")
+        finally:
+            db.delete_workspace(WORKSPACE)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,5 @@
-import json
 from functools import wraps
-from flask import after_this_request, request
+from flask import request
 
 from layman import LaymanError, settings, authn, util as layman_util, common
 from layman.common.prime_db_schema import workspaces, users
@@ -39,9 +38,8 @@ def authorize(workspace, publication_type, publication_name, request_method, act
     else:
         if not workspaces.get_workspace_infos(workspace):
             raise LaymanError(40)  # Workspace not found
-        publ_info = layman_util.get_publication_infos(workspace, publication_type).get(
-            (workspace, publication_type, publication_name)
-        )
+        publ_info = layman_util.get_publication_info(workspace, publication_type, publication_name,
+                                                     context={'keys': ['access_rights']})
         if not publ_info:
             raise LaymanError(publication_not_found_code)
         user_can_read = is_user_in_access_rule(actor_name, publ_info['access_rights']['read'])
@@ -59,18 +57,6 @@ def authorize(workspace, publication_type, publication_name, request_method, act
         raise LaymanError(31, {'method': request_method})  # unsupported method
 
 
-def authorize_after_multi_get_request(actor_name, response):
-    # print(f"authorize_after_request, status_code = {response.status_code}, workspace={workspace}, actor_name={actor_name}")
-    if response.status_code == 200:
-        publications_json = json.loads(response.get_data())
-        publications_json = [
-            publication_json for publication_json in publications_json
-            if is_user_in_access_rule(actor_name, publication_json['access_rights']['read'])
-        ]
-        response.set_data(json.dumps(publications_json))
-    return response
-
-
 def is_user_in_access_rule(username, access_rule_names):
     return settings.RIGHTS_EVERYONE_ROLE in access_rule_names \
         or (username and username in access_rule_names)
@@ -85,16 +71,14 @@ def can_user_create_public_workspace(username):
 
 
 def can_user_read_publication(username, workspace, publication_type, publication_name):
-    publ_info = layman_util.get_publication_infos(workspace=workspace, publ_type=publication_type).get(
-        (workspace, publication_type, publication_name)
-    )
+    publ_info = layman_util.get_publication_info(workspace, publication_type, publication_name,
+                                                 context={'keys': ['access_rights']})
     return publ_info and is_user_in_access_rule(username, publ_info['access_rights']['read'])
 
 
 def can_user_write_publication(username, workspace, publication_type, publication_name):
-    publ_info = layman_util.get_publication_infos(workspace=workspace, publ_type=publication_type).get(
-        (workspace, publication_type, publication_name)
-    )
+    publ_info = layman_util.get_publication_info(workspace, publication_type, publication_name,
+                                                 context={'keys': ['access_rights']})
     return publ_info and is_user_in_access_rule(username, publ_info['access_rights']['write'])
 
 
@@ -113,12 +97,8 @@ def authorize_workspace_publications_decorator(func):
             raise Exception(f"Authorization module is unable to authorize path {req_path}")
         actor_name = authn.get_authn_username()
         # raises exception in case of unauthorized request
+        # Multi-publication GET requests are filtered by reader already in rest_common.get_publications
         authorize(workspace, publication_type, publication_name, request.method, actor_name)
-        if workspace and publication_type and not publication_name and request.method.lower() == common.REQUEST_METHOD_GET:
-            # pylint: disable=unused-variable
-            @after_this_request
-            def authorize_after_request_tmp(response):
-                return authorize_after_multi_get_request(actor_name, response)
         return func(*args, **kwargs)
 
     return decorated_function
@@ -132,12 +112,7 @@ def authorize_publications_decorator(func):
         (workspace, publication_type, publication_name) = parse_request_path(req_path)
         if publication_type is None or workspace or publication_name:
             raise Exception(f"Authorization module is unable to authorize path {req_path}")
-        actor_name = authn.get_authn_username()
-        if request.method.lower() == common.REQUEST_METHOD_GET:
-            # pylint: disable=unused-variable
-            @after_this_request
-            def authorize_after_request_tmp(response):
-                return authorize_after_multi_get_request(actor_name, response)
+        # Publications are filtered by reader already in rest_common.get_publications
         return func(*args, **kwargs)
 
     return decorated_function
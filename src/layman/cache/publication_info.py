@@ -0,0 +1,93 @@
+import json
+import logging
+
+from flask import g
+
+from layman import settings
+
+logger = logging.getLogger(__name__)
+
+COMPLETE_INFO_KEY = f'{__name__}:COMPLETE_INFO'
+GENERATIONS_KEY = f'{__name__}:GENERATIONS'
+STATS_KEY = f'{__name__}:STATS'
+FLASK_UNCACHEABLE_KEY = f'{__name__}:UNCACHEABLE'
+
+# Complete info is the same for every actor who is authorized to read the publication (authorization is checked before
+# complete info is built), so there is only one visibility class for now.
+VISIBILITY_CLASS_READER = 'reader'
+
+CACHEABLE_PUBLICATION_STATUSES = ['COMPLETE', 'INCOMPLETE', ]
+
+
+def _get_publication_hash(workspace, publication_type, publication_name):
+    hash = f"{workspace}:{publication_type}:{publication_name}"
+    return hash
+
+
+def _get_info_key(workspace, publication_type, publication_name, visibility_class):
+    return f'{COMPLETE_INFO_KEY}:{_get_publication_hash(workspace, publication_type, publication_name)}:{visibility_class}'
+
+
+def get(workspace, publication_type, publication_name, create_info, visibility_class=VISIBILITY_CLASS_READER):
+    """Returns complete info of the publication from cache, or creates it by `create_info` and caches it.
+
+    Info is cached only if publication is not being updated. Each invalidation increments generation of the publication,
+    so info created during invalidation is never returned from cache.
+    """
+    timeout = settings.LAYMAN_PUBLICATION_INFO_CACHE_TIMEOUT
+    if not timeout:
+        return create_info()
+
+    rds = settings.LAYMAN_REDIS
+    publ_hash = _get_publication_hash(workspace, publication_type, publication_name)
+    key = _get_info_key(workspace, publication_type, publication_name, visibility_class)
+    with rds.pipeline(transaction=False) as pipe:
+        pipe.hget(GENERATIONS_KEY, publ_hash)
+        pipe.get(key)
+        generation, cached = pipe.execute()
+    generation = generation or '0'
+
+    if cached is not None:
+        cached = json.loads(cached)
+        if cached['generation'] == generation:
+            rds.hincrby(STATS_KEY, 'hits')
+            return cached['info']
+
+    rds.hincrby(STATS_KEY, 'misses')
+    g.pop(FLASK_UNCACHEABLE_KEY, None)
+    info = create_info()
+    if g.pop(FLASK_UNCACHEABLE_KEY, False):
+        logger.info(f'Complete info of {publ_hash} is not complete, not caching it.')
+    elif info.get('layman_metadata', {}).get('publication_status') in CACHEABLE_PUBLICATION_STATUSES:
+        try:
+            value = json.dumps({'generation': generation, 'info': info})
+        except TypeError:
+            logger.warning(f'Complete info of {publ_hash} is not JSON serializable, not caching it.')
+        else:
+            rds.set(key, value, ex=timeout)
+    return info
+
+
+def mark_uncacheable():
+    """Complete info being created within current app context will not be cached, e.g. because some sources did not answer."""
+    g.setdefault(FLASK_UNCACHEABLE_KEY, True)
+
+
+def delete(workspace, publication_type, publication_name):
+    rds = settings.LAYMAN_REDIS
+    publ_hash = _get_publication_hash(workspace, publication_type, publication_name)
+    with rds.pipeline() as pipe:
+        pipe.hincrby(GENERATIONS_KEY, publ_hash)
+        pipe.delete(_get_info_key(workspace, publication_type, publication_name, VISIBILITY_CLASS_READER))
+        pipe.execute()
+
+
+def get_stats():
+    stats = settings.LAYMAN_REDIS.hgetall(STATS_KEY)
+    hits = int(stats.get('hits', 0))
+    misses = int(stats.get('misses', 0))
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / (hits + misses) if hits + misses else None,
+    }
@@ -0,0 +1,35 @@
+from layman import app
+from . import publication_info
+
+
+def test_get_and_delete():
+    workspace = 'test_publication_info_cache_workspace'
+    publ_type = 'layman.layer'
+    name = 'test_publication_info_cache_layer'
+    calls = []
+
+    def create_info(status):
+        def create_info_internal():
+            calls.append(status)
+            return {'name': name, 'layman_metadata': {'publication_status': status}}
+        return create_info_internal
+
+    with app.app_context():
+        publication_info.delete(workspace, publ_type, name)
+        stats_before = publication_info.get_stats()
+
+        info = publication_info.get(workspace, publ_type, name, create_info('COMPLETE'))
+        assert info['layman_metadata']['publication_status'] == 'COMPLETE'
+        info = publication_info.get(workspace, publ_type, name, create_info('COMPLETE'))
+        assert info['name'] == name
+        assert calls == ['COMPLETE']
+
+        publication_info.delete(workspace, publ_type, name)
+        publication_info.get(workspace, publ_type, name, create_info('UPDATING'))
+        publication_info.get(workspace, publ_type, name, create_info('UPDATING'))
+        assert calls == ['COMPLETE', 'UPDATING', 'UPDATING']
+
+        stats = publication_info.get_stats()
+        assert stats['hits'] - stats_before['hits'] == 1
+        assert stats['misses'] - stats_before['misses'] == 3
+        publication_info.delete(workspace, publ_type, name)
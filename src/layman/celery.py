@@ -1,66 +1,188 @@
+import bisect
+from datetime import datetime, timezone
 import json
 import importlib
+import time
 
-import celery.exceptions
+import redis
+from celery import states
 from flask import current_app
 from celery.contrib.abortable import AbortableAsyncResult
 
-from layman.publication_relation.util import update_related_publications_after_change
-from layman import settings, common, util as layman_util
+from layman import settings, common
 from layman.common import redis as redis_util
+from layman.cache import publication_info as publication_info_cache
 
 REDIS_CURRENT_TASK_NAMES = f"{__name__}:CURRENT_TASK_NAMES"
 PUBLICATION_CHAIN_INFOS = f'{__name__}:PUBLICATION_CHAIN_INFOS'
 LAST_TASK_ID_IN_CHAIN_TO_PUBLICATION = f'{__name__}:LAST_TASK_ID_IN_CHAIN_TO_PUBLICATION'
 RUN_AFTER_CHAIN = f'{__name__}:RUN_AFTER_CHAIN'
+DEFERRED_CHAINS = f'{__name__}:DEFERRED_CHAINS'
+PENDING_FEATURE_CHANGES = f'{__name__}:PENDING_FEATURE_CHANGES'
+FEATURE_CHANGE_STATS = f'{__name__}:FEATURE_CHANGE_STATS'
+PENDING_HOUSEKEEPING = f'{__name__}:PENDING_HOUSEKEEPING'
+TASK_TIMINGS = f'{__name__}:TASK_TIMINGS'
+TASK_TIMING_HISTOGRAMS = f'{__name__}:TASK_TIMING_HISTOGRAMS'
 
+# max time (in seconds) of waiting for aborted running tasks to finish
+ABORT_WAIT_TIMEOUT = 2
+# time (in seconds) between two checks if aborted running tasks finished
+ABORT_WAIT_CHECK_INTERVAL = 0.1
+# max time (in seconds) housekeeping task is considered pending, e.g. if it was lost by worker crash
+PENDING_HOUSEKEEPING_TIMEOUT = 3600
+# max time (in seconds) scheduled flush of pending feature changes can be late, e.g. because of busy workers;
+# after that the flush is considered lost, e.g. by worker crash
+FEATURE_CHANGE_FLUSH_TIMEOUT = 600
 
-def task_prerun(workspace, _publication_type, publication_name, _task_id, task_name):
+TASK_TIMING_EVENTS = ['enqueued', 'started', 'finished', ]
+# upper bounds (in seconds) of histogram buckets of task queue wait and duration, last bucket is unbounded
+TASK_TIMING_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 3600, ]
+
+
+def task_published(workspace, publication_type, publication_name, task_id):
+    _set_task_timing(workspace, publication_type, publication_name, task_id, enqueued=time.time())
+
+
+def task_prerun(workspace, publication_type, publication_name, task_id, task_name, hostname=None):
     current_app.logger.info(f"PRE task={task_name}, workspace={workspace}, publication_name={publication_name}")
     rds = settings.LAYMAN_REDIS
     key = REDIS_CURRENT_TASK_NAMES
     task_hash = _get_task_hash(task_name, workspace, publication_name)
     rds.sadd(key, task_hash)
+    _set_task_timing(workspace, publication_type, publication_name, task_id, started=time.time(), hostname=hostname)
 
 
-def task_postrun(workspace, publication_type, publication_name, task_id, task_name, task_state):
+def task_postrun(workspace, publication_type, publication_name, task_id, task_name, _task_state):
     current_app.logger.info(f"POST task={task_name}, workspace={workspace}, publication_name={publication_name}")
     rds = settings.LAYMAN_REDIS
     key = REDIS_CURRENT_TASK_NAMES
     task_hash = _get_task_hash(task_name, workspace, publication_name)
     rds.srem(key, task_hash)
+    _finish_task_timing(workspace, publication_type, publication_name, task_id, task_name)
 
-    key = LAST_TASK_ID_IN_CHAIN_TO_PUBLICATION
-    hash = task_id
-    if rds.hexists(key, hash):
-        finish_publication_chain(task_id)
-        next_task = pop_step_to_run_after_chain(workspace, publication_type, publication_name)
-        if next_task:
-            module_name, method_name = next_task.split('::')
-            module = importlib.import_module(module_name)
-            method = getattr(module, method_name)
-            method(workspace, publication_type, publication_name)
-        update_related_publications_after_change(workspace, publication_type, publication_name)
-    elif task_state == 'FAILURE':
-        chain_info = get_publication_chain_info_dict(workspace, publication_type, publication_name)
-        if chain_info is not None:
-            last_task_id = chain_info['last']
-            finish_publication_chain(last_task_id)
-            clear_steps_to_run_after_chain(workspace, publication_type, publication_name)
+    from layman.common import housekeeping_tasks
+    chain_info = get_publication_chain_info_dict(workspace, publication_type, publication_name)
+    if chain_info is not None and not chain_info['finished'] and task_id in chain_info['by_order']:
+        metas = get_task_metas(chain_info['by_order'])
+        if _is_chain_done(chain_info, metas) and finish_publication_chain(chain_info['last']):
+            if all(metas[tid]['status'] in states.READY_STATES for tid in _get_id_stages(chain_info)[-1]):
+                next_task = pop_step_to_run_after_chain(workspace, publication_type, publication_name)
+                if next_task:
+                    module_name, method_name = next_task.split('::')
+                    module = importlib.import_module(module_name)
+                    method = getattr(module, method_name)
+                    method(workspace, publication_type, publication_name)
+                housekeeping_tasks.schedule(housekeeping_tasks.update_related_publications,
+                                            workspace, publication_type, publication_name)
+            else:
+                clear_steps_to_run_after_chain(workspace, publication_type, publication_name)
     # Sometimes, when delete request run just after other request for the same publication (for example WFS-T),
-    # the aborted task keep running and finish after end of delete task for the same source. This part make sure,
-    # that in that case we delete it.
-    info = layman_util.get_publication_info(workspace, publication_type, publication_name, context={'keys': ['name']})
-    if not info:
-        current_app.logger.warning(f"POST task={task_name}, workspace={workspace}, publication_type={publication_type},"
-                                   f"publication_name={publication_name} Publication does not exist, so we delete it")
-        layman_util.delete_workspace_publication(workspace, publication_type, publication_name)
+    # the aborted task keep running and finish after end of delete task for the same source. Chain info of deleted
+    # publication is deleted too, so only tasks outside of current chain are checked (asynchronously), and the
+    # publication is deleted if it does not exist.
+    if chain_info is None or task_id not in chain_info['by_order']:
+        housekeeping_tasks.schedule(housekeeping_tasks.delete_publication_if_not_exists,
+                                    workspace, publication_type, publication_name)
 
 
 def _get_task_hash(task_name, workspace, publication_name):
     return f"{task_name}:{workspace}:{publication_name}"
 
 
+def _get_task_timings_key(workspace, publication_type, publication_name):
+    return f'{TASK_TIMINGS}:{_get_publication_hash(workspace, publication_type, publication_name)}'
+
+
+def _set_task_timing(workspace, publication_type, publication_name, task_id, **values):
+    rds = settings.LAYMAN_REDIS
+    key = _get_task_timings_key(workspace, publication_type, publication_name)
+    with rds.pipeline() as pipe:
+        for name, value in values.items():
+            if value is not None:
+                pipe.hset(key, f'{task_id}:{name}', value)
+        pipe.execute()
+
+
+def _get_histogram_bucket(seconds):
+    return bisect.bisect_left(TASK_TIMING_BUCKETS, seconds)
+
+
+def _finish_task_timing(workspace, publication_type, publication_name, task_id, task_name):
+    finished = time.time()
+    _set_task_timing(workspace, publication_type, publication_name, task_id, finished=finished)
+    rds = settings.LAYMAN_REDIS
+    key = _get_task_timings_key(workspace, publication_type, publication_name)
+    enqueued, started = rds.hmget(key, f'{task_id}:enqueued', f'{task_id}:started')
+    with rds.pipeline() as pipe:
+        if started is not None:
+            pipe.hincrby(TASK_TIMING_HISTOGRAMS, f'{task_name}:duration:{_get_histogram_bucket(finished - float(started))}')
+            if enqueued is not None:
+                pipe.hincrby(TASK_TIMING_HISTOGRAMS,
+                             f'{task_name}:queue_wait:{_get_histogram_bucket(float(started) - float(enqueued))}')
+        pipe.execute()
+
+
+def _timestamp_to_iso(timestamp):
+    return datetime.fromtimestamp(float(timestamp), timezone.utc).isoformat() if timestamp is not None else None
+
+
+def get_publication_chain_timings(workspace, publication_type, publication_name):
+    """Returns list of timings of tasks of current publication chain in order of the chain, or None if there is no
+    chain. Times are in ISO 8601, queue wait and duration in seconds. Unknown values are None."""
+    chain_info = get_publication_chain_info_dict(workspace, publication_type, publication_name)
+    if chain_info is None:
+        return None
+    task_names = {task_id: task_name for task_name, task_id in chain_info['by_name'].items()}
+    fields = TASK_TIMING_EVENTS + ['hostname']
+    rds = settings.LAYMAN_REDIS
+    values = rds.hmget(_get_task_timings_key(workspace, publication_type, publication_name),
+                       [f'{task_id}:{field}' for task_id in chain_info['by_order'] for field in fields])
+    result = []
+    for idx, task_id in enumerate(chain_info['by_order']):
+        enqueued, started, finished, hostname = values[idx * len(fields):(idx + 1) * len(fields)]
+        result.append({
+            'task': task_names.get(task_id),
+            'worker': hostname,
+            'enqueued_at': _timestamp_to_iso(enqueued),
+            'started_at': _timestamp_to_iso(started),
+            'finished_at': _timestamp_to_iso(finished),
+            'queue_wait': float(started) - float(enqueued) if enqueued is not None and started is not None else None,
+            'duration': float(finished) - float(started) if started is not None and finished is not None else None,
+        })
+    return result
+
+
+def _get_percentile(bucket_counts, percentile):
+    """Returns upper bound of histogram bucket containing given percentile, or None if it is in unbounded bucket."""
+    limit = sum(bucket_counts) * percentile / 100
+    cumulative = 0
+    for bucket, count in enumerate(bucket_counts):
+        cumulative += count
+        if count and cumulative >= limit:
+            return TASK_TIMING_BUCKETS[bucket] if bucket < len(TASK_TIMING_BUCKETS) else None
+    return None
+
+
+def get_task_timing_percentiles(percentiles=(50, 90, 99)):
+    """Returns dict task_name -> {'queue_wait': stats, 'duration': stats}, where stats contain number of measured tasks
+    and upper bound of histogram bucket (in seconds) of each percentile, e.g. {'count': 10, 'p50': 0.5, 'p90': 2.5}."""
+    histograms = {}
+    for field, count in settings.LAYMAN_REDIS.hgetall(TASK_TIMING_HISTOGRAMS).items():
+        task_name, kind, bucket = field.rsplit(':', 2)
+        bucket_counts = histograms.setdefault(task_name, {}).setdefault(kind, [0] * (len(TASK_TIMING_BUCKETS) + 1))
+        bucket_counts[int(bucket)] += int(count)
+    return {
+        task_name: {
+            kind: {
+                'count': sum(bucket_counts),
+                **{f'p{percentile}': _get_percentile(bucket_counts, percentile) for percentile in percentiles},
+            }
+            for kind, bucket_counts in kinds.items()
+        }
+        for task_name, kinds in histograms.items()
+    }
+
+
 def push_step_to_run_after_chain(workspace, publication_type, publication_name, step_code, ):
     rds = settings.LAYMAN_REDIS
     key = RUN_AFTER_CHAIN
@@ -102,24 +224,144 @@ def clear_steps_to_run_after_chain(workspace, publication_type, publication_name
     rds.hdel(key, hash)
 
 
+def _get_pending_feature_changes_key(workspace, publication_type, publication_name):
+    return f'{PENDING_FEATURE_CHANGES}:{_get_publication_hash(workspace, publication_type, publication_name)}'
+
+
+def register_feature_change(workspace, publication_type, publication_name, max_delay):
+    """Registers feature change of the publication that will be followed by patch_after_feature_change. Returns True
+    if flush of pending changes needs to be scheduled, i.e. if it is the first change since last
+    pop_feature_changes_if_quiet, or if the first change is older than `max_delay` + FEATURE_CHANGE_FLUSH_TIMEOUT
+    seconds, so the flush was probably lost. Pending changes expire after the same time since the last change, so
+    that lost flush does not keep the publication UPDATING forever."""
+    rds = settings.LAYMAN_REDIS
+    key = _get_pending_feature_changes_key(workspace, publication_type, publication_name)
+    timeout = max_delay + FEATURE_CHANGE_FLUSH_TIMEOUT
+    with rds.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                first = pipe.hget(key, 'first')
+                now = time.time()
+                needs_flush = first is None or float(first) + timeout < now
+                pipe.multi()
+                if needs_flush:
+                    pipe.hset(key, 'first', now)
+                pipe.hset(key, 'last', now)
+                pipe.hincrby(key, 'count')
+                pipe.expire(key, int(timeout) + 1)
+                pipe.hincrby(FEATURE_CHANGE_STATS, 'feature_changes')
+                pipe.execute()
+                return needs_flush
+            except redis.WatchError:
+                continue
+
+
+def pop_feature_changes_if_quiet(workspace, publication_type, publication_name, quiet_period, max_delay):
+    """Removes pending feature changes of the publication if there was no change within last `quiet_period` seconds,
+    or the first change is older than `max_delay` seconds. Returns tuple (number of removed changes, None), or
+    (None, seconds to wait before next attempt), or (None, None) if no change is pending."""
+    rds = settings.LAYMAN_REDIS
+    key = _get_pending_feature_changes_key(workspace, publication_type, publication_name)
+    with rds.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(key)
+                changes = pipe.hgetall(key)
+                if not changes:
+                    return None, None
+                delay = min(float(changes['last']) + quiet_period, float(changes['first']) + max_delay) - time.time()
+                if delay > 0:
+                    pipe.unwatch()
+                    return None, delay
+                pipe.multi()
+                pipe.delete(key)
+                pipe.hincrby(FEATURE_CHANGE_STATS, 'patch_chains')
+                pipe.execute()
+                return int(changes['count']), None
+            except redis.WatchError:
+                continue
+
+
+def is_feature_change_pending(workspace, publication_type, publication_name):
+    rds = settings.LAYMAN_REDIS
+    return rds.exists(_get_pending_feature_changes_key(workspace, publication_type, publication_name)) > 0
+
+
+def _get_pending_housekeeping_key(workspace, publication_type, publication_name):
+    return f'{PENDING_HOUSEKEEPING}:{_get_publication_hash(workspace, publication_type, publication_name)}'
+
+
+def add_pending_housekeeping(workspace, publication_type, publication_name, task_id):
+    """Registers housekeeping task of the publication. The task is considered pending until it is removed by
+    `remove_pending_housekeeping`, but at most PENDING_HOUSEKEEPING_TIMEOUT seconds, so that lost task does not keep
+    the publication UPDATING forever."""
+    rds = settings.LAYMAN_REDIS
+    key = _get_pending_housekeeping_key(workspace, publication_type, publication_name)
+    now = time.time()
+    with rds.pipeline() as pipe:
+        # tasks whose timeout passed are removed, score is time when the task stops being pending
+        pipe.zremrangebyscore(key, '-inf', now)
+        pipe.zadd(key, {task_id: now + PENDING_HOUSEKEEPING_TIMEOUT})
+        pipe.expire(key, int(PENDING_HOUSEKEEPING_TIMEOUT) + 1)
+        pipe.execute()
+    publication_info_cache.delete(workspace, publication_type, publication_name)
+
+
+def remove_pending_housekeeping(workspace, publication_type, publication_name, task_id):
+    settings.LAYMAN_REDIS.zrem(_get_pending_housekeeping_key(workspace, publication_type, publication_name), task_id)
+    publication_info_cache.delete(workspace, publication_type, publication_name)
+
+
+def is_follow_up_pending(workspace, publication_type, publication_name):
+    """Returns True if some feature change or housekeeping task of the publication is waiting to be processed."""
+    rds = settings.LAYMAN_REDIS
+    with rds.pipeline(transaction=False) as pipe:
+        pipe.exists(_get_pending_feature_changes_key(workspace, publication_type, publication_name))
+        pipe.zcount(_get_pending_housekeeping_key(workspace, publication_type, publication_name), time.time(), '+inf')
+        feature_changes, housekeeping = pipe.execute()
+    return feature_changes > 0 or housekeeping > 0
+
+
+def get_feature_change_stats():
+    stats = settings.LAYMAN_REDIS.hgetall(FEATURE_CHANGE_STATS)
+    feature_changes = int(stats.get('feature_changes', 0))
+    patch_chains = int(stats.get('patch_chains', 0))
+    return {
+        'feature_changes': feature_changes,
+        'patch_chains': patch_chains,
+        'coalesced': feature_changes - patch_chains,
+    }
+
+
 def finish_publication_chain(last_task_id_in_chain):
+    """Marks publication chain as finished. Returns True if the chain was finished by this call."""
     rds = settings.LAYMAN_REDIS
     key = LAST_TASK_ID_IN_CHAIN_TO_PUBLICATION
     hash = last_task_id_in_chain
-    publ_hash = rds.hget(key, hash)
+    with rds.pipeline() as pipe:
+        pipe.hget(key, hash)
+        pipe.hdel(key, hash)
+        publ_hash, _ = pipe.execute()
     if publ_hash is None:
-        return
+        return False
     username, publication_type, publication_name = _hash_to_publication(publ_hash)
 
     chain_info = get_publication_chain_info_dict(username, publication_type, publication_name)
     chain_info['finished'] = True
+    # outputs of the chain (e.g. bbox, thumbnail, metadata) do not change `updated_at` of the publication
+    chain_info['finished_at'] = time.time()
+    # Terminal state is remembered, so that finished chains need no (or at most one) lookup to result backend
+    terminal_state = _get_chain_terminal_state(chain_info)
+    if terminal_state:
+        chain_info['state'] = terminal_state
     set_publication_chain_info_dict(username, publication_type, publication_name, chain_info)
-
-    rds.hdel(key, hash)
+    publication_info_cache.delete(username, publication_type, publication_name)
 
     lock = redis_util.get_publication_lock(username, publication_type, publication_name)
     if lock in [common.REQUEST_METHOD_PATCH, common.REQUEST_METHOD_POST, common.PUBLICATION_LOCK_FEATURE_CHANGE, ]:
         redis_util.unlock_publication(username, publication_type, publication_name)
+    return True
 
 
 def _hash_to_publication(hash):
@@ -150,15 +392,85 @@ def get_publication_chain_info_dict(workspace, publication_type, publication_nam
     return chain_info
 
 
+class _PrefetchedAsyncResult(AbortableAsyncResult):
+    """AbortableAsyncResult with task meta already read from result backend.
+
+    Prefetched meta of not-yet-ready task is used until the task is aborted, ready meta is cached by Celery itself.
+    """
+    def __init__(self, id, meta=None, **kwargs):  # pylint: disable=redefined-builtin
+        super().__init__(id, **kwargs)
+        self._prefetched_meta = self._maybe_set_cache(meta) if meta else None
+
+    def _get_task_meta(self):
+        if self._cache is None and self._prefetched_meta is not None:
+            return self._prefetched_meta
+        return super()._get_task_meta()
+
+    def abort(self):
+        self._prefetched_meta = None
+        return super().abort()
+
+
+def get_task_metas(task_ids):
+    """Returns dict task_id -> task meta, all metas are read from result backend by one MGET."""
+    from layman import celery_app
+    backend = celery_app.backend
+    if not task_ids:
+        return dict()
+    if not hasattr(backend, 'mget'):
+        return {task_id: backend.get_task_meta(task_id) for task_id in task_ids}
+    values = backend.mget([backend.get_key_for_task(task_id) for task_id in task_ids])
+    return {
+        task_id: backend.decode(value) if value else {'status': states.PENDING, 'result': None}
+        for task_id, value in zip(task_ids, values)
+    }
+
+
+def _get_id_stages(chain_info):
+    # chains registered before stages were introduced are linear
+    return chain_info.get('stages') or [[task_id] for task_id in chain_info['by_order']]
+
+
+def _is_chain_done(chain_info, metas):
+    """Chain is done if no task will run anymore, i.e. all tasks are ready, or tasks of some stage are ready and some of
+    them failed, so next stages will not run."""
+    for stage in _get_id_stages(chain_info):
+        stage_statuses = [metas[task_id]['status'] for task_id in stage]
+        if not all(status in states.READY_STATES for status in stage_statuses):
+            return False
+        if any(status != states.SUCCESS for status in stage_statuses):
+            return True
+    return True
+
+
+def _get_chain_terminal_state(chain_info):
+    metas = get_task_metas(chain_info['by_order'])
+    if all(metas[task_id]['status'] == states.SUCCESS for task_id in _get_id_stages(chain_info)[-1]):
+        result = states.SUCCESS
+    elif any(meta['status'] == states.FAILURE for meta in metas.values()) and _is_chain_done(chain_info, metas):
+        result = states.FAILURE
+    else:
+        result = None
+    return result
+
+
 def get_publication_chain_info(workspace, publication_type, publication_name):
     chain_info = get_publication_chain_info_dict(workspace, publication_type, publication_name)
     from layman import celery_app
     if chain_info is not None:
+        if chain_info.get('state') == states.SUCCESS:
+            metas = {
+                task_id: {'status': states.SUCCESS, 'result': None, 'traceback': None, 'children': [], 'task_id': task_id}
+                for task_id in chain_info['by_order']
+            }
+        else:
+            metas = get_task_metas(chain_info['by_order'])
         results = {
-            task_id: AbortableAsyncResult(task_id, backend=celery_app.backend)
+            task_id: _PrefetchedAsyncResult(task_id, meta=metas[task_id], backend=celery_app.backend)
             for task_id in chain_info['by_order']
         }
 
+        chain_info['stages'] = [[results[task_id] for task_id in stage] for stage in _get_id_stages(chain_info)]
         chain_info['by_order'] = [results[task_id] for task_id in chain_info['by_order']]
         chain_info['by_name'] = {
             k: results[task_id] for k, task_id in chain_info['by_name'].items()
@@ -183,12 +495,25 @@ def set_publication_chain_info(workspace, publication_type, publication_name, ta
     while prev_result.parent is not None:
         prev_result = prev_result.parent
         chained_results.insert(0, prev_result)
+    set_publication_chain_stages_info(workspace, publication_type, publication_name, [[t] for t in tasks],
+                                      [[r.task_id] for r in chained_results])
+
+
+def set_publication_chain_stages_info(workspace, publication_type, publication_name, task_stages, task_id_stages):
+    """Registers chain of stages, see layman.common.tasks.get_chain_of_stages."""
+    if not task_id_stages:
+        return
+    by_order = [task_id for stage in task_id_stages for task_id in stage]
+    _delete_previous_chain_timings(workspace, publication_type, publication_name, by_order)
     chain_info = {
-        'last': task_result.task_id,
+        'last': by_order[-1],
         'by_name': {
-            tasks[idx].name: r.task_id for idx, r in enumerate(chained_results)
+            task.name: task_id
+            for stage, id_stage in zip(task_stages, task_id_stages)
+            for task, task_id in zip(stage, id_stage)
         },
-        'by_order': [r.task_id for r in chained_results],
+        'by_order': by_order,
+        'stages': task_id_stages,
         'finished': False,
     }
     set_publication_chain_info_dict(workspace, publication_type, publication_name, chain_info)
@@ -198,59 +523,153 @@ def set_publication_chain_info(workspace, publication_type, publication_name, ta
     val = _get_publication_hash(workspace, publication_type, publication_name)
     hash = chain_info['last']
     rds.hset(key, hash, val)
+    publication_info_cache.delete(workspace, publication_type, publication_name)
+
 
+def _delete_previous_chain_timings(workspace, publication_type, publication_name, task_ids):
+    # timings of new chain may be already recorded, because chain is registered after it is sent to broker
+    rds = settings.LAYMAN_REDIS
+    key = _get_task_timings_key(workspace, publication_type, publication_name)
+    task_ids = set(task_ids)
+    fields = [field for field in rds.hkeys(key) if field.split(':', 1)[0] not in task_ids]
+    if fields:
+        rds.hdel(key, *fields)
+
+
+def defer_publication_chain(workspace, publication_type, publication_name, task_stages, task_id_stages, task_chain):
+    """Registers chain of stages as publication chain, but instead of sending it to broker, it stores the chain in
+    Redis. The chain is sent to broker later by run_deferred_publication_chain."""
+    rds = settings.LAYMAN_REDIS
+    key = DEFERRED_CHAINS
+    hash = _get_publication_hash(workspace, publication_type, publication_name)
+    rds.hset(key, hash, json.dumps(task_chain))
+    set_publication_chain_stages_info(workspace, publication_type, publication_name, task_stages, task_id_stages)
+
+
+def _pop_deferred_publication_chain(workspace, publication_type, publication_name):
+    rds = settings.LAYMAN_REDIS
+    key = DEFERRED_CHAINS
+    hash = _get_publication_hash(workspace, publication_type, publication_name)
+    with rds.pipeline() as pipe:
+        pipe.hget(key, hash)
+        pipe.hdel(key, hash)
+        val, _ = pipe.execute()
+    return val
+
+
+def is_publication_chain_deferred(workspace, publication_type, publication_name):
+    rds = settings.LAYMAN_REDIS
+    key = DEFERRED_CHAINS
+    hash = _get_publication_hash(workspace, publication_type, publication_name)
+    return rds.hexists(key, hash)
+
+
+def run_deferred_publication_chain(workspace, publication_type, publication_name):
+    """Sends deferred chain to broker. If more processes call it concurrently, only one of them sends the chain.
+    Returns True if the chain was sent by this call."""
+    val = _pop_deferred_publication_chain(workspace, publication_type, publication_name)
+    if val is None:
+        return False
+    from layman import celery_app
+    celery_app.signature(json.loads(val)).apply_async()
+    return True
+
+
+def fail_deferred_publication_chain(workspace, publication_type, publication_name, exc):
+    """Marks first task of deferred chain as failed with exception `exc` and finishes the chain without running it.
+    Returns True if the chain was failed by this call."""
+    val = _pop_deferred_publication_chain(workspace, publication_type, publication_name)
+    if val is None:
+        return False
+    from layman import celery_app
+    chain_info = get_publication_chain_info_dict(workspace, publication_type, publication_name)
+    celery_app.backend.mark_as_failure(chain_info['by_order'][0], exc)
+    finish_publication_chain(chain_info['last'])
+    clear_steps_to_run_after_chain(workspace, publication_type, publication_name)
+    return True
 
-def abort_chain(chain_info):
+
+def abort_chain(chain_info, wait=True):
+    """Aborts not-yet-ready tasks of the chain and finishes the chain. Returns IDs of tasks that are still running,
+    see abort_task_chain."""
     if chain_info is None or is_chain_ready(chain_info):
-        return
+        return []
 
-    abort_task_chain(chain_info['by_order'], chain_info['by_name'])
+    running_task_ids = abort_task_chain(chain_info['by_order'], chain_info['by_name'], wait=wait)
     finish_publication_chain(chain_info['last'].task_id)
+    return running_task_ids
 
 
-def abort_publication_chain(workspace, publication_type, publication_name):
+def abort_publication_chain(workspace, publication_type, publication_name, wait=True):
+    # deferred chain must not be sent to broker after it was aborted
+    _pop_deferred_publication_chain(workspace, publication_type, publication_name)
     chain_info = get_publication_chain_info(workspace, publication_type, publication_name)
-    abort_chain(chain_info)
+    running_task_ids = abort_chain(chain_info, wait=wait)
     clear_steps_to_run_after_chain(workspace, publication_type, publication_name)
+    return running_task_ids
 
 
-def abort_task_chain(results_by_order, results_by_name=None):
+def abort_task_chain(results_by_order, results_by_name=None, wait=True):
+    """Aborts all not-yet-ready tasks at once. If `wait` is true, waits until tasks that were already running finish,
+    but at most ABORT_WAIT_TIMEOUT seconds in total. Returns IDs of tasks that were running and are not finished yet,
+    i.e. they are still being aborted."""
     results_by_name = results_by_name or {}
-    task_results = [r for r in results_by_order if not r.ready()]
+    task_names = {task_result.task_id: task_name for task_name, task_result in results_by_name.items()}
+    metas = get_task_metas([r.task_id for r in results_by_order])
+    task_results = [r for r in results_by_order if metas[r.task_id]['status'] not in states.READY_STATES]
     current_app.logger.info(
         f"Aborting chain of {len(results_by_order)} tasks, {len(task_results)} of them are not yet ready.")
 
+    running_task_ids = []
     for task_result in task_results:
-        task_name = next((k for k, v in results_by_name.items() if v == task_result), None)
+        prev_task_state = metas[task_result.task_id]['status']
         current_app.logger.info(
-            f'processing result {task_name} {task_result.id} {task_result.state} {task_result.ready()} {task_result.successful()} {task_result.failed()}')
-        if task_result.ready():
-            continue
-        prev_task_state = task_result.state
-        current_app.logger.info(f'aborting result {task_name} {task_result.id} with state {task_result.state}')
+            f'aborting result {task_names.get(task_result.task_id)} {task_result.id} with state {prev_task_state}')
         task_result.abort()
-        assert task_result.state == 'ABORTED'
-        if prev_task_state == 'STARTED':
-            current_app.logger.info(
-                f'waiting for result of {task_name} {task_result.id} with state {task_result.state}')
-            # if hangs forever, see comment in src/layman/layer/rest_workspace_test.py::test_post_layers_simple
-            try:
-                task_result.get(propagate=False, timeout=2)
-            except celery.exceptions.TimeoutError:
-                pass
-        current_app.logger.info(f'aborted result {task_name} {task_result.id} with state {task_result.state}')
+        if prev_task_state == states.STARTED:
+            running_task_ids.append(task_result.task_id)
+
+    if wait:
+        running_task_ids = wait_for_aborted_tasks(running_task_ids)
+    for task_id in running_task_ids:
+        current_app.logger.info(f'result {task_names.get(task_id)} {task_id} is still being aborted')
+    return running_task_ids
+
+
+def wait_for_aborted_tasks(task_ids, timeout=None):
+    """Waits until all aborted tasks finish, but at most `timeout` seconds in total (ABORT_WAIT_TIMEOUT by default).
+    States of all tasks are read by one request to result backend in each round. Returns IDs of unfinished tasks."""
+    timeout = ABORT_WAIT_TIMEOUT if timeout is None else timeout
+    deadline = time.time() + timeout
+    while task_ids:
+        metas = get_task_metas(task_ids)
+        task_ids = [task_id for task_id in task_ids if metas[task_id]['status'] not in states.READY_STATES]
+        if not task_ids or time.time() >= deadline:
+            break
+        time.sleep(min(ABORT_WAIT_CHECK_INTERVAL, max(deadline - time.time(), 0)))
+    return task_ids
 
 
 def is_chain_successful(chain_info):
-    return chain_info['last'].successful()
+    return chain_info.get('state') == states.SUCCESS or all(tr.successful() for tr in chain_info['stages'][-1])
 
 
 def is_chain_failed(chain_info):
-    return any(tr.failed() for tr in chain_info['by_order'])
+    return chain_info.get('state') == states.FAILURE or any(tr.failed() for tr in chain_info['by_order'])
 
 
 def is_chain_ready(chain_info):
-    return is_chain_successful(chain_info) or is_chain_failed(chain_info)
+    if is_chain_successful(chain_info):
+        return True
+    if chain_info.get('state') == states.FAILURE:
+        return True
+    # failed chain is ready when other tasks of the stage with failed task are ready too
+    for stage in chain_info['stages']:
+        if not all(tr.ready() for tr in stage):
+            return False
+        if any(tr.failed() for tr in stage):
+            return True
+    return False
 
 
 def _get_publication_hash(workspace, publication_type, publication_name):
@@ -259,6 +678,11 @@ def _get_publication_hash(workspace, publication_type, publication_name):
 
 
 def delete_publication(workspace, publication_type, publication_name):
+    publication_info_cache.delete(workspace, publication_type, publication_name)
+    _pop_deferred_publication_chain(workspace, publication_type, publication_name)
+    settings.LAYMAN_REDIS.delete(_get_pending_feature_changes_key(workspace, publication_type, publication_name))
+    settings.LAYMAN_REDIS.delete(_get_pending_housekeeping_key(workspace, publication_type, publication_name))
+    settings.LAYMAN_REDIS.delete(_get_task_timings_key(workspace, publication_type, publication_name))
     chain_info = get_publication_chain_info_dict(workspace, publication_type, publication_name)
     if chain_info is None:
         return
@@ -70,7 +70,9 @@ def test_single_abortable_task():
 
     assert results[0].state == results_copy[0].state == 'STARTED'
     with app.app_context():
-        celery_util.abort_task_chain(results_copy)
+        running_task_ids = celery_util.abort_task_chain(results_copy, wait=False)
+        assert running_task_ids == [task_result.task_id]
+        assert celery_util.wait_for_aborted_tasks(running_task_ids) == []
     # first one is failure, because it throws AbortedException
     assert results[0].state == results_copy[0].state == 'FAILURE'
     with app.app_context():
@@ -134,5 +136,88 @@ def test_abortable_task_chain():
     # second one (and all others) was revoked, but it was not started at all because of previous failure, so it's pending for ever
     assert results[1].state == results_copy[1].state == 'ABORTED'
     assert results[2].state == results_copy[2].state == 'ABORTED'
+    metas = celery_util.get_task_metas([r.task_id for r in results])
+    assert [metas[r.task_id]['status'] for r in results] == ['FAILURE', 'ABORTED', 'ABORTED']
     with app.app_context():
         input_chunk.delete_layer(workspace, layername)
+
+
+@pytest.mark.usefixtures('client')
+def test_deferred_chain_failure():
+    task_names = [
+        'layman.layer.filesystem.tasks.refresh_input_chunk',
+        'layman.layer.db.tasks.refresh_table',
+    ]
+    tasks = [
+        getattr(
+            importlib.import_module(taskname.rsplit('.', 1)[0]),
+            taskname.rsplit('.', 1)[1]
+        ) for taskname in task_names
+    ]
+    task_options = {
+        'crs_id': 'EPSG:4326',
+        'check_crs': False,
+    }
+    workspace = 'test_abort_user'
+    layername = 'test_deferred_layer'
+    publ_type = 'layman.layer'
+    task_stages = [[t] for t in tasks]
+    task_chain, task_id_stages = tasks_util.get_chain_of_stages(workspace, layername, task_stages, task_options,
+                                                                'layername')
+    with app.app_context():
+        celery_util.defer_publication_chain(workspace, publ_type, layername, task_stages, task_id_stages, task_chain)
+        assert celery_util.is_publication_chain_deferred(workspace, publ_type, layername)
+        chain_info = celery_util.get_publication_chain_info(workspace, publ_type, layername)
+        assert chain_info['last'].task_id == task_id_stages[-1][-1]
+        assert not celery_util.is_chain_ready(chain_info)
+
+        assert celery_util.fail_deferred_publication_chain(workspace, publ_type, layername, Exception('Test'))
+        assert not celery_util.is_publication_chain_deferred(workspace, publ_type, layername)
+        assert not celery_util.run_deferred_publication_chain(workspace, publ_type, layername)
+        chain_info = celery_util.get_publication_chain_info(workspace, publ_type, layername)
+        assert celery_util.is_chain_ready(chain_info)
+        assert celery_util.is_chain_failed(chain_info)
+        celery_util.delete_publication(workspace, publ_type, layername)
+
+
+@pytest.mark.usefixtures('client')
+def test_publication_chain_timings():
+    from layman.layer.db import tasks as db_tasks
+    from layman.layer.filesystem import tasks as filesystem_tasks
+    tasks = [filesystem_tasks.refresh_input_chunk, db_tasks.refresh_table]
+    workspace = 'test_abort_user'
+    layername = 'test_timings_layer'
+    publ_type = 'layman.layer'
+    task_stages = [[t] for t in tasks]
+    task_chain, task_id_stages = tasks_util.get_chain_of_stages(workspace, layername, task_stages, {}, 'layername')
+    first_task_id = task_id_stages[0][0]
+    with app.app_context():
+        celery_util.defer_publication_chain(workspace, publ_type, layername, task_stages, task_id_stages, task_chain)
+        celery_util.task_published(workspace, publ_type, layername, first_task_id)
+        celery_util._set_task_timing(workspace, publ_type, layername, first_task_id, started=time.time(), hostname='worker@test')
+        celery_util._finish_task_timing(workspace, publ_type, layername, first_task_id, tasks[0].name)
+
+        timings = celery_util.get_publication_chain_timings(workspace, publ_type, layername)
+        assert [timing['task'] for timing in timings] == [t.name for t in tasks]
+        assert timings[0]['worker'] == 'worker@test'
+        assert all(timings[0][key] is not None for key in ['enqueued_at', 'started_at', 'finished_at', ])
+        assert 0 <= timings[0]['queue_wait'] and 0 <= timings[0]['duration']
+        assert all(value is None for key, value in timings[1].items() if key != 'task')
+
+        percentiles = celery_util.get_task_timing_percentiles()[tasks[0].name]
+        assert percentiles['duration']['count'] >= 1
+        assert percentiles['queue_wait']['p50'] is not None
+
+        celery_util.fail_deferred_publication_chain(workspace, publ_type, layername, Exception('Test'))
+        celery_util.delete_publication(workspace, publ_type, layername)
+        assert celery_util.get_publication_chain_timings(workspace, publ_type, layername) is None
+
+
+@pytest.mark.parametrize('bucket_counts, percentile, expected_result', [
+    ([1] + [0] * len(celery_util.TASK_TIMING_BUCKETS), 50, celery_util.TASK_TIMING_BUCKETS[0]),
+    ([0, 5, 5] + [0] * (len(celery_util.TASK_TIMING_BUCKETS) - 2), 50, celery_util.TASK_TIMING_BUCKETS[1]),
+    ([0, 5, 5] + [0] * (len(celery_util.TASK_TIMING_BUCKETS) - 2), 90, celery_util.TASK_TIMING_BUCKETS[2]),
+    ([0] * len(celery_util.TASK_TIMING_BUCKETS) + [1], 50, None),
+])
+def test_get_percentile(bucket_counts, percentile, expected_result):
+    assert celery_util._get_percentile(bucket_counts, percentile) == expected_result
@@ -43,6 +43,30 @@ def get_intersection(bbox1, bbox2):
     return intersection
 
 
+def get_union(bbox1, bbox2):
+    if is_empty(bbox1):
+        return tuple(bbox2)
+    if is_empty(bbox2):
+        return tuple(bbox1)
+    return (min(bbox1[0], bbox2[0]), min(bbox1[1], bbox2[1]), max(bbox1[2], bbox2[2]), max(bbox1[3], bbox2[3]),)
+
+
+def is_inside_boundary(bbox1, bbox2):
+    """Returns True if bbox2 lies in bbox1 without touching its boundary."""
+    return not is_empty(bbox1) and not is_empty(bbox2) \
+        and bbox1[0] < bbox2[0] and bbox2[2] < bbox1[2] and bbox1[1] < bbox2[1] and bbox2[3] < bbox1[3]
+
+
+def get_bbox_after_change(bbox, added_bbox, removed_bbox):
+    """Returns bbox of features after features within `removed_bbox` were removed and features within `added_bbox` were added.
+
+    If removed features could lie on the boundary of original `bbox`, new bbox can not be derived and None is returned.
+    """
+    if not is_empty(removed_bbox) and not is_inside_boundary(bbox, removed_bbox):
+        return None
+    return get_union(bbox, added_bbox)
+
+
 def has_area(bbox):
     return not is_empty(bbox) and bbox[0] != bbox[2] and bbox[1] != bbox[3]
 
@@ -71,3 +71,27 @@ def test_has_area(bbox, expected_result):
 ])
 def test_ensure_bbox_with_area(bbox, no_area_padding, expected_result):
     assert bbox_util.ensure_bbox_with_area(bbox, no_area_padding) == expected_result
+
+
+@pytest.mark.parametrize('bbox1, bbox2, expected_result', [
+    ((1, 1, 4, 4, ), (2, 2, 5, 3, ), (1, 1, 5, 4, )),
+    ((1, 1, 4, 4, ), (2, 2, 3, 3, ), (1, 1, 4, 4, )),
+    ((1, 1, 4, 4, ), (None, None, None, None, ), (1, 1, 4, 4, )),
+    ((None, None, None, None, ), (1, 1, 4, 4, ), (1, 1, 4, 4, )),
+])
+def test_get_union(bbox1, bbox2, expected_result):
+    assert bbox_util.get_union(bbox1, bbox2) == expected_result
+
+
+@pytest.mark.parametrize('bbox, added_bbox, removed_bbox, expected_result', [
+    ((1, 1, 4, 4, ), (2, 2, 5, 3, ), (None, None, None, None, ), (1, 1, 5, 4, )),
+    ((1, 1, 4, 4, ), (None, None, None, None, ), (2, 2, 3, 3, ), (1, 1, 4, 4, )),
+    ((1, 1, 4, 4, ), (0, 2, 3, 3, ), (2, 2, 3, 3, ), (0, 1, 4, 4, )),
+    ((1, 1, 4, 4, ), (None, None, None, None, ), (1, 2, 3, 3, ), None),
+    ((1, 1, 4, 4, ), (2, 2, 3, 3, ), (2, 2, 3, 4, ), None),
+    ((1, 1, 1, 1, ), (None, None, None, None, ), (1, 1, 1, 1, ), None),
+    ((None, None, None, None, ), (1, 1, 4, 4, ), (None, None, None, None, ), (1, 1, 4, 4, )),
+    ((None, None, None, None, ), (1, 1, 4, 4, ), (2, 2, 3, 3, ), None),
+])
+def test_get_bbox_after_change(bbox, added_bbox, removed_bbox, expected_result):
+    assert bbox_util.get_bbox_after_change(bbox, added_bbox, removed_bbox) == expected_result
@@ -0,0 +1,32 @@
+from celery.utils.log import get_task_logger
+
+from layman import celery_app, settings, celery as celery_util, util as layman_util
+
+logger = get_task_logger(__name__)
+
+
+def schedule_flush(workspace, publication_type, publication_name, countdown):
+    flush_feature_changes.apply_async(
+        args=[workspace, publication_type, publication_name],
+        countdown=countdown,
+        queue=settings.LAYMAN_CELERY_QUEUE,
+    )
+
+
+# Name intentionally does not start with publication type, so that the task is not considered part of publication chain
+@celery_app.task(
+    name='layman.common.feature_change.flush',
+)
+def flush_feature_changes(workspace, publication_type, publication_name):
+    num_changes, delay = celery_util.pop_feature_changes_if_quiet(
+        workspace, publication_type, publication_name,
+        settings.LAYMAN_FEATURE_CHANGE_QUIET_PERIOD, settings.LAYMAN_FEATURE_CHANGE_MAX_DELAY,
+    )
+    if delay is not None:
+        schedule_flush(workspace, publication_type, publication_name, delay)
+        return
+    if num_changes is None:
+        return
+    logger.info(f'Coalesced {num_changes} feature change(s) of {workspace}:{publication_type}:{publication_name} '
+                f'into one patch_after_feature_change')
+    layman_util.patch_after_feature_change(workspace, publication_type, publication_name)
@@ -1,6 +1,6 @@
 import os
 
-from layman.uuid import register_publication_uuid, delete_publication_uuid
+from layman.uuid import register_publication_uuid, register_publication_uuids, delete_publication_uuid
 from . import util
 
 PUBLICATION_SUBFILE = 'uuid.txt'
@@ -46,3 +46,13 @@ def assign_publication_uuid(publ_type, workspace, publication_name, uuid_str=Non
     with open(uuid_path, "w") as uuid_file:
         uuid_file.write(uuid_str)
     return uuid_str
+
+
+def assign_publication_uuids(publ_type, workspace, publication_names):
+    uuids = register_publication_uuids(workspace, publ_type, publication_names)
+    for publication_name, uuid_str in uuids.items():
+        uuid_path = get_publication_uuid_file(publ_type, workspace, publication_name)
+        util.ensure_publication_dir(publ_type, workspace, publication_name)
+        with open(uuid_path, "w") as uuid_file:
+            uuid_file.write(uuid_str)
+    return uuids
@@ -13,3 +13,12 @@ ORDERING_BBOX = 'ordering_bbox'
 
 LIMIT = 'limit'
 OFFSET = 'offset'
+CURSOR = 'cursor'
+
+TOTAL_COUNT = 'total_count'
+TOTAL_COUNT_EXACT = 'exact'
+TOTAL_COUNT_ESTIMATE = 'estimate'
+
+HEADER_TOTAL_COUNT = 'X-Total-Count'
+HEADER_TOTAL_COUNT_ESTIMATE = 'X-Total-Count-Estimate'
+HEADER_NEXT_CURSOR = 'X-Next-Cursor'
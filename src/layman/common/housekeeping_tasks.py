@@ -0,0 +1,54 @@
+from functools import wraps
+
+from celery.utils import uuid
+from celery.utils.log import get_task_logger
+
+from layman import celery_app, settings, celery as celery_util, util as layman_util
+from layman.publication_relation.util import update_related_publications_after_change
+
+logger = get_task_logger(__name__)
+
+
+def schedule(task, workspace, publication_type, publication_name):
+    # publication is considered UPDATING until the task finishes
+    task_id = uuid()
+    celery_util.add_pending_housekeeping(workspace, publication_type, publication_name, task_id)
+    task.apply_async(
+        args=[workspace, publication_type, publication_name],
+        queue=settings.LAYMAN_CELERY_QUEUE,
+        task_id=task_id,
+    )
+
+
+def _housekeeping_decorator(func):
+    @wraps(func)
+    def decorated_function(self, workspace, publication_type, publication_name):
+        try:
+            func(workspace, publication_type, publication_name)
+        finally:
+            celery_util.remove_pending_housekeeping(workspace, publication_type, publication_name, self.request.id)
+    return decorated_function
+
+
+# Names of housekeeping tasks intentionally do not start with publication type, so that they are not considered part
+# of publication chain
+@celery_app.task(
+    name='layman.common.housekeeping.update_related_publications',
+    bind=True,
+)
+@_housekeeping_decorator
+def update_related_publications(workspace, publication_type, publication_name):
+    update_related_publications_after_change(workspace, publication_type, publication_name)
+
+
+@celery_app.task(
+    name='layman.common.housekeeping.delete_publication_if_not_exists',
+    bind=True,
+)
+@_housekeeping_decorator
+def delete_publication_if_not_exists(workspace, publication_type, publication_name):
+    info = layman_util.get_publication_info(workspace, publication_type, publication_name, context={'keys': ['name']})
+    if not info:
+        logger.warning(f"Publication workspace={workspace}, publication_type={publication_type}, "
+                       f"publication_name={publication_name} does not exist, so we delete it")
+        layman_util.delete_workspace_publication(workspace, publication_type, publication_name)
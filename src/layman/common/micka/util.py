@@ -229,6 +229,8 @@ def create_csw():
         'password': settings.CSW_BASIC_AUTHN[1],
     }
     opts['skip_caps'] = True
+    # the same bound as other requests to Micka, so that hanging Micka does not keep publication info thread forever
+    opts['timeout'] = 5
     csw = CatalogueServiceWeb(settings.CSW_URL, **opts) if settings.CSW_URL is not None else None
     return csw
 
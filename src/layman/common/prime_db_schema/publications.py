@@ -1,5 +1,8 @@
+import copy
 import logging
+import threading
 import psycopg2.extras
+from flask import g, has_request_context
 
 from db import util as db_util
 from layman import settings, LaymanError
@@ -13,6 +16,8 @@ DB_SCHEMA = settings.LAYMAN_PRIME_SCHEMA
 ROLE_EVERYONE = settings.RIGHTS_EVERYONE_ROLE
 psycopg2.extras.register_uuid()
 
+FLASK_INFO_MEMO_KEY = f'{__name__}:INFO_MEMO'
+
 
 def get_publication_infos(workspace_name=None, pub_type=None, style_type=None,
                           reader=None, writer=None,
@@ -21,6 +26,53 @@ def get_publication_infos(workspace_name=None, pub_type=None, style_type=None,
                                                reader, writer,)['items']
 
 
+def get_info_memo():
+    # Publication infos are remembered only within one request, so that authn, authz and info decorators
+    # share one DB round trip. Threads started by layman.util.call_modules_fn_concurrently get the same memo by copy of g,
+    # so the memo is accessed only under its lock.
+    memo = g.get(FLASK_INFO_MEMO_KEY)
+    if memo is None and has_request_context():
+        memo = g.setdefault(FLASK_INFO_MEMO_KEY, {'infos': dict(), 'hits': 0, 'misses': 0, 'lock': threading.Lock()})
+    return memo
+
+
+def get_info_memo_stats():
+    memo = get_info_memo()
+    if memo is None:
+        return None
+    with memo['lock']:
+        return {'hits': memo['hits'], 'misses': memo['misses']}
+
+
+def invalidate_info_memo(workspace_name=None, pub_type=None, pub_name=None):
+    memo = g.get(FLASK_INFO_MEMO_KEY)
+    if memo is None:
+        return
+    with memo['lock']:
+        if pub_name is None:
+            memo['infos'].clear()
+        else:
+            memo['infos'].pop((workspace_name, pub_type, pub_name), None)
+
+
+def get_publication_info(workspace_name, pub_type, pub_name):
+    memo = get_info_memo()
+    key = (workspace_name, pub_type, pub_name)
+    if memo is not None:
+        with memo['lock']:
+            if key in memo['infos']:
+                memo['hits'] += 1
+                return copy.deepcopy(memo['infos'][key])
+
+    infos = get_publication_infos_with_metainfo(workspace_name, pub_type, pub_name=pub_name)['items']
+    info = infos.get(key, dict())
+    if memo is not None:
+        with memo['lock']:
+            memo['misses'] += 1
+            memo['infos'][key] = copy.deepcopy(info)
+    return info
+
+
 def get_publication_infos_with_metainfo(workspace_name=None, pub_type=None, style_type=None,
                                         reader=None, writer=None,
                                         limit=None, offset=None,
@@ -29,8 +81,19 @@ def get_publication_infos_with_metainfo(workspace_name=None, pub_type=None, styl
                                         order_by_list=None,
                                         ordering_full_text=None,
                                         ordering_bbox=None,
+                                        pub_name=None,
+                                        after_keys=None,
+                                        exact_count=True,
                                         ):
+    """Returns dict with publication infos, total count and content range.
+
+    If `after_keys` is set, only publications that follow publication with these ordering keys are returned
+    (keyset pagination). Ordering keys of the last returned publication are returned as `last_keys`.
+    If `exact_count` is false, total count is only estimated by query planner and `total_count_estimated` is true.
+    """
     order_by_list = order_by_list or []
+    assert len(order_by_list) <= 1
+    assert not (offset and after_keys)
 
     full_text_tsquery = db_util.to_tsquery_string(full_text_filter) if full_text_filter else None
     full_text_like = '%' + full_text_filter + '%' if full_text_filter else None
@@ -39,37 +102,29 @@ def get_publication_infos_with_metainfo(workspace_name=None, pub_type=None, styl
     where_params_def = [
         (workspace_name, 'w.name = %s', (workspace_name,)),
         (pub_type, 'p.type = %s', (pub_type,)),
+        (pub_name, 'p.name = %s', (pub_name,)),
         (style_type, 'p.style_type::text = %s', (style_type,)),
         (reader and not is_user_with_name(reader), 'p.everyone_can_read = TRUE', tuple()),
-        (is_user_with_name(reader), f"""(p.everyone_can_read = TRUE
+        (is_user_with_name(reader), """(p.everyone_can_read = TRUE
                         or (u.id is not null and w.name = %s)
-                        or EXISTS(select 1
-                                  from {DB_SCHEMA}.rights r inner join
-                                       {DB_SCHEMA}.users u2 on r.id_user = u2.id inner join
-                                       {DB_SCHEMA}.workspaces w2 on w2.id = u2.id_workspace
-                                  where r.id_publication = p.id
-                                    and r.type = 'read'
-                                    and w2.name = %s))""", (reader, reader,)),
+                        or p.read_users @> ARRAY[%s]::varchar(256)[])""", (reader, reader,)),
         (writer and not is_user_with_name(writer), 'p.everyone_can_write = TRUE', tuple()),
-        (is_user_with_name(writer), f"""(p.everyone_can_write = TRUE
+        (is_user_with_name(writer), """(p.everyone_can_write = TRUE
                         or (u.id is not null and w.name = %s)
-                        or EXISTS(select 1
-                                  from {DB_SCHEMA}.rights r inner join
-                                       {DB_SCHEMA}.users u2 on r.id_user = u2.id inner join
-                                       {DB_SCHEMA}.workspaces w2 on w2.id = u2.id_workspace
-                                  where r.id_publication = p.id
-                                    and r.type = 'write'
-                                    and w2.name = %s))""", (writer, writer,)),
+                        or p.write_users @> ARRAY[%s]::varchar(256)[])""", (writer, writer,)),
         (full_text_filter, '(_prime_schema.my_unaccent(p.title) @@ to_tsquery(unaccent(%s))'
                            'or lower(unaccent(p.title)) like lower(unaccent(%s)))', (full_text_tsquery, full_text_like,)),
         (bbox_filter, 'p.bbox && ST_MakeBox2D(ST_MakePoint(%s, %s), ST_MakePoint(%s, %s))', bbox_filter),
     ]
 
+    # (ordering key expression, direction, params, type of ordering key)
+    # Float ranks are compared as numeric, whose text representation is exact regardless of session
+    # settings (e.g. extra_float_digits), so ordering keys survive round trip to keyset pagination clause.
     order_by_definition = {
-        consts.ORDER_BY_FULL_TEXT: ('ts_rank_cd(_prime_schema.my_unaccent(p.title), to_tsquery(unaccent(%s))) DESC',
-                                    (ordering_full_text_tsquery,)),
-        consts.ORDER_BY_TITLE: ('lower(unaccent(p.title)) ASC', tuple()),
-        consts.ORDER_BY_LAST_CHANGE: ('updated_at DESC', tuple()),
+        consts.ORDER_BY_FULL_TEXT: ('ts_rank_cd(_prime_schema.my_unaccent(p.title), to_tsquery(unaccent(%s)))', 'DESC',
+                                    (ordering_full_text_tsquery,), 'numeric'),
+        consts.ORDER_BY_TITLE: ('lower(unaccent(p.title))', 'ASC', tuple(), 'text'),
+        consts.ORDER_BY_LAST_CHANGE: ('updated_at', 'DESC', tuple(), 'timestamptz'),
         consts.ORDER_BY_BBOX: ("""
             -- A∩B / (A + B)
             CASE
@@ -90,11 +145,21 @@ def get_publication_infos_with_metainfo(workspace_name=None, pub_type=None, styl
                 -- if there is no intersection, result is 0 in all cases
                 ELSE
                     0
-            END DESC
-            """, ordering_bbox + ordering_bbox + ordering_bbox if ordering_bbox else tuple()),
+            END
+            """, 'DESC', ordering_bbox + ordering_bbox + ordering_bbox if ordering_bbox else tuple(), 'numeric'),
     }
 
     assert all(ordering_item in order_by_definition.keys() for ordering_item in order_by_list)
+    order_by_item = order_by_list[0] if order_by_list else None
+
+    #########################################################
+    # Ordering keys, used for keyset pagination
+    if order_by_item:
+        order_key_expression, order_key_direction, order_key_params, order_key_type = order_by_definition[order_by_item]
+    else:
+        order_key_expression, order_key_direction, order_key_params, order_key_type = 'null', 'ASC', tuple(), 'text'
+    # numeric keys are returned as text to keep them exact and JSON-serializable in pagination cursor
+    order_key_select_suffix = '::text' if order_key_type == 'numeric' else ''
 
     #########################################################
     # SELECT clause
@@ -111,30 +176,20 @@ select p.id as id_publication,
        ST_YMIN(p.bbox) as ymin,
        ST_XMAX(p.bbox) as xmax,
        ST_YMAX(p.bbox) as ymax,
-       (select rtrim(concat(case when u.id is not null then w.name || ',' end,
-                            string_agg(w2.name, ',') || ',',
-                            case when p.everyone_can_read then %s || ',' end
-                            ), ',')
-        from {DB_SCHEMA}.rights r inner join
-             {DB_SCHEMA}.users u2 on r.id_user = u2.id inner join
-             {DB_SCHEMA}.workspaces w2 on w2.id = u2.id_workspace
-        where r.id_publication = p.id
-          and r.type = 'read') can_read_users,
-       (select rtrim(concat(case when u.id is not null then w.name || ',' end,
-                            string_agg(w2.name, ',') || ',',
-                            case when p.everyone_can_write then %s || ',' end
-                            ), ',')
-        from {DB_SCHEMA}.rights r inner join
-             {DB_SCHEMA}.users u2 on r.id_user = u2.id inner join
-             {DB_SCHEMA}.workspaces w2 on w2.id = u2.id_workspace
-        where r.id_publication = p.id
-          and r.type = 'write') can_write_users,
-       count(*) OVER() AS full_count
-from {DB_SCHEMA}.workspaces w inner join
+       array_cat(case when u.id is not null then ARRAY[w.name] else ARRAY[]::varchar[] end,
+                 p.read_users)
+       || case when p.everyone_can_read then ARRAY[%s]::varchar[] else ARRAY[]::varchar[] end as can_read_users,
+       array_cat(case when u.id is not null then ARRAY[w.name] else ARRAY[]::varchar[] end,
+                 p.write_users)
+       || case when p.everyone_can_write then ARRAY[%s]::varchar[] else ARRAY[]::varchar[] end as can_write_users,
+       ({order_key_expression})::{order_key_type}{order_key_select_suffix} as order_key,
+       {'count(*) OVER()' if exact_count and not after_keys else 'null'} AS full_count
+"""
+    from_clause = f"""from {DB_SCHEMA}.workspaces w inner join
      {DB_SCHEMA}.publications p on p.id_workspace = w.id left join
      {DB_SCHEMA}.users u on u.id_workspace = w.id
 """
-    select_params = (ROLE_EVERYONE, ROLE_EVERYONE, )
+    select_params = (ROLE_EVERYONE, ROLE_EVERYONE, ) + order_key_params
 
     #########################################################
     # WHERE clause
@@ -148,13 +203,31 @@ from {DB_SCHEMA}.workspaces w inner join
     if where_parts:
         where_clause = 'WHERE ' + '\n  AND '.join(where_parts) + '\n'
 
+    #########################################################
+    # Keyset pagination clause
+    keyset_params = tuple()
+    keyset_clause = ''
+    if after_keys:
+        order_key, workspace_key, name_key = after_keys
+        names_part = '(w.name, p.name) > (%s, %s)'
+        names_params = (workspace_key, name_key)
+        if order_by_item:
+            comparison = '>' if order_key_direction == 'ASC' else '<'
+            keyset_part = f"""(({order_key_expression})::{order_key_type} {comparison} %s::{order_key_type}
+    or (({order_key_expression})::{order_key_type} = %s::{order_key_type} and {names_part}))"""
+            keyset_params = order_key_params + (order_key, ) + order_key_params + (order_key, ) + names_params
+        else:
+            keyset_part = names_part
+            keyset_params = names_params
+        keyset_clause = ('WHERE ' if not where_parts else '  AND ') + keyset_part + '\n'
+
     #########################################################
     # ORDER BY clause
     order_by_params = tuple()
     order_by_parts = list()
-    for order_by_part in order_by_list:
-        order_by_parts.append(order_by_definition[order_by_part][0])
-        order_by_params = order_by_params + order_by_definition[order_by_part][1]
+    if order_by_item:
+        order_by_parts.append(f'({order_key_expression})::{order_key_type} {order_key_direction}')
+        order_by_params = order_by_params + order_key_params
 
     order_by_parts.append('w.name ASC')
     order_by_parts.append('p.name ASC')
@@ -176,8 +249,8 @@ from {DB_SCHEMA}.workspaces w inner join
 
     #########################################################
     # Put it together
-    sql_params = select_params + where_params + order_by_params + pagination_params
-    select = select_clause + where_clause + order_by_clause + pagination_clause
+    sql_params = select_params + where_params + keyset_params + order_by_params + pagination_params
+    select = select_clause + from_clause + where_clause + keyset_clause + order_by_clause + pagination_clause
     values = db_util.run_query(select, sql_params)
 
     # print(f'get_publication_infos:\n\nselect={select}\n\nsql_params={sql_params}\n\n&&&&&&&&&&&&&&&&&')
@@ -192,26 +265,37 @@ from {DB_SCHEMA}.workspaces w inner join
                                    'style_type': style_type,
                                    'updated_at': updated_at,
                                    'bounding_box': [xmin, ymin, xmax, ymax],
-                                   'access_rights': {'read': can_read_users.split(','),
-                                                     'write': can_write_users.split(',')}
+                                   'access_rights': {'read': can_read_users,
+                                                     'write': can_write_users}
                                    }
              for id_publication, workspace_name, type, publication_name, title, uuid, style_type, updated_at, xmin, ymin, xmax, ymax,
-             can_read_users, can_write_users, _
+             can_read_users, can_write_users, _, _
              in values}
 
-    if values:
+    total_count_estimated = False
+    if values and values[0][-1] is not None:
         total_count = values[0][-1]
-    else:
+    elif not values and not offset and not after_keys and limit != 0:
+        total_count = 0
+    elif exact_count:
         count_clause = f"""
         select count(*) AS full_count
-        from {DB_SCHEMA}.workspaces w inner join
-             {DB_SCHEMA}.publications p on p.id_workspace = w.id left join
-             {DB_SCHEMA}.users u on u.id_workspace = w.id
         """
         sql_params = where_params
-        select = count_clause + where_clause
+        select = count_clause + from_clause + where_clause
         count = db_util.run_query(select, sql_params)
         total_count = count[0][-1]
+    else:
+        sql_params = where_params
+        select = 'EXPLAIN (FORMAT JSON) select 1\n' + from_clause + where_clause
+        plan = db_util.run_query(select, sql_params)[0][0]
+        total_count = plan[0]['Plan']['Plan Rows']
+        total_count_estimated = True
+
+    last_keys = None
+    if values:
+        _, last_workspace, _, last_name, *_, last_order_key, _ = values[-1]
+        last_keys = (last_order_key, last_workspace, last_name)
 
     if infos:
         start = offset + 1 if offset else 1
@@ -221,7 +305,9 @@ from {DB_SCHEMA}.workspaces w inner join
 
     result = {'items': infos,
               'total_count': total_count,
+              'total_count_estimated': total_count_estimated,
               'content_range': content_range,
+              'last_keys': last_keys,
               }
     return result
 
@@ -337,6 +423,7 @@ returning id
     rights.insert_rights(pub_id,
                          write_users,
                          'write')
+    invalidate_info_memo(workspace_name, info.get("publ_type_name"), info.get("name"))
     return pub_id
 
 
@@ -353,10 +440,7 @@ def update_publication(workspace_name, info):
         }
 
     if info.get("access_rights") and (info["access_rights"].get("read") or info["access_rights"].get("write")):
-        info_old = get_publication_infos(workspace_name,
-                                         info["publ_type_name"])[(workspace_name,
-                                                                  info["publ_type_name"],
-                                                                  info["name"],)]
+        info_old = get_publication_info(workspace_name, info["publ_type_name"], info["name"])
         for right_type in right_type_list:
             access_rights_changes[right_type]['username_list_old'] = info_old["access_rights"][right_type]
             info["access_rights"][right_type + "_old"] = access_rights_changes[right_type]['username_list_old']
@@ -397,13 +481,14 @@ returning id
         rights.insert_rights(pub_id, access_rights_changes[right_type]['add'], right_type)
         rights.remove_rights(pub_id, access_rights_changes[right_type]['remove'], right_type)
 
+    invalidate_info_memo(workspace_name, info.get("publ_type_name"), info.get("name"))
     return pub_id
 
 
 def delete_publication(workspace_name, type, name):
     workspace_info = workspaces.get_workspace_infos(workspace_name).get(workspace_name)
     if workspace_info:
-        id_publication = get_publication_infos(workspace_name, type).get((workspace_name, type, name), dict()).get("id")
+        id_publication = get_publication_info(workspace_name, type, name).get("id")
         if id_publication:
             rights.delete_rights_for_publication(id_publication)
             id_workspace = workspace_info["id"]
@@ -411,12 +496,26 @@ def delete_publication(workspace_name, type, name):
             db_util.run_statement(sql, (id_workspace,
                                         name,
                                         type,))
+            invalidate_info_memo(workspace_name, type, name)
         else:
             logger.warning(f'Deleting NON existing publication. workspace_name={workspace_name}, type={type}, pub_name={name}')
     else:
         logger.warning(f'Deleting publication for NON existing workspace. workspace_name={workspace_name}, type={type}, pub_name={name}')
 
 
+def get_bbox(workspace, publication_type, publication):
+    query = f'''select ST_XMIN(p.bbox),
+           ST_YMIN(p.bbox),
+           ST_XMAX(p.bbox),
+           ST_YMAX(p.bbox)
+    from {DB_SCHEMA}.publications p inner join
+         {DB_SCHEMA}.workspaces w on w.id = p.id_workspace
+    where p.type = %s
+      and p.name = %s
+      and w.name = %s;'''
+    return db_util.run_query(query, (publication_type, publication, workspace,))[0]
+
+
 def set_bbox(workspace, publication_type, publication, bbox):
     query = f'''update {DB_SCHEMA}.publications set
     bbox = ST_MakeBox2D(ST_Point(%s, %s), ST_Point(%s ,%s))
@@ -425,3 +524,4 @@ def set_bbox(workspace, publication_type, publication, bbox):
       and id_workspace = (select w.id from {DB_SCHEMA}.workspaces w where w.name = %s);'''
     params = bbox + (publication_type, publication, workspace,)
     db_util.run_statement(query, params)
+    invalidate_info_memo(workspace, publication_type, publication)
@@ -2,7 +2,7 @@ import uuid
 from test import process_client, prime_db_schema_client
 import pytest
 
-from layman import settings, app as app, LaymanError
+from layman import settings, app as app, LaymanError, authz, util as layman_util
 from layman.layer import LAYER_TYPE
 from layman.map import MAP_TYPE
 from . import publications, workspaces, users
@@ -142,6 +142,38 @@ class TestSelectPublicationsBasic:
         info_publications = list(infos.keys())
         assert expected_publications == info_publications
 
+    @pytest.mark.usefixtures('ensure_layman', 'provide_data')
+    def test_get_publication_info(self):
+        with app.app_context():
+            for workspace, publ_type, publ_name, _ in self.publications:
+                info = publications.get_publication_info(workspace, publ_type, publ_name)
+                all_infos = publications.get_publication_infos(workspace, publ_type)
+                assert info == all_infos[(workspace, publ_type, publ_name)]
+            assert publications.get_publication_info(self.workspace2, MAP_TYPE, 'test_select_publications_publication1me') == dict()
+
+    @pytest.mark.usefixtures('ensure_layman', 'provide_data')
+    def test_get_publication_info_memo(self):
+        workspace, publ_type, publ_name, _ = self.publications[0]
+        with app.app_context():
+            assert publications.get_info_memo() is None
+            assert publications.get_info_memo_stats() is None
+
+        with app.test_request_context():
+            assert authz.can_user_read_publication(settings.ANONYM_USER, workspace, publ_type, publ_name)
+            layman_util.get_publication_info(workspace, publ_type, publ_name, context={'keys': ['title']})
+            layer_info = layman_util.get_publication_info(workspace, publ_type, publ_name)
+            stats = publications.get_info_memo_stats()
+            assert stats['misses'] == 1, stats
+            assert stats['hits'] >= 2, stats
+
+            layer_info['access_rights']['read'].append('some_user')
+            assert 'some_user' not in publications.get_publication_info(workspace, publ_type, publ_name)['access_rights']['read']
+            assert publications.get_info_memo_stats() == {'hits': stats['hits'] + 1, 'misses': 1}
+
+            publications.set_bbox(workspace, publ_type, publ_name, tuple(layer_info['bounding_box']))
+            publications.get_publication_info(workspace, publ_type, publ_name)
+            assert publications.get_info_memo_stats() == {'hits': stats['hits'] + 1, 'misses': 2}
+
 
 class TestSelectPublicationsComplex:
     workspace1 = 'test_select_publications_complex_workspace1'
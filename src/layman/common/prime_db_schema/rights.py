@@ -7,6 +7,31 @@ DB_SCHEMA = settings.LAYMAN_PRIME_SCHEMA
 logger = logging.getLogger(__name__)
 
 
+def refresh_principal_arrays(id_publication=None):
+    """Copies names of users with explicit read/write rights from rights table to publications.read_users and
+    publications.write_users. These denormalised arrays are used for listing and filtering by reader/writer."""
+    where_clause = 'where p.id = %s' if id_publication is not None else ''
+    sql = f'''update {DB_SCHEMA}.publications p set
+    read_users = array(select w.name
+                       from {DB_SCHEMA}.rights r inner join
+                            {DB_SCHEMA}.users u on r.id_user = u.id inner join
+                            {DB_SCHEMA}.workspaces w on w.id = u.id_workspace
+                       where r.id_publication = p.id
+                         and r.type = 'read'
+                       order by r.id),
+    write_users = array(select w.name
+                        from {DB_SCHEMA}.rights r inner join
+                             {DB_SCHEMA}.users u on r.id_user = u.id inner join
+                             {DB_SCHEMA}.workspaces w on w.id = u.id_workspace
+                        where r.id_publication = p.id
+                          and r.type = 'write'
+                        order by r.id)
+{where_clause}
+;'''
+    params = (id_publication,) if id_publication is not None else None
+    db_util.run_statement(sql, params)
+
+
 def insert_rights(id_publication,
                   users,
                   type,
@@ -25,6 +50,8 @@ returning id
                                 type,
                                 username,
                                 ))
+    if users:
+        refresh_principal_arrays(id_publication)
 
 
 def delete_rights_for_publication(id_publication):
@@ -32,6 +59,7 @@ def delete_rights_for_publication(id_publication):
     db_util.run_statement(sql,
                           (id_publication,)
                           )
+    refresh_principal_arrays(id_publication)
 
 
 def remove_rights(id_publication, users_list, right_type):
@@ -49,3 +77,5 @@ where id_publication = %s
                                username,
                                )
                               )
+    if users_list:
+        refresh_principal_arrays(id_publication)
@@ -3,6 +3,7 @@ from flask import request, current_app
 
 from layman import settings, celery as celery_util, common
 from layman import LaymanError
+from layman.cache import publication_info as publication_info_cache
 
 PUBLICATION_LOCKS_KEY = f'{__name__}:PUBLICATION_LOCKS'
 
@@ -31,6 +32,8 @@ def create_lock_decorator(publication_type, publication_name_key, error_code, is
                 finally:
                     unlock_publication(username, publication_type, publication_name)
                 raise exception
+            finally:
+                publication_info_cache.delete(username, publication_type, publication_name)
             return result
 
         return decorated_function
@@ -87,6 +90,8 @@ def solve_locks(workspace, publication_type, publication_name, error_code, reque
         if requested_lock == common.PUBLICATION_LOCK_FEATURE_CHANGE:
             raise LaymanError(error_code, private_data={'can_run_later': True})
         if current_lock == common.PUBLICATION_LOCK_FEATURE_CHANGE and requested_lock in [common.REQUEST_METHOD_PATCH, common.REQUEST_METHOD_POST, ]:
+            # aborted tasks are awaited (at most ABORT_WAIT_TIMEOUT seconds), so that they do not write outputs
+            # of the publication while PATCH deletes them
             celery_util.abort_publication_chain(workspace, publication_type, publication_name)
             celery_util.push_step_to_run_after_chain(workspace, publication_type, publication_name, 'layman.util::patch_after_feature_change')
 
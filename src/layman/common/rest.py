@@ -1,3 +1,8 @@
+import base64
+import binascii
+import datetime
+import hashlib
+import json
 import re
 from flask import jsonify, make_response
 
@@ -145,6 +150,41 @@ def get_integer_from_param(request_args, param_name, negative=True, zero=True, p
     return result
 
 
+def _get_cursor_query_hash(query_params):
+    return hashlib.md5(json.dumps(query_params, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+
+
+def create_cursor(last_keys, position, query_params):
+    order_key, workspace, name = last_keys
+    if isinstance(order_key, datetime.datetime):
+        order_key = order_key.isoformat()
+    cursor = {
+        'k': [order_key, workspace, name],
+        'p': position,
+        'h': _get_cursor_query_hash(query_params),
+    }
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode('utf-8')).decode('ascii')
+
+
+def get_cursor_from_param(request_args, param_name, query_params):
+    """Returns tuple (last_keys, position) decoded from opaque cursor, or (None, None) if cursor is not set."""
+    if not request_args.get(param_name):
+        return None, None
+    try:
+        cursor = json.loads(base64.urlsafe_b64decode(request_args[param_name].encode('ascii')).decode('utf-8'))
+        last_keys = tuple(cursor['k'])
+        position = cursor['p']
+        query_hash = cursor['h']
+        assert len(last_keys) == 3 and isinstance(position, int) and position >= 0
+    except (ValueError, UnicodeError, binascii.Error, KeyError, TypeError, AssertionError) as exc:
+        raise LaymanError(2, {'parameter': param_name,
+                              'expected': f'Value of {consts.HEADER_NEXT_CURSOR} header from previous response'}) from exc
+    if query_hash != _get_cursor_query_hash(query_params):
+        raise LaymanError(48, f'Parameter "{param_name}" can be used only with the same filtering and ordering parameters '
+                              f'as the request that returned it.')
+    return last_keys, position
+
+
 def get_publications(publication_type, user, request_args=None, workspace=None):
     request_args = request_args or {}
     known_order_by_values = [consts.ORDER_BY_TITLE, consts.ORDER_BY_FULL_TEXT, consts.ORDER_BY_LAST_CHANGE,
@@ -201,6 +241,18 @@ def get_publications(publication_type, user, request_args=None, workspace=None):
     limit = get_integer_from_param(request_args, consts.LIMIT, negative=False)
     offset = get_integer_from_param(request_args, consts.OFFSET, negative=False)
 
+    cursor_query_params = [publication_type, workspace, full_text_filter, bbox_filter, order_by_value, ordering_bbox]
+    after_keys, cursor_position = get_cursor_from_param(request_args, consts.CURSOR, cursor_query_params)
+    if after_keys and offset:
+        raise LaymanError(48, f'Parameters "{consts.CURSOR}" and "{consts.OFFSET}" can not be used together.')
+
+    #########################################################
+    # Total count
+    total_count_value = request_args.get(consts.TOTAL_COUNT) or consts.TOTAL_COUNT_EXACT
+    known_total_count_values = [consts.TOTAL_COUNT_EXACT, consts.TOTAL_COUNT_ESTIMATE]
+    if total_count_value not in known_total_count_values:
+        raise LaymanError(2, {'parameter': consts.TOTAL_COUNT, 'supported_values': known_total_count_values})
+
     #########################################################
     publication_infos_whole = layman_util.get_publication_infos_with_metainfo(publ_type=publication_type,
                                                                               workspace=workspace,
@@ -213,6 +265,8 @@ def get_publications(publication_type, user, request_args=None, workspace=None):
                                                                               order_by_list=order_by_list,
                                                                               ordering_full_text=ordering_full_text,
                                                                               ordering_bbox=ordering_bbox,
+                                                                              after_keys=after_keys,
+                                                                              exact_count=total_count_value == consts.TOTAL_COUNT_EXACT,
                                                                               )
 
     infos = [
@@ -228,8 +282,23 @@ def get_publications(publication_type, user, request_args=None, workspace=None):
         }
         for (workspace, _, name), info in publication_infos_whole['items'].items()
     ]
+    # Publications are filtered by reader in the DB query, this only checks it on already loaded items
+    from layman import authz
+    assert all(authz.is_user_in_access_rule(user, info['access_rights']['read']) for info in infos)
+    position = cursor_position or offset or 0
+    content_range = (position + 1, position + len(infos)) if infos else (0, 0)
+    if publication_infos_whole['total_count_estimated']:
+        total_count_header = consts.HEADER_TOTAL_COUNT_ESTIMATE
+        content_range_size = '*'
+    else:
+        total_count_header = consts.HEADER_TOTAL_COUNT
+        content_range_size = publication_infos_whole['total_count']
+
     response = make_response(jsonify(infos), 200)
-    response.headers['X-Total-Count'] = publication_infos_whole['total_count']
-    response.headers['Content-Range'] = f'items {publication_infos_whole["content_range"][0]}-' \
-                                        f'{publication_infos_whole["content_range"][1]}/{publication_infos_whole["total_count"]}'
+    response.headers[total_count_header] = publication_infos_whole['total_count']
+    response.headers['Content-Range'] = f'items {content_range[0]}-{content_range[1]}/{content_range_size}'
+    if limit and len(infos) == limit:
+        response.headers[consts.HEADER_NEXT_CURSOR] = create_cursor(publication_infos_whole['last_keys'],
+                                                                    position + len(infos),
+                                                                    cursor_query_params)
     return response
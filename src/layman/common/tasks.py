@@ -1,6 +1,7 @@
 import importlib
 import inspect
-from celery import chain
+from celery import chain, group
+from celery.utils import uuid
 
 from layman import settings
 
@@ -10,7 +11,7 @@ def get_task_chain(publ_type, workspace, publ_name, task_options, start_at, publ
     return get_chain_of_methods(workspace, publ_name, methods, task_options, publ_param_name)
 
 
-def get_task_methods(publ_type, workspace, publ_name, task_options, start_at):
+def _get_source_task_methods(publ_type, workspace, publ_name, task_options, start_at):
     if start_at is None:
         return []
     internal_sources = list(publ_type['internal_sources'].keys())
@@ -19,7 +20,7 @@ def get_task_methods(publ_type, workspace, publ_name, task_options, start_at):
         m for m in internal_sources[start_idx:]
         if f"{m.rsplit('.', 1)[0]}.tasks" in publ_type['task_modules']
     ]
-    task_methods = []
+    source_task_methods = []
     for source_name in source_names:
         task_module_name = f"{source_name.rsplit('.', 1)[0]}.tasks"
         task_module = importlib.import_module(task_module_name)
@@ -29,8 +30,48 @@ def get_task_methods(publ_type, workspace, publ_name, task_options, start_at):
             continue
         needed_method = getattr(task_module, f"{method_name}_needed")
         if needed_method(workspace, publ_name, task_options):
-            task_methods.append(task_method)
-    return task_methods
+            source_task_methods.append((source_name, task_method))
+    return source_task_methods
+
+
+def get_task_methods(publ_type, workspace, publ_name, task_options, start_at):
+    return [
+        task_method for _, task_method
+        in _get_source_task_methods(publ_type, workspace, publ_name, task_options, start_at)
+    ]
+
+
+def get_source_dependencies(publ_type):
+    """Returns dict of internal source name -> set of names of all internal sources it depends on, directly or
+    transitively. Internal source not listed in `internal_source_dependencies` depends on all preceding sources."""
+    internal_sources = list(publ_type['internal_sources'].keys())
+    declared_dependencies = publ_type.get('internal_source_dependencies', {})
+    result = {}
+    for idx, source_name in enumerate(internal_sources):
+        direct_dependencies = declared_dependencies.get(source_name, internal_sources[:idx])
+        assert all(dep in result for dep in direct_dependencies), \
+            f"Dependencies of {source_name} must precede it in internal_sources: {direct_dependencies}"
+        result[source_name] = set(direct_dependencies).union(*[result[dep] for dep in direct_dependencies])
+    return result
+
+
+def get_task_stages(publ_type, workspace, publ_name, task_options, start_at):
+    """Returns list of stages, each stage is list of task methods. Tasks of one stage do not depend on each other
+    and run in parallel, stage starts when all tasks of previous stage succeeded."""
+    source_task_methods = _get_source_task_methods(publ_type, workspace, publ_name, task_options, start_at)
+    dependencies = get_source_dependencies(publ_type)
+    levels = {}
+    for source_name, _ in source_task_methods:
+        levels[source_name] = max((levels[dep] + 1 for dep in dependencies[source_name] if dep in levels), default=0)
+    # tasks no other task depends on run in the last stage, so that they run in parallel with as many tasks as possible
+    last_level = max(levels.values(), default=0)
+    for source_name in levels:
+        if not any(source_name in dependencies[other] for other in levels):
+            levels[source_name] = last_level
+    return [
+        [task_method for source_name, task_method in source_task_methods if levels[source_name] == level]
+        for level in sorted(set(levels.values()))
+    ]
 
 
 def get_source_task_methods(publ_type, method_name):
@@ -56,6 +97,31 @@ def get_chain_of_methods(workspace, publ_name, task_methods, task_options, publ_
     ])
 
 
+def get_chain_of_stages(workspace, publ_name, task_stages, task_options, publ_param_name):
+    """Returns tuple of chain running stages one after another (tasks of one stage are run as group) and list of
+    stages of task IDs. Task IDs are assigned in advance, because Celery converts groups followed by other
+    tasks into chords."""
+    stage_signatures = []
+    task_id_stages = []
+    for stage in task_stages:
+        signatures = [
+            _get_task_signature(workspace, publ_name, t, task_options, publ_param_name).set(task_id=uuid())
+            for t in stage
+        ]
+        stage_signatures.append(signatures[0] if len(signatures) == 1 else group(*signatures))
+        task_id_stages.append([sig.id for sig in signatures])
+    return chain(*stage_signatures), task_id_stages
+
+
+def get_task_queue(task_name):
+    """Returns name of Celery queue the task is sent to, see LAYMAN_CELERY_TASK_QUEUES."""
+    task_class = next((
+        task_class for task_class, task_names in settings.LAYMAN_CELERY_TASK_CLASSES.items()
+        if task_name in task_names
+    ), None)
+    return settings.LAYMAN_CELERY_TASK_QUEUES.get(task_class, settings.LAYMAN_CELERY_QUEUE)
+
+
 def _get_task_signature(workspace, publ_name, task, task_options, publ_param_name):
     param_names = [
         pname
@@ -70,6 +136,6 @@ def _get_task_signature(workspace, publ_name, task, task_options, publ_param_nam
     return task.signature(
         (workspace, publ_name),
         task_opts,
-        queue=settings.LAYMAN_CELERY_QUEUE,
+        queue=get_task_queue(task.name),
         immutable=True,
     )
@@ -0,0 +1,59 @@
+from layman import settings
+from layman.layer import get_layer_type_def
+from layman.map import get_map_type_def
+from . import tasks as tasks_util
+
+
+def test_get_source_dependencies():
+    publ_type = {
+        'internal_sources': {
+            'a': None,
+            'b': None,
+            'c': None,
+            'd': None,
+        },
+        'internal_source_dependencies': {
+            'c': ['a'],
+            'd': ['c'],
+        },
+    }
+    assert tasks_util.get_source_dependencies(publ_type) == {
+        'a': set(),
+        'b': {'a'},
+        'c': {'a'},
+        'd': {'a', 'c'},
+    }
+
+
+def test_get_task_stages():
+    layer_stages = tasks_util.get_task_stages(get_layer_type_def(), 'test_workspace', 'test_layer', {},
+                                              'layman.layer.filesystem.input_chunk')
+    assert [[task.name for task in stage] for stage in layer_stages] == [
+        ['layman.layer.filesystem.input_chunk.refresh'],
+        ['layman.layer.db.table.refresh'],
+        ['layman.layer.prime_db_schema.bbox.refresh'],
+        ['layman.layer.qgis.wms.refresh', 'layman.layer.geoserver.wfs.refresh'],
+        ['layman.layer.geoserver.wms.refresh'],
+        ['layman.layer.geoserver.sld.refresh'],
+        ['layman.layer.filesystem.thumbnail.refresh', 'layman.layer.micka.soap.refresh'],
+    ]
+
+    map_stages = tasks_util.get_task_stages(get_map_type_def(), 'test_workspace', 'test_map', {},
+                                            'layman.map.filesystem.input_file')
+    assert [[task.name for task in stage] for stage in map_stages] == [
+        ['layman.map.prime_db_schema.bbox.refresh'],
+        ['layman.map.filesystem.thumbnail.refresh', 'layman.map.micka.soap.refresh'],
+    ]
+
+    assert tasks_util.get_task_stages(get_layer_type_def(), 'test_workspace', 'test_layer', {}, None) == []
+
+
+def test_get_task_queue(monkeypatch):
+    monkeypatch.setattr(settings, 'LAYMAN_CELERY_TASK_QUEUES', {
+        'import': 'test_import',
+        'thumbnail': 'test_thumbnail',
+    })
+    assert tasks_util.get_task_queue('layman.layer.db.table.refresh') == 'test_import'
+    assert tasks_util.get_task_queue('layman.map.filesystem.thumbnail.refresh') == 'test_thumbnail'
+    assert tasks_util.get_task_queue('layman.layer.micka.soap.refresh') == settings.LAYMAN_CELERY_QUEUE
+    assert tasks_util.get_task_queue('layman.layer.geoserver.wms.refresh') == settings.LAYMAN_CELERY_QUEUE
@@ -66,6 +66,8 @@ def ensure_wfs_t_attributes(attribs):
     created_attributes = db.ensure_attributes(editable_attribs)
     if created_attributes:
         changed_layers = {(workspace, layer) for workspace, layer, _ in created_attributes}
+        for workspace, layer in changed_layers:
+            db.delete_table_inspection(workspace, layer)
         qgis_changed_layers = {(workspace, layer) for workspace, layer in changed_layers
                                if layer_util.get_layer_info(workspace, layer, context={'keys': ['style_type'], })['style_type'] == 'qml'}
         for workspace, layer in qgis_changed_layers:
@@ -197,6 +199,7 @@ def proxy(subpath):
     if response.status_code == 200:
         for workspace, layername in wfs_t_layers:
             if authz.can_i_edit(LAYER_TYPE, workspace, layername):
+                db.delete_table_inspection(workspace, layername)
                 patch_after_feature_change(workspace, layername)
 
     excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
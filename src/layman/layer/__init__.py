@@ -56,6 +56,17 @@ PUBLICATION_TYPES = {
             ('layman.layer.filesystem.thumbnail', InternalSourceTypeDef(info_items=['thumbnail', ]),),
             ('layman.layer.micka.soap', InternalSourceTypeDef(info_items=['metadata', ]),),
         ]),
+        # internal sources whose tasks must succeed before task of the source starts, internal sources not listed here
+        # depend on all preceding internal sources; tasks not depending on each other run in parallel
+        'internal_source_dependencies': {
+            'layman.layer.qgis.wms': ['layman.layer.prime_db_schema.bbox', ],
+            'layman.layer.geoserver.wfs': ['layman.layer.prime_db_schema.bbox', ],
+            # both GeoServer tasks ensure GeoServer workspaces and change GeoServer security rules
+            'layman.layer.geoserver.wms': ['layman.layer.qgis.wms', 'layman.layer.geoserver.wfs', ],
+            'layman.layer.geoserver.sld': ['layman.layer.geoserver.wms', ],
+            'layman.layer.filesystem.thumbnail': ['layman.layer.geoserver.sld', ],
+            'layman.layer.micka.soap': ['layman.layer.geoserver.wms', ],
+        },
         'task_modules': {
             'layman.layer.db.tasks',
             'layman.layer.prime_db_schema.tasks',
@@ -1,18 +1,51 @@
 from collections import defaultdict, namedtuple
+from functools import partial
 import math
 import os
 import logging
+import subprocess
+import threading
+import time
+
+from psycopg2 import sql
 
 from db import util as db_util, PG_CONN
 from layman.common.language import get_languages_iso639_2
 from layman.http import LaymanError
 from layman import settings
+from layman.layer.filesystem import input_file
 
 FLASK_CONN_CUR_KEY = f'{__name__}:CONN_CUR'
 logger = logging.getLogger(__name__)
 
 
 ColumnInfo = namedtuple('ColumnInfo', 'name data_type')
+ProcessResult = namedtuple('ProcessResult', 'return_code output aborted duration')
+
+# max time (in seconds) between two checks if import was aborted
+PROCESS_ABORT_CHECK_INTERVAL = 0.5
+# max number of last bytes of process output kept for error reporting
+PROCESS_OUTPUT_MAX_SIZE = 64 * 1024
+# import profile inserting by COPY in one transaction into unlogged table without spatial index
+IMPORT_PROFILE_HIGH_THROUGHPUT = 'high_throughput'
+# PATCH mode importing new data into shadow table that is swapped with the current table afterwards
+DB_PATCH_IMPORT_MODE_SWAP = 'swap'
+# prefix of name of shadow table, it can not collide with any layer name, because layer names start with a letter
+SHADOW_TABLE_PREFIX = '_shadow_'
+# geometry types of PostGIS geometry_columns view and corresponding results of ST_GeometryType
+GEOMETRY_COLUMN_TYPES = {
+    'POINT': 'ST_Point',
+    'MULTIPOINT': 'ST_MultiPoint',
+    'LINESTRING': 'ST_LineString',
+    'MULTILINESTRING': 'ST_MultiLineString',
+    'POLYGON': 'ST_Polygon',
+    'MULTIPOLYGON': 'ST_MultiPolygon',
+    'GEOMETRYCOLLECTION': 'ST_GeometryCollection',
+}
+# max number of rows read to find out geometry types of external table with generic geometry column
+EXTERNAL_TABLE_GEOMETRY_TYPES_SAMPLE_SIZE = 10000
+# prefix of names of triggers maintaining envelope of changed features
+BBOX_CHANGE_TRIGGER_PREFIX = 'layman_bbox_change_'
 
 
 def get_workspaces(conn_cur=None):
@@ -80,21 +113,59 @@ def delete_whole_user(username):
 
 
 # def import_layer_vector_file(username, layername, main):
-def import_layer_vector_file(username, layername, main_filepath, crs_id):
+def import_layer_vector_file(username, layername, main_filepath, crs_id, *, profile=None):
     process = import_layer_vector_file_async(username, layername, main_filepath,
-                                             crs_id)
-    while process.poll() is None:
-        pass
-    return_code = process.poll()
-    if return_code != 0:
-        pg_error = str(process.stdout.read())
-        raise LaymanError(11, private_data=pg_error)
+                                             crs_id, profile=profile)
+    process_result = supervise_process(process)
+    if process_result.return_code != 0:
+        raise LaymanError(11, private_data=process_result.output)
+    finish_import(username, layername, profile=profile)
+
+
+def supervise_process(process, *, is_aborted=None, check_interval=PROCESS_ABORT_CHECK_INTERVAL,
+                      max_output_size=PROCESS_OUTPUT_MAX_SIZE):
+    """Waits until process finishes without busy waiting and returns ProcessResult.
+
+    Output of the process is read continuously by separate thread, so the process never blocks on full pipe, and only
+    last `max_output_size` bytes are kept. Function `is_aborted` is called at most once per `check_interval` seconds.
+    If it returns true, the process is terminated.
+    """
+    start = time.time()
+    output = bytearray()
+
+    def read_output():
+        for chunk in iter(partial(process.stdout.read1, 4096), b''):
+            output.extend(chunk)
+            if len(output) > max_output_size:
+                del output[:len(output) - max_output_size]
+
+    reader = threading.Thread(target=read_output, daemon=True)
+    reader.start()
+
+    aborted = False
+    while True:
+        try:
+            return_code = process.wait(timeout=check_interval if is_aborted is not None else None)
+            break
+        except subprocess.TimeoutExpired:
+            if is_aborted():
+                aborted = True
+                process.terminate()
+                try:
+                    return_code = process.wait(timeout=check_interval)
+                except subprocess.TimeoutExpired:
+                    process.kill()
+                    return_code = process.wait()
+                break
+    reader.join()
+    process.stdout.close()
+    return ProcessResult(return_code, output.decode('utf-8', errors='replace'), aborted, time.time() - start)
 
 
 def import_layer_vector_file_async(username, layername, main_filepath,
-                                   crs_id):
+                                   crs_id, *, profile=None):
     # import file to database table
-    import subprocess
+    profile = profile or settings.LAYMAN_DB_IMPORT_PROFILE
     pg_conn = ' '.join([f"{k}='{v}'" for k, v in PG_CONN.items()])
     bash_args = [
         'ogr2ogr',
@@ -116,6 +187,13 @@ def import_layer_vector_file_async(username, layername, main_filepath,
         bash_args.extend([
             '-lco', 'PRECISION=NO',
         ])
+    if profile == IMPORT_PROFILE_HIGH_THROUGHPUT:
+        bash_args.extend([
+            '--config', 'PG_USE_COPY', 'YES',
+            '-gt', 'unlimited',
+            '-lco', 'SPATIAL_INDEX=NONE',
+            '-lco', 'UNLOGGED=YES',
+        ])
     bash_args.extend([
         f'{main_filepath}',
     ])
@@ -126,6 +204,249 @@ def import_layer_vector_file_async(username, layername, main_filepath,
     return process
 
 
+def finish_import(username, layername, *, profile=None, conn_cur=None):
+    """Makes table imported by `import_layer_vector_file_async` ready for use.
+
+    Import of `high_throughput` profile skips spatial index and write-ahead log, so the table is set to logged and the
+    index is created here. The table is set to logged first, because SET LOGGED rewrites the table including all its
+    indexes. Table is analyzed in both profiles, so that query planner knows imported data immediately.
+    """
+    profile = profile or settings.LAYMAN_DB_IMPORT_PROFILE
+    statement = ''
+    if profile == IMPORT_PROFILE_HIGH_THROUGHPUT:
+        statement += f'''
+    ALTER TABLE {username}.{layername} SET LOGGED;
+    CREATE INDEX IF NOT EXISTS "{layername}_wkb_geometry_geom_idx" ON {username}.{layername} USING GIST (wkb_geometry);
+    '''
+    statement += f'''
+    ANALYZE {username}.{layername};
+    '''
+    db_util.run_statement(statement, conn_cur=conn_cur)
+
+
+def get_shadow_table_name(layername):
+    return f'{SHADOW_TABLE_PREFIX}{layername}'
+
+
+def is_refresh_needed_unless_swap(_workspace, _layername, task_options):
+    # sources published from the table are kept when the table is replaced by swap, they are patched after the chain
+    return not task_options.get('replace_by_swap', False)
+
+
+def get_drop_statement(username, relation_name, conn_cur=None):
+    """Returns statement dropping table or view of given name, or empty string if there is no such relation."""
+    rows = db_util.run_query(f"""
+select c.relkind
+from pg_class c inner join
+     pg_namespace n on n.oid = c.relnamespace
+where n.nspname = %s
+  and c.relname = %s
+""", (username, relation_name, ), conn_cur=conn_cur)
+    if not rows:
+        return ''
+    relation_type = 'VIEW' if rows[0][0] == 'v' else 'TABLE'
+    return f'DROP {relation_type} IF EXISTS "{username}"."{relation_name}" CASCADE;\n'
+
+
+def delete_table(username, table_name, conn_cur=None):
+    db_util.run_statement(f'DROP TABLE IF EXISTS {username}.{table_name} CASCADE', conn_cur=conn_cur)
+
+
+def swap_table(username, shadow_table, layername, conn_cur=None):
+    """Replaces table of the layer by the shadow table in one transaction.
+
+    Indexes and sequence of the shadow table are renamed after the layer, so that next shadow table can be imported with
+    the same names. Readers of the layer table wait for the transaction and then read the new data.
+    """
+    conn, cur = conn_cur or db_util.get_connection_cursor()
+    try:
+        cur.execute(f"""
+select c.relname
+from pg_index i inner join
+     pg_class c on c.oid = i.indexrelid
+where i.indrelid = %s::regclass
+""", (f'{username}.{shadow_table}', ))
+        index_names = [row[0] for row in cur.fetchall()]
+        cur.execute("select pg_get_serial_sequence(%s, 'ogc_fid')", (f'{username}.{shadow_table}', ))
+        sequence_name = cur.fetchone()[0]
+        sequence_names = [sequence_name.split('.')[-1].strip('"')] if sequence_name else []
+
+        def get_new_name(name):
+            return layername + name[len(shadow_table):] if name.startswith(shadow_table) else name
+
+        statement = get_drop_statement(username, layername, conn_cur=conn_cur) + f"""
+ALTER TABLE {username}.{shadow_table} RENAME TO {layername};
+""" + ''.join(f"""ALTER INDEX {username}."{name}" RENAME TO "{get_new_name(name)}";
+""" for name in index_names) + ''.join(f"""ALTER SEQUENCE {username}."{name}" RENAME TO "{get_new_name(name)}";
+""" for name in sequence_names) + f"""
+DELETE FROM {settings.LAYMAN_PRIME_SCHEMA}.bbox_changes WHERE workspace = %s AND layername = %s;
+"""
+        cur.execute(statement, (username, layername, ))
+        conn.commit()
+    except BaseException as exc:
+        conn.rollback()
+        logger.error(f'swap_table ERROR')
+        raise LaymanError(7) from exc
+
+
+def _raise_db_table_error(message, **kwargs):
+    raise LaymanError(2, {'parameter': 'db_table', 'message': message, **kwargs})
+
+
+def get_external_table_info(workspace, db_table, conn_cur=None):
+    """Validates existing table or view to be published as layer and returns dict describing it.
+
+    `db_table` is either `schema.table`, or `table` within workspace schema. Schema must be workspace schema or one of
+    LAYMAN_DB_EXTERNAL_TABLE_SCHEMAS. The table must have exactly one geometry column with supported SRID, and either
+    single-column integer primary key or integer column `ogc_fid`.
+    """
+    from layman.common.prime_db_schema import publications
+    from layman.layer import LAYER_TYPE
+    schema, table = db_table.split('.', 1) if '.' in db_table else (workspace, db_table)
+    supported_schemas = [workspace] + settings.LAYMAN_DB_EXTERNAL_TABLE_SCHEMAS
+    if schema not in supported_schemas:
+        _raise_db_table_error(f'Schema is not supported.', supported_schemas=supported_schemas)
+    # tables of Layman layers are dropped with CASCADE when the layer is deleted or its data replaced, and the view
+    # would be dropped with them
+    if table.startswith(SHADOW_TABLE_PREFIX) or publications.get_publication_info(schema, LAYER_TYPE, table):
+        _raise_db_table_error(f'Table of another layer can not be published.', schema=schema, table=table)
+
+    rows = db_util.run_query(f"""
+select c.relkind
+from pg_class c inner join
+     pg_namespace n on n.oid = c.relnamespace
+where n.nspname = %s
+  and c.relname = %s
+  and c.relkind in ('r', 'v', 'm', 'p')
+""", (schema, table, ), conn_cur=conn_cur)
+    if not rows:
+        _raise_db_table_error(f'Table or view does not exist.', schema=schema, table=table)
+    relkind = rows[0][0]
+
+    geometry_columns = db_util.run_query(f"""
+select f_geometry_column, srid, upper(type)
+from {settings.PG_POSTGIS_SCHEMA}.geometry_columns
+where f_table_schema = %s
+  and f_table_name = %s
+""", (schema, table, ), conn_cur=conn_cur)
+    if len(geometry_columns) != 1:
+        _raise_db_table_error(f'Table must have exactly one geometry column.',
+                              found=[col for col, _, _ in geometry_columns])
+    geometry_column, srid, geometry_type = geometry_columns[0]
+    crs_id = f'EPSG:{srid}'
+    if crs_id not in settings.INPUT_SRS_LIST:
+        raise LaymanError(4, {'found': crs_id,
+                              'supported_values': settings.INPUT_SRS_LIST})
+
+    columns = db_util.run_query(f"""
+select a.attname,
+       format_type(a.atttypid, a.atttypmod),
+       coalesce(i.indisprimary, false)
+from pg_attribute a left join
+     pg_index i on i.indrelid = a.attrelid and a.attnum = any(i.indkey) and i.indisprimary and i.indnatts = 1
+where a.attrelid = (select c.oid
+                    from pg_class c inner join
+                         pg_namespace n on n.oid = c.relnamespace
+                    where n.nspname = %s
+                      and c.relname = %s)
+  and a.attnum > 0
+  and not a.attisdropped
+order by a.attnum
+""", (schema, table, ), conn_cur=conn_cur)
+    integer_types = ['smallint', 'integer', 'bigint', ]
+    key_column = next((name for name, data_type, is_primary in columns if is_primary and data_type in integer_types), None) \
+        or next((name for name, data_type, _ in columns if name == 'ogc_fid' and data_type in integer_types), None)
+    if key_column is None:
+        _raise_db_table_error(f'Table must have single-column integer primary key or integer column ogc_fid.')
+
+    return {
+        'schema': schema,
+        'table': table,
+        'relkind': relkind,
+        'geometry_column': geometry_column,
+        'srid': srid,
+        # measured types (e.g. POINTM) are reported as their 2D counterparts
+        'geometry_type': geometry_type.rstrip('M'),
+        'key_column': key_column,
+        'attributes': [name for name, _, _ in columns if name not in [geometry_column, key_column, 'ogc_fid', 'wkb_geometry', ]],
+    }
+
+
+def create_external_table_view(username, layername, table_info, conn_cur=None):
+    """Creates view `username.layername` over external table with columns `ogc_fid` and `wkb_geometry` in EPSG:3857,
+    so that the table can be published in the same way as imported data. Name of the external table is saved as comment
+    of the view."""
+    geometry_expression = sql.Identifier(table_info['geometry_column'])
+    if table_info['srid'] != 3857:
+        geometry_expression = sql.SQL('ST_Transform({}, 3857)').format(geometry_expression)
+    columns = [
+        sql.SQL('{} as ogc_fid').format(sql.Identifier(table_info['key_column'])),
+        sql.SQL('{} as wkb_geometry').format(geometry_expression),
+    ] + [sql.Identifier(name) for name in table_info['attributes']]
+    statement = sql.SQL("""
+CREATE VIEW {view} AS
+SELECT {columns}
+FROM {schema}.{table};
+COMMENT ON VIEW {view} IS %s;
+""").format(
+        view=sql.SQL('{}.{}').format(sql.Identifier(username), sql.Identifier(layername)),
+        columns=sql.SQL(', ').join(columns),
+        schema=sql.Identifier(table_info['schema']),
+        table=sql.Identifier(table_info['table']),
+    )
+    db_util.run_statement(statement, (f"{table_info['schema']}.{table_info['table']}", ), conn_cur=conn_cur)
+
+
+def inspect_external_table(username, layername, table_info, conn_cur=None):
+    """Returns the same dict as `inspect_table`, but number of features and bounding box are estimated from table
+    statistics, and geometry types are taken from geometry column type, so that large table is not scanned.
+
+    If statistics are missing (e.g. table was not analyzed yet or it is a view), bounding box is computed by scanning
+    the table.
+    """
+    schema, table, geometry_column, srid = [table_info[key] for key in ['schema', 'table', 'geometry_column', 'srid']]
+    bbox = None
+    feature_count = None
+    if table_info['relkind'] != 'v':
+        try:
+            row = db_util.run_query(f"""
+with tmp as (select ST_Transform(ST_SetSRID(ST_EstimatedExtent(%s, %s, %s)::geometry, %s), 3857) as extent)
+select st_xmin(extent),
+       st_ymin(extent),
+       st_xmax(extent),
+       st_ymax(extent),
+       (select greatest(c.reltuples, 0)::bigint
+        from pg_class c inner join
+             pg_namespace n on n.oid = c.relnamespace
+        where n.nspname = %s
+          and c.relname = %s)
+from tmp
+""", (schema, table, geometry_column, srid, schema, table, ), conn_cur=conn_cur)[0]
+        except db_util.Error:
+            row = [None] * 5
+        bbox = list(row[0:4]) if row[0] is not None else None
+        feature_count = row[4]
+    if bbox is None:
+        logger.warning(f'No statistics of {schema}.{table}, computing bounding box of {username}.{layername} by scan')
+        bbox = list(get_bbox(username, layername, conn_cur=conn_cur))
+
+    geometry_type = GEOMETRY_COLUMN_TYPES.get(table_info['geometry_type'])
+    if geometry_type is not None:
+        geometry_types = [geometry_type]
+    else:
+        rows = db_util.run_query(f"""
+select distinct ST_GeometryType(wkb_geometry)
+from (select wkb_geometry from {username}.{layername} limit {EXTERNAL_TABLE_GEOMETRY_TYPES_SAMPLE_SIZE}) sample
+""", conn_cur=conn_cur)
+        geometry_types = [row[0] for row in rows]
+    return {
+        'feature_count': feature_count,
+        'bbox': bbox,
+        'geometry_types': geometry_types,
+        'columns': [list(col) for col in get_all_column_infos(username, layername, conn_cur)],
+    }
+
+
 def check_new_layername(workspace, layername, conn_cur=None):
     if conn_cur is None:
         conn_cur = db_util.get_connection_cursor()
@@ -145,6 +466,22 @@ def check_new_layername(workspace, layername, conn_cur=None):
         raise LaymanError(9, {'db_object_name': layername})
 
 
+def check_new_layernames(workspace, layernames, conn_cur=None):
+    """Bulk variant of check_new_layername, all names are checked by one query. Returns dict layername -> LaymanError
+    for names in conflict with existing DB object."""
+    if not layernames:
+        return {}
+    query = f"""SELECT DISTINCT c.relname
+    FROM   pg_class c
+    JOIN   pg_namespace n ON n.oid = c.relnamespace
+    WHERE  n.nspname IN (%s, %s) AND c.relname = ANY(%s)"""
+    rows = db_util.run_query(query, (workspace, settings.PG_POSTGIS_SCHEMA, list(layernames), ), conn_cur=conn_cur)
+    return {
+        row[0]: LaymanError(9, {'db_object_name': row[0]})
+        for row in rows
+    }
+
+
 def get_text_column_names(username, layername, conn_cur=None):
     _, cur = conn_cur or db_util.get_connection_cursor()
 
@@ -199,6 +536,54 @@ from {username}.{layername}
     return rows[0][0]
 
 
+def inspect_table(username, layername, conn_cur=None):
+    """Returns number of features, bounding box, geometry types and columns of the table, scanning the table only once."""
+    _, cur = conn_cur or db_util.get_connection_cursor()
+
+    try:
+        cur.execute(f"""
+with tmp as (select count(*) as feature_count,
+                    ST_Extent(l.wkb_geometry) as bbox,
+                    array_agg(distinct ST_GeometryType(l.wkb_geometry)) as geometry_types
+             from {username}.{layername} l
+)
+select feature_count,
+       st_xmin(bbox),
+       st_ymin(bbox),
+       st_xmax(bbox),
+       st_ymax(bbox),
+       coalesce(geometry_types, '{{}}')
+from tmp
+""")
+    except BaseException as exc:
+        logger.error(f'inspect_table ERROR')
+        raise LaymanError(7) from exc
+    row = cur.fetchall()[0]
+    return {
+        'feature_count': row[0],
+        'bbox': list(row[1:5]),
+        'geometry_types': row[5],
+        'columns': [list(col) for col in get_all_column_infos(username, layername, conn_cur)],
+    }
+
+
+def get_table_inspection(username, layername):
+    """Returns inspection of the table saved after import, or inspects the table if it is missing, e.g. after WFS-T.
+
+    Inspection computed here is not saved, because features may change while the table is inspected and saved result
+    would not be forgotten by `delete_table_inspection` then.
+    """
+    inspection = input_file.get_inspection(username, layername, input_file.INSPECTION_PART_TABLE)
+    if inspection is None:
+        inspection = inspect_table(username, layername)
+    return inspection
+
+
+def delete_table_inspection(username, layername):
+    """Forgets inspection of the table, e.g. after change of its features or columns."""
+    input_file.delete_inspection(username, layername, input_file.INSPECTION_PART_TABLE)
+
+
 def get_text_data(username, layername, conn_cur=None):
     _, cur = conn_cur or db_util.get_connection_cursor()
     col_names = get_text_column_names(username, layername, conn_cur=conn_cur)
@@ -485,6 +870,64 @@ def get_bbox(username, layername, conn_cur=None):
     return result
 
 
+def ensure_bbox_change_triggers(username, layername, conn_cur=None):
+    """Creates triggers recording envelopes of added and removed geometries into `bbox_changes` table of prime schema.
+
+    Transition tables can not be used by trigger with more than one event, so there is one trigger for each event.
+    Any previously recorded changes of the layer are forgotten, because table is expected to be just imported.
+    """
+    statement = f'''
+    DROP TRIGGER IF EXISTS {BBOX_CHANGE_TRIGGER_PREFIX}insert ON {username}.{layername};
+    DROP TRIGGER IF EXISTS {BBOX_CHANGE_TRIGGER_PREFIX}update ON {username}.{layername};
+    DROP TRIGGER IF EXISTS {BBOX_CHANGE_TRIGGER_PREFIX}delete ON {username}.{layername};
+    CREATE TRIGGER {BBOX_CHANGE_TRIGGER_PREFIX}insert AFTER INSERT ON {username}.{layername}
+        REFERENCING NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE PROCEDURE {settings.LAYMAN_PRIME_SCHEMA}.track_bbox_change();
+    CREATE TRIGGER {BBOX_CHANGE_TRIGGER_PREFIX}update AFTER UPDATE ON {username}.{layername}
+        REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+        FOR EACH STATEMENT EXECUTE PROCEDURE {settings.LAYMAN_PRIME_SCHEMA}.track_bbox_change();
+    CREATE TRIGGER {BBOX_CHANGE_TRIGGER_PREFIX}delete AFTER DELETE ON {username}.{layername}
+        REFERENCING OLD TABLE AS old_rows
+        FOR EACH STATEMENT EXECUTE PROCEDURE {settings.LAYMAN_PRIME_SCHEMA}.track_bbox_change();
+    DELETE FROM {settings.LAYMAN_PRIME_SCHEMA}.bbox_changes WHERE workspace = %s AND layername = %s;
+    '''
+    db_util.run_statement(statement, (username, layername, ), conn_cur=conn_cur)
+
+
+def get_bbox_changes(username, layername, conn_cur=None):
+    """Returns tuple (added_bbox, removed_bbox, version) recorded by bbox-change triggers, or None if nothing is recorded."""
+    query = f'''
+    select st_xmin(added_bbox),
+           st_ymin(added_bbox),
+           st_xmax(added_bbox),
+           st_ymax(added_bbox),
+           st_xmin(removed_bbox),
+           st_ymin(removed_bbox),
+           st_xmax(removed_bbox),
+           st_ymax(removed_bbox),
+           version
+    from {settings.LAYMAN_PRIME_SCHEMA}.bbox_changes
+    where workspace = %s
+      and layername = %s
+    '''
+    rows = db_util.run_query(query, (username, layername, ), conn_cur=conn_cur)
+    if not rows:
+        return None
+    row = rows[0]
+    return tuple(row[0:4]), tuple(row[4:8]), row[8]
+
+
+def delete_bbox_changes(username, layername, version, conn_cur=None):
+    """Forgets changes returned by `get_bbox_changes`, unless another change was recorded in the meantime."""
+    statement = f'''
+    DELETE FROM {settings.LAYMAN_PRIME_SCHEMA}.bbox_changes
+    WHERE workspace = %s
+      AND layername = %s
+      AND version = %s
+    '''
+    db_util.run_statement(statement, (username, layername, version, ), conn_cur=conn_cur)
+
+
 def get_geometry_types(username, layername, conn_cur=None):
     conn, cur = conn_cur or db_util.get_connection_cursor()
     try:
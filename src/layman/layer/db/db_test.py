@@ -1,11 +1,13 @@
 import os
 import shutil
+import subprocess
 import time
 import sys
 import pytest
 
 del sys.modules['layman']
 
+from db import util as db_util
 from layman import app as layman, settings
 from layman.layer.filesystem.input_file import ensure_layer_input_file_dir
 from layman.layer.filesystem.util import get_layer_dir
@@ -181,6 +183,22 @@ def test_abort_import_layer_vector_file():
     shutil.rmtree(layerdir)
 
 
+def test_supervise_process():
+    process = subprocess.Popen(['sh', '-c', 'echo first; echo second >&2; exit 3'], stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT)
+    result = db.supervise_process(process, max_output_size=7)
+    assert result.return_code == 3
+    assert result.output == 'second\n'
+    assert not result.aborted
+
+    process = subprocess.Popen(['sleep', '10'], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    start = time.time()
+    result = db.supervise_process(process, is_aborted=lambda: time.time() - start > 0.2, check_interval=0.1)
+    assert result.aborted
+    assert result.return_code != 0
+    assert result.duration < 2
+
+
 @pytest.mark.usefixtures('client')
 def test_data_language(boundary_table):
     username, layername = boundary_table
@@ -309,3 +327,41 @@ def test_single_point_table_bbox(single_point_table):
     with layman.app_context():
         bbox = db.get_bbox(username, layername)
     assert bbox[0] == bbox[2] and bbox[1] == bbox[3], bbox
+
+
+def test_inspect_table(single_point_table, empty_table):
+    username, layername = single_point_table
+    with layman.app_context():
+        inspection = db.inspect_table(username, layername)
+        assert inspection['feature_count'] == db.get_number_of_features(username, layername)
+        assert tuple(inspection['bbox']) == db.get_bbox(username, layername)
+        assert inspection['geometry_types'] == db.get_geometry_types(username, layername)
+        assert [tuple(col) for col in inspection['columns']] == db.get_all_column_infos(username, layername)
+
+    username, layername = empty_table
+    with layman.app_context():
+        inspection = db.inspect_table(username, layername)
+    assert inspection['feature_count'] == 0
+    assert bbox_util.is_empty(inspection['bbox']), inspection
+    assert inspection['geometry_types'] == []
+
+
+def test_swap_table(single_point_table):
+    username, layername = single_point_table
+    shadow_table = db.get_shadow_table_name(layername)
+    with layman.app_context():
+        for file_path, exp_num_features in [
+            ('sample/layman.layer/small_layer.geojson', 4),
+            ('sample/layman.layer/single_point.shp', 1),
+        ]:
+            db.import_layer_vector_file(username, shadow_table, file_path, None)
+            db.swap_table(username, shadow_table, layername)
+            assert db.get_number_of_features(username, layername) == exp_num_features
+            index_names = db_util.run_query(f"""
+select c.relname
+from pg_index i inner join
+     pg_class c on c.oid = i.indexrelid
+where i.indrelid = %s::regclass
+""", (f'{username}.{layername}', ))
+            assert all(not name.startswith(shadow_table) for name, in index_names), index_names
+        assert not db_util.run_query(f"select to_regclass(%s)", (f'{username}.{shadow_table}', ))[0][0]
@@ -2,6 +2,7 @@ from db import util as db_util
 from layman import settings, patch_mode
 from layman.common import empty_method, empty_method_returns_none, empty_method_returns_dict
 from layman.http import LaymanError
+from . import get_shadow_table_name, get_drop_statement
 
 PATCH_MODE = patch_mode.DELETE_IF_DEPENDANT
 
@@ -19,11 +20,13 @@ def get_layer_info(workspace, layername, conn_cur=None):
     _, cur = conn_cur
     try:
         cur.execute(f"""
-SELECT schemaname, tablename, tableowner
-FROM pg_tables
-WHERE schemaname = '{workspace}'
-    AND tablename = '{layername}'
-    AND tableowner = '{settings.LAYMAN_PG_USER}'
+SELECT c.relkind, obj_description(c.oid, 'pg_class')
+FROM pg_class c INNER JOIN
+     pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = '{workspace}'
+    AND c.relname = '{layername}'
+    AND c.relkind IN ('r', 'v')
+    AND pg_get_userbyid(c.relowner) = '{settings.LAYMAN_PG_USER}'
 """)
     except BaseException as exc:
         raise LaymanError(7) from exc
@@ -35,6 +38,10 @@ WHERE schemaname = '{workspace}'
                 'name': layername,
             },
         }
+        relkind, comment = rows[0]
+        if relkind == 'v':
+            # view over external table, see create_external_table_view
+            result['db_table']['external_table'] = comment
     return result
 
 
@@ -42,11 +49,12 @@ def delete_layer(workspace, layername, conn_cur=None):
     if conn_cur is None:
         conn_cur = db_util.get_connection_cursor()
     conn, cur = conn_cur
-    query = f"""
-    DROP TABLE IF EXISTS "{workspace}"."{layername}" CASCADE
+    query = get_drop_statement(workspace, layername, conn_cur=conn_cur) + f"""
+    DROP TABLE IF EXISTS "{workspace}"."{get_shadow_table_name(layername)}" CASCADE;
+    DELETE FROM {settings.LAYMAN_PRIME_SCHEMA}.bbox_changes WHERE workspace = %s AND layername = %s;
     """
     try:
-        cur.execute(query)
+        cur.execute(query, (workspace, layername, ))
         conn.commit()
     except BaseException as exc:
         raise LaymanError(7)from exc
@@ -1,11 +1,14 @@
+import time
+
 from celery.utils.log import get_task_logger
 
+from geoserver import util as gs_util
 from layman.celery import AbortedException
 from layman.common import empty_method_returns_true
-from layman.layer.filesystem.input_file import get_layer_main_file_path
-from layman import celery_app
+from layman.layer.filesystem import input_file
+from layman import celery_app, settings, celery as celery_util
 from layman.http import LaymanError
-from .. import db
+from .. import db, LAYER_TYPE
 from .table import delete_layer
 
 
@@ -24,28 +27,79 @@ def refresh_table(
         username,
         layername,
         crs_id=None,
-        ensure_user=False
+        ensure_user=False,
+        replace_by_swap=False,
+        db_table=None,
 ):
     if ensure_user:
         db.ensure_workspace(username)
     if self.is_aborted():
         raise AbortedException
-    main_filepath = get_layer_main_file_path(username, layername)
-    process = db.import_layer_vector_file_async(username, layername, main_filepath, crs_id)
-    while process.poll() is None and not self.is_aborted():
-        pass
-    if self.is_aborted():
-        logger.info(f'terminating {username} {layername}')
-        process.terminate()
-        logger.info(f'terminating {username} {layername}')
-        delete_layer(username, layername)
+    if db_table is not None:
+        _publish_external_table(username, layername, db_table)
+        return
+    table_name = db.get_shadow_table_name(layername) if replace_by_swap else layername
+    if replace_by_swap:
+        # shadow table left by interrupted import
+        db.delete_table(username, table_name)
+    main_filepath = input_file.get_layer_main_file_path(username, layername)
+    process = db.import_layer_vector_file_async(username, table_name, main_filepath, crs_id)
+    process_result = db.supervise_process(process, is_aborted=self.is_aborted)
+    if process_result.aborted:
+        logger.info(f'terminated {username} {layername}')
+        if replace_by_swap:
+            _cancel_swap(username, layername)
+        else:
+            delete_layer(username, layername)
         raise AbortedException
-    return_code = process.poll()
-    if return_code != 0:
-        pg_error = str(process.stdout.read())
+    if process_result.return_code != 0:
+        pg_error = process_result.output
         logger.error(f"STDOUT: {pg_error}")
+        if replace_by_swap:
+            _cancel_swap(username, layername)
         if "ERROR:  zero-length delimited identifier at or near" in pg_error:
             err_code = 28
         else:
             err_code = 11
         raise LaymanError(err_code, private_data=pg_error)
+    if replace_by_swap:
+        try:
+            db.finish_import(username, table_name)
+            db.swap_table(username, table_name, layername)
+        except BaseException:
+            _cancel_swap(username, layername)
+            raise
+        input_file.delete_layer_backup(username, layername)
+    else:
+        db.finish_import(username, table_name)
+    db.ensure_bbox_change_triggers(username, layername)
+    table_inspection = db.inspect_table(username, layername)
+    input_file.save_inspection(username, layername, input_file.INSPECTION_PART_TABLE, table_inspection)
+    if replace_by_swap:
+        _patch_published_from_table(username, layername)
+    num_features = table_inspection['feature_count']
+    logger.info(f'imported {username} {layername}: {num_features} features in {process_result.duration:.2f} s')
+
+
+def _cancel_swap(username, layername):
+    # current table and its input files stay published
+    db.delete_table(username, db.get_shadow_table_name(layername))
+    input_file.restore_layer_backup(username, layername)
+
+
+def _patch_published_from_table(username, layername):
+    # GeoServer layers, QGIS project, thumbnail and metadata of old data were kept, the table name did not change,
+    # so they are patched in place by the same steps as after feature change, when the chain is finished
+    gs_util.reset(settings.LAYMAN_GS_AUTH)
+    celery_util.push_step_to_run_after_chain(username, LAYER_TYPE, layername, 'layman.util::patch_after_feature_change')
+    logger.info(f'swapped {username} {layername}, sources published from the table will be patched after the chain')
+
+
+def _publish_external_table(username, layername, db_table):
+    start = time.time()
+    table_info = db.get_external_table_info(username, db_table)
+    db.create_external_table_view(username, layername, table_info)
+    table_inspection = db.inspect_external_table(username, layername, table_info)
+    input_file.save_inspection(username, layername, input_file.INSPECTION_PART_TABLE, table_inspection)
+    logger.info(f'published {username} {layername} from {db_table}: estimated {table_inspection["feature_count"]} features '
+                f'in {time.time() - start:.2f} s')
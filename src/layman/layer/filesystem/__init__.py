@@ -1,8 +1,9 @@
-from layman.common import empty_method
+from layman.common import empty_method, empty_method_returns_dict
 from layman.common.filesystem import util as common_util
 
 check_username = empty_method
 check_new_layername = empty_method
+check_new_layernames = empty_method_returns_dict
 
 get_usernames = common_util.get_usernames
 get_workspaces = common_util.get_workspaces
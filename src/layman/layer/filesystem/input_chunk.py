@@ -3,6 +3,7 @@ import json
 import datetime
 import os
 import pathlib
+import time
 
 from flask import current_app
 
@@ -13,6 +14,14 @@ from . import util
 from . import input_file
 
 LAYER_SUBDIR = __name__.split('.')[-1]
+MAX_TOTAL_CHUNKS = 999
+# Number of bits reserved for each uploaded file in bitmap of received chunks, it must be a multiple of 8 and greater
+# than MAX_TOTAL_CHUNKS
+CHUNK_BITMAP_BITS_PER_FILE = 1024
+# chunks of one file are either written to their position in one file, or saved as separate files and concatenated
+CHUNK_MODE_POSITIONAL = 'positional'
+CHUNK_MODE_SEPARATE = 'separate'
+POSITIONAL_WRITE_BUFFER_SIZE = 1024 * 1024
 PATCH_MODE = patch_mode.DELETE_IF_DEPENDANT
 
 get_metadata_comparison = empty_method_returns_dict
@@ -34,8 +43,12 @@ def ensure_layer_resumable_dir(username, layername):
 
 def delete_layer(workspace, layername):
     util.delete_layer_subdir(workspace, layername, LAYER_SUBDIR)
-    chunk_key = get_layer_redis_total_chunks_key(workspace, layername)
-    settings.LAYMAN_REDIS.delete(chunk_key)
+    settings.LAYMAN_REDIS.delete(
+        get_layer_redis_total_chunks_key(workspace, layername),
+        get_layer_redis_received_chunks_key(workspace, layername),
+        get_layer_redis_last_activity_key(workspace, layername),
+        get_layer_redis_chunk_modes_key(workspace, layername),
+    )
 
 
 get_layer_info = input_file.get_layer_info
@@ -82,8 +95,114 @@ def get_layer_redis_total_chunks_key(username, layername):
     return f'layman.users.{username}.layers.{layername}.total_chunks'
 
 
+def get_layer_redis_received_chunks_key(username, layername):
+    return f'layman.users.{username}.layers.{layername}.received_chunks'
+
+
+def get_layer_redis_last_activity_key(username, layername):
+    return f'layman.users.{username}.layers.{layername}.last_chunk_activity'
+
+
+def get_layer_redis_chunk_modes_key(username, layername):
+    return f'layman.users.{username}.layers.{layername}.chunk_modes'
+
+
+def touch_upload_activity(username, layername):
+    settings.LAYMAN_REDIS.set(get_layer_redis_last_activity_key(username, layername), time.time())
+
+
+def get_upload_inactivity(username, layername):
+    """Returns number of seconds since last uploaded chunk (or since start of the upload), None if unknown."""
+    last_activity = settings.LAYMAN_REDIS.get(get_layer_redis_last_activity_key(username, layername))
+    return None if last_activity is None else time.time() - float(last_activity)
+
+
+def _get_chunk_bit_offset(file_idx, chunk_number):
+    return file_idx * CHUNK_BITMAP_BITS_PER_FILE + chunk_number
+
+
+def _register_received_chunk(username, layername, rh_key, file_idx, chunk_number, total_chunks):
+    rds = settings.LAYMAN_REDIS
+    with rds.pipeline() as pipe:
+        pipe.hset(get_layer_redis_total_chunks_key(username, layername), rh_key, total_chunks)
+        # Resumable.js may upload the same chunk more than once, the bit is simply set again
+        pipe.setbit(get_layer_redis_received_chunks_key(username, layername),
+                    _get_chunk_bit_offset(file_idx, chunk_number), 1)
+        pipe.set(get_layer_redis_last_activity_key(username, layername), time.time())
+        pipe.execute()
+
+
+def _is_chunk_received(username, layername, file_idx, chunk_number):
+    return settings.LAYMAN_REDIS.getbit(get_layer_redis_received_chunks_key(username, layername),
+                                        _get_chunk_bit_offset(file_idx, chunk_number)) == 1
+
+
+def _are_all_chunks_received(username, layername, files_to_upload):
+    rds = settings.LAYMAN_REDIS
+    bitmap_key = get_layer_redis_received_chunks_key(username, layername)
+    bytes_per_file = CHUNK_BITMAP_BITS_PER_FILE // 8
+    with rds.pipeline(transaction=False) as pipe:
+        pipe.hgetall(get_layer_redis_total_chunks_key(username, layername))
+        for file_idx in range(len(files_to_upload)):
+            pipe.bitcount(bitmap_key, file_idx * bytes_per_file, (file_idx + 1) * bytes_per_file - 1)
+        total_chunks, *received_chunks = pipe.execute()
+    rh_keys = [f'{fi["layman_original_parameter"]}:{fi["target_file"]}' for fi in files_to_upload]
+    return all(
+        rh_key in total_chunks and num_received >= int(total_chunks[rh_key])
+        for rh_key, num_received in zip(rh_keys, received_chunks)
+    )
+
+
+def _run_chain_if_upload_complete(username, layername, files_to_upload):
+    if not _are_all_chunks_received(username, layername, files_to_upload):
+        return
+    from layman import celery as celery_util
+    from layman.layer import LAYER_TYPE
+    if celery_util.run_deferred_publication_chain(username, LAYER_TYPE, layername):
+        current_app.logger.info(f'All chunks of layer {username}.{layername} received, publication chain sent.')
+
+
+def _get_positional_target_path(chunk_dir, target_filename):
+    return os.path.join(chunk_dir, target_filename + '.part')
+
+
+def _write_chunk_at_offset(chunk, path, offset, total_size):
+    """Writes chunk directly to its position in (sparse) target file of `total_size` bytes, so that chunks can be
+    written in any order and concurrently, and no concatenation is needed when all chunks are uploaded."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        if os.fstat(fd).st_size < total_size:
+            os.ftruncate(fd, total_size)
+        while True:
+            data = chunk.stream.read(POSITIONAL_WRITE_BUFFER_SIZE)
+            if not data:
+                break
+            view = memoryview(data)
+            while view:
+                written = os.pwrite(fd, view, offset)
+                offset += written
+                view = view[written:]
+    finally:
+        os.close(fd)
+
+
+def _check_chunk_mode(username, layername, rh_key, chunk_mode):
+    # mode is set by the first chunk of the file, chunks of one file can not be split between both modes
+    rds = settings.LAYMAN_REDIS
+    key = get_layer_redis_chunk_modes_key(username, layername)
+    with rds.pipeline() as pipe:
+        pipe.hsetnx(key, rh_key, chunk_mode)
+        pipe.hget(key, rh_key)
+        _, file_chunk_mode = pipe.execute()
+    if file_chunk_mode != chunk_mode:
+        raise LaymanError(2, {
+            'parameter': 'resumableChunkSize',
+            'expected value': 'resumableChunkSize and resumableTotalSize sent with either all or no chunks of one file',
+        })
+
+
 def save_layer_file_chunk(username, layername, parameter_name, filename, chunk,
-                          chunk_number, total_chunks):
+                          chunk_number, total_chunks, chunk_size=None, total_size=None):
     resumable_dir = get_layer_resumable_dir(username, layername)
     info_path = os.path.join(resumable_dir, 'info.json')
     chunk_dir = os.path.join(resumable_dir, 'chunks')
@@ -104,17 +223,30 @@ def save_layer_file_chunk(username, layername, parameter_name, filename, chunk,
                     'file': filename,
                     'layman_original_parameter': parameter_name,
                 })
-            settings.LAYMAN_REDIS.hset(
-                get_layer_redis_total_chunks_key(username, layername),
-                f'{parameter_name}:{file_info["target_file"]}',
-                total_chunks
-            )
             target_filename = os.path.basename(file_info['target_file'])
-            chunk_name = _get_chunk_name(target_filename, chunk_number)
-            chunk_path = os.path.join(chunk_dir, chunk_name)
-            chunk.save(chunk_path)
-            current_app.logger.info('Resumable chunk saved to: %s',
-                                    chunk_path)
+            rh_key = f'{parameter_name}:{file_info["target_file"]}'
+            positional = chunk_size is not None and total_size is not None
+            _check_chunk_mode(username, layername, rh_key, CHUNK_MODE_POSITIONAL if positional else CHUNK_MODE_SEPARATE)
+            if positional:
+                target_path = _get_positional_target_path(chunk_dir, target_filename)
+                offset = (chunk_number - 1) * chunk_size
+                if offset > total_size:
+                    raise LaymanError(2, {
+                        'parameter': 'resumableChunkNumber',
+                        'expected value': 'chunk starting within resumableTotalSize',
+                    })
+                _write_chunk_at_offset(chunk, target_path, offset, total_size)
+                current_app.logger.info('Resumable chunk written to: %s at offset %s',
+                                        target_path, offset)
+            else:
+                chunk_name = _get_chunk_name(target_filename, chunk_number)
+                chunk_path = os.path.join(chunk_dir, chunk_name)
+                chunk.save(chunk_path)
+                current_app.logger.info('Resumable chunk saved to: %s',
+                                        chunk_path)
+            _register_received_chunk(username, layername, rh_key,
+                                     files_to_upload.index(file_info), chunk_number, total_chunks)
+        _run_chain_if_upload_complete(username, layername, files_to_upload)
 
     else:
         raise LaymanError(20)
@@ -146,8 +278,8 @@ def layer_file_chunk_exists(username, layername, parameter_name, filename,
             target_filename = os.path.basename(target_filepath)
             chunk_name = _get_chunk_name(target_filename, chunk_number)
             chunk_path = os.path.join(chunk_dir, chunk_name)
-            return os.path.exists(chunk_path) or os.path.exists(
-                target_filepath)
+            return _is_chunk_received(username, layername, files_to_upload.index(file_info), chunk_number) \
+                or os.path.exists(chunk_path) or os.path.exists(target_filepath)
     else:
         raise LaymanError(20)
 
@@ -164,6 +296,7 @@ def layer_file_chunk_info(username, layername):
             files_to_upload = info['files_to_upload']
 
             r_key = get_layer_redis_total_chunks_key(username, layername)
+            all_chunks_received = _are_all_chunks_received(username, layername, files_to_upload)
             for file in files_to_upload:
                 rh_key = f'{file["layman_original_parameter"]}:{file["target_file"]}'
                 total_chunks = settings.LAYMAN_REDIS.hget(r_key, rh_key)
@@ -172,6 +305,16 @@ def layer_file_chunk_info(username, layername):
                     continue
                 total_chunks = int(total_chunks)
                 target_fn = os.path.basename(file['target_file'])
+                positional_fp = _get_positional_target_path(chunk_dir, target_fn)
+                if os.path.exists(positional_fp):
+                    if all_chunks_received:
+                        # chunks were written directly to their positions, so the file is just moved
+                        input_file.ensure_layer_input_file_dir(username, layername)
+                        os.replace(positional_fp, file['target_file'])
+                        settings.LAYMAN_REDIS.hdel(r_key, rh_key)
+                        current_app.logger.info('Resumable file saved to: %s',
+                                                file['target_file'])
+                    continue
                 chunk_paths = [
                     os.path.join(chunk_dir, _get_chunk_name(target_fn, x))
                     for x in range(1, total_chunks + 1)
@@ -203,7 +346,8 @@ def layer_file_chunk_info(username, layername):
                 delete_layer(username, layername)
                 num_chunks_saved = 0
             else:
-                num_chunks_saved = len(os.listdir(chunk_dir))
+                num_chunks_saved = settings.LAYMAN_REDIS.bitcount(
+                    get_layer_redis_received_chunks_key(username, layername))
 
             return all_files_saved, num_files_saved, num_chunks_saved
     else:
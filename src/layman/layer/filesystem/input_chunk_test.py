@@ -0,0 +1,41 @@
+import io
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from layman import LaymanError, settings
+from . import input_chunk
+from .input_chunk import _write_chunk_at_offset, _check_chunk_mode
+
+
+def test_write_chunk_at_offset(tmp_path):
+    data = bytes(range(256)) * 10
+    chunk_size = 1000
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)]
+    target_path = str(tmp_path / 'file.part')
+
+    # chunks arrive in reversed order
+    for chunk_idx in reversed(range(len(chunks))):
+        chunk = FileStorage(stream=io.BytesIO(chunks[chunk_idx]))
+        _write_chunk_at_offset(chunk, target_path, chunk_idx * chunk_size, len(data))
+        assert os.path.getsize(target_path) == len(data)
+
+    with open(target_path, 'rb') as file:
+        assert file.read() == data
+
+
+def test_check_chunk_mode():
+    workspace = 'test_check_chunk_mode_workspace'
+    layer = 'test_check_chunk_mode_layer'
+    key = input_chunk.get_layer_redis_chunk_modes_key(workspace, layer)
+    settings.LAYMAN_REDIS.delete(key)
+
+    _check_chunk_mode(workspace, layer, 'file:a.geojson', input_chunk.CHUNK_MODE_POSITIONAL)
+    _check_chunk_mode(workspace, layer, 'file:a.geojson', input_chunk.CHUNK_MODE_POSITIONAL)
+    _check_chunk_mode(workspace, layer, 'file:b.geojson', input_chunk.CHUNK_MODE_SEPARATE)
+    with pytest.raises(LaymanError) as exc_info:
+        _check_chunk_mode(workspace, layer, 'file:a.geojson', input_chunk.CHUNK_MODE_SEPARATE)
+    assert exc_info.value.code == 2
+
+    settings.LAYMAN_REDIS.delete(key)
@@ -1,6 +1,8 @@
 import glob
+import json
 import os
 import pathlib
+import shutil
 
 from osgeo import ogr
 
@@ -11,6 +13,10 @@ from layman.common.filesystem import util as common_util, input_file as common
 from . import util
 
 LAYER_SUBDIR = __name__.split('.')[-1]
+# input files of current DB table are kept here while new input files are imported into shadow table
+BACKUP_SUBDIR = f'{LAYER_SUBDIR}_backup'
+INSPECTION_FILE_SUFFIX = 'inspection.json'
+INSPECTION_PART_TABLE = 'table'
 PATCH_MODE = patch_mode.DELETE_IF_DEPENDANT
 
 pre_publication_action_check = empty_method
@@ -32,9 +38,41 @@ def ensure_layer_input_file_dir(username, layername):
 
 
 def delete_layer(workspace, layername):
+    util.delete_layer_subdir(workspace, layername, BACKUP_SUBDIR)
     util.delete_layer_subdir(workspace, layername, LAYER_SUBDIR)
 
 
+def get_layer_backup_dir(workspace, layername):
+    return os.path.join(util.get_layer_dir(workspace, layername), BACKUP_SUBDIR)
+
+
+def backup_layer(workspace, layername):
+    """Moves input files aside, so that new input files can be saved while the current ones still describe DB table.
+
+    If backup already exists (previous replacement did not finish), it is kept, because it belongs to current DB table.
+    """
+    input_file_dir = get_layer_input_file_dir(workspace, layername)
+    if os.path.exists(get_layer_backup_dir(workspace, layername)):
+        shutil.rmtree(input_file_dir, ignore_errors=True)
+    elif os.path.exists(input_file_dir):
+        os.rename(input_file_dir, get_layer_backup_dir(workspace, layername))
+
+
+def restore_layer_backup(workspace, layername):
+    """Replaces input files by the ones moved aside by `backup_layer`. Returns False if there is no backup."""
+    backup_dir = get_layer_backup_dir(workspace, layername)
+    if not os.path.exists(backup_dir):
+        return False
+    input_file_dir = get_layer_input_file_dir(workspace, layername)
+    shutil.rmtree(input_file_dir, ignore_errors=True)
+    os.rename(backup_dir, input_file_dir)
+    return True
+
+
+def delete_layer_backup(workspace, layername):
+    util.delete_layer_subdir(workspace, layername, BACKUP_SUBDIR)
+
+
 def get_layer_info(workspace, layername):
     input_file_dir = get_layer_input_file_dir(workspace, layername)
     pattern = os.path.join(input_file_dir, layername + '.*')
@@ -78,29 +116,82 @@ def get_ogr_driver(main_filepath):
     return ogr.GetDriverByName(driver_name)
 
 
-def check_main_file(main_filepath):
-    # check feature layers in source file
+def inspect_main_file(main_filepath):
+    """Opens main file once and returns dict with number of feature layers and CRS of the first feature layer. Only
+    metadata of the file are read, features are not."""
     in_driver = get_ogr_driver(main_filepath)
     in_data_source = in_driver.Open(main_filepath, 0)
     n_layers = in_data_source.GetLayerCount()
+    result = {
+        'layer_count': n_layers,
+    }
+    if n_layers > 0:
+        feature_layer = in_data_source.GetLayerByIndex(0)
+        crs = feature_layer.GetSpatialRef()
+        crs_auth_name = crs.GetAuthorityName(None) if crs is not None else None
+        crs_code = crs.GetAuthorityCode(None) if crs is not None else None
+        crs_id = crs_auth_name + ":" + crs_code if crs_auth_name and crs_code else None
+        result['crs_id'] = crs_id
+    return result
+
+
+def check_main_file(file_inspection):
+    # check feature layers in source file
+    n_layers = file_inspection['layer_count']
     if n_layers != 1:
         raise LaymanError(5, {'found': n_layers, 'expected': 1})
 
 
-def check_layer_crs(main_filepath):
-    in_driver = get_ogr_driver(main_filepath)
-    in_data_source = in_driver.Open(main_filepath, 0)
-    feature_layer = in_data_source.GetLayerByIndex(0)
-
-    crs = feature_layer.GetSpatialRef()
-    crs_auth_name = crs.GetAuthorityName(None)
-    crs_code = crs.GetAuthorityCode(None)
-    crs_id = crs_auth_name + ":" + crs_code
+def check_layer_crs(file_inspection):
+    crs_id = file_inspection['crs_id']
     if crs_id not in settings.INPUT_SRS_LIST:
         raise LaymanError(4, {'found': crs_id,
                               'supported_values': settings.INPUT_SRS_LIST})
 
 
+def get_inspection_file_path(workspace, layername, part):
+    return os.path.join(get_layer_input_file_dir(workspace, layername), f'{part}_{INSPECTION_FILE_SUFFIX}')
+
+
+def get_inspection(workspace, layername, part):
+    """Returns given part of inspection of the layer data saved by `save_inspection`, or None."""
+    inspection_path = get_inspection_file_path(workspace, layername, part)
+    try:
+        with open(inspection_path) as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def save_inspection(workspace, layername, part, inspection):
+    """Saves part of inspection of the layer data, e.g. `table` for imported table.
+
+    File is replaced atomically, so readers never see partially written inspection.
+    """
+    ensure_layer_input_file_dir(workspace, layername)
+    inspection_path = get_inspection_file_path(workspace, layername, part)
+    tmp_path = f'{inspection_path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as file:
+        json.dump(inspection, file)
+    os.replace(tmp_path, inspection_path)
+
+
+def delete_inspection(workspace, layername, part):
+    try:
+        os.remove(get_inspection_file_path(workspace, layername, part))
+    except FileNotFoundError:
+        pass
+
+
+def inspect_and_check_main_file(main_filepath, *, check_layers=True, check_crs=True):
+    file_inspection = inspect_main_file(main_filepath)
+    if check_layers:
+        check_main_file(file_inspection)
+    if check_crs:
+        check_layer_crs(file_inspection)
+    return file_inspection
+
+
 def check_filenames(username, layername, filenames, check_crs, ignore_existing_files=False):
     main_filename = get_main_file_name(filenames)
     if main_filename is None:
@@ -157,9 +248,7 @@ def save_layer_files(username, layername, files, check_crs):
     #                         for k, v in filepath_mapping.items()
     #                         if v is not None})
 
-    check_main_file(filepath_mapping[main_filename])
-    if check_crs:
-        check_layer_crs(filepath_mapping[main_filename])
+    inspect_and_check_main_file(filepath_mapping[main_filename], check_crs=check_crs)
     # main_filename = filename_mapping[main_filename]
     target_file_paths = [
         fp for k, fp in filepath_mapping.items() if fp is not None
@@ -184,6 +273,32 @@ def get_main_file_name(filenames):
                  in settings.MAIN_FILE_EXTENSIONS), None)
 
 
+def group_files_by_main_file(files):
+    """Splits files (file storages or file names) of more layers into groups, one group for each main file. Other files
+    belong to main file whose name without extension is the longest prefix of their name followed by a dot, e.g.
+    `roads.shp.xml` belongs to `roads.shp`. Returns tuple (dict main file name -> list of files, list of files without
+    main file)."""
+    def get_filename(file):
+        return file if isinstance(file, str) else file.filename
+
+    groups = {
+        get_filename(f): [f] for f in files
+        if os.path.splitext(get_filename(f))[1] in settings.MAIN_FILE_EXTENSIONS
+    }
+    stems = sorted(((os.path.splitext(fn)[0].lower() + '.', fn) for fn in groups), key=lambda x: len(x[0]), reverse=True)
+    orphans = []
+    for file in files:
+        filename = get_filename(file)
+        if filename in groups:
+            continue
+        main_filename = next((fn for stem, fn in stems if filename.lower().startswith(stem)), None)
+        if main_filename is None:
+            orphans.append(file)
+        else:
+            groups[main_filename].append(file)
+    return groups, orphans
+
+
 def get_file_name_mappings(file_names, main_file_name, layer_name, output_dir):
     main_file_name = os.path.splitext(main_file_name)[0]
     filename_mapping = {}
@@ -1,4 +1,7 @@
-from .input_file import get_main_file_name, get_file_name_mappings
+import os
+
+from . import input_file
+from .input_file import get_main_file_name, get_file_name_mappings, group_files_by_main_file, inspect_main_file
 
 
 def test_get_main_file_name():
@@ -98,3 +101,70 @@ def test_get_file_name_mappings():
         'tmp/countries_lakes.shx': None,
         'tmp/countries_lakes.VERSION.txt': None,
     }
+
+
+def test_group_files_by_main_file():
+    filenames = [
+        'tmp/countries.cpg',
+        'tmp/countries.dbf',
+        'tmp/countries.shp',
+        'tmp/countries.shx',
+        'tmp/countries_lakes.geojson',
+        'tmp/countries.shp.xml',
+        'tmp/countries_lakes.README.html',
+        'tmp/rivers.dbf',
+    ]
+    groups, orphans = group_files_by_main_file(filenames)
+    assert groups == {
+        'tmp/countries.shp': [
+            'tmp/countries.shp',
+            'tmp/countries.cpg',
+            'tmp/countries.dbf',
+            'tmp/countries.shx',
+            'tmp/countries.shp.xml',
+        ],
+        'tmp/countries_lakes.geojson': [
+            'tmp/countries_lakes.geojson',
+            'tmp/countries_lakes.README.html',
+        ],
+    }
+    assert orphans == ['tmp/rivers.dbf']
+
+
+def test_inspect_main_file():
+    inspection = inspect_main_file('sample/layman.layer/single_point.shp')
+    assert inspection['layer_count'] == 1
+    assert inspection['crs_id'] == 'EPSG:4326'
+
+
+def test_backup_and_restore_layer():
+    workspace = 'test_backup_and_restore_layer_workspace'
+    layer = 'test_backup_and_restore_layer_layer'
+
+    def save_main_file(content):
+        input_file_dir = input_file.ensure_layer_input_file_dir(workspace, layer)
+        with open(os.path.join(input_file_dir, f'{layer}.geojson'), 'w') as file:
+            file.write(content)
+
+    def read_main_file():
+        with open(input_file.get_layer_main_file_path(workspace, layer)) as file:
+            return file.read()
+
+    save_main_file('old')
+    input_file.backup_layer(workspace, layer)
+    assert input_file.get_layer_main_file_path(workspace, layer) is None
+    save_main_file('new')
+    # backup of current input files is not overwritten by repeated backup
+    input_file.backup_layer(workspace, layer)
+    save_main_file('newer')
+    assert input_file.restore_layer_backup(workspace, layer) is True
+    assert read_main_file() == 'old'
+    assert input_file.restore_layer_backup(workspace, layer) is False
+
+    input_file.backup_layer(workspace, layer)
+    save_main_file('new')
+    input_file.delete_layer_backup(workspace, layer)
+    assert read_main_file() == 'new'
+
+    input_file.delete_layer(workspace, layer)
+    assert not os.path.exists(input_file.get_layer_backup_dir(workspace, layer))
@@ -4,15 +4,16 @@ from celery.utils.log import get_task_logger
 
 from layman.celery import AbortedException
 from layman.common import empty_method_returns_true
-from layman import celery_app
+from layman import celery_app, celery as celery_util
 from layman.http import LaymanError
 from layman import settings
+from layman.layer import LAYER_TYPE, db
 from . import input_file, input_chunk, thumbnail
 
 logger = get_task_logger(__name__)
 
 refresh_input_chunk_needed = empty_method_returns_true
-refresh_thumbnail_needed = empty_method_returns_true
+refresh_thumbnail_needed = db.is_refresh_needed_unless_swap
 
 
 @celery_app.task(
@@ -33,12 +34,12 @@ def refresh_input_chunk(self, username, layername, check_crs=True):
         if time.time() - last_change > settings.UPLOAD_MAX_INACTIVITY_TIME:
             logger.info(
                 f'UPLOAD_MAX_INACTIVITY_TIME reached {username}.{layername}')
-            input_file.delete_layer(username, layername)
+            _delete_input_files(username, layername)
             raise LaymanError(22)
         time.sleep(0.5)
         if self.is_aborted():
             logger.info(f'Aborting for layer {username}.{layername}')
-            input_file.delete_layer(username, layername)
+            _delete_input_files(username, layername)
             logger.info(f'Aborted for layer {username}.{layername}')
             raise AbortedException
 
@@ -53,7 +54,40 @@ def refresh_input_chunk(self, username, layername, check_crs=True):
 
     if check_crs:
         main_filepath = input_file.get_layer_main_file_path(username, layername)
-        input_file.check_layer_crs(main_filepath)
+        input_file.inspect_and_check_main_file(main_filepath, check_layers=False)
+
+
+def schedule_chunk_upload_activity_check(username, layername, countdown=None):
+    countdown = settings.UPLOAD_MAX_INACTIVITY_TIME if countdown is None else countdown
+    check_chunk_upload_activity.apply_async(
+        args=[username, layername],
+        countdown=countdown,
+        queue=settings.LAYMAN_CELERY_QUEUE,
+    )
+
+
+# Name intentionally does not start with publication type, so that the task is not considered part of publication chain
+@celery_app.task(
+    name='layman.check_chunk_upload_activity',
+)
+def check_chunk_upload_activity(username, layername):
+    if not celery_util.is_publication_chain_deferred(username, LAYER_TYPE, layername):
+        return
+    inactivity = input_chunk.get_upload_inactivity(username, layername)
+    if inactivity is not None and inactivity <= settings.UPLOAD_MAX_INACTIVITY_TIME:
+        schedule_chunk_upload_activity_check(username, layername,
+                                             countdown=settings.UPLOAD_MAX_INACTIVITY_TIME - inactivity)
+        return
+    logger.info(f'UPLOAD_MAX_INACTIVITY_TIME reached {username}.{layername}')
+    if celery_util.fail_deferred_publication_chain(username, LAYER_TYPE, layername, LaymanError(22)):
+        _delete_input_files(username, layername)
+        input_chunk.delete_layer(username, layername)
+
+
+def _delete_input_files(username, layername):
+    # input files of DB table that was about to be replaced by swap are still valid
+    if not input_file.restore_layer_backup(username, layername):
+        input_file.delete_layer(username, layername)
 
 
 @celery_app.task(
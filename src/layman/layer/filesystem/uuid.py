@@ -17,6 +17,7 @@ get_layer_info = partial(common_uuid.get_publication_info, LAYER_TYPE)
 delete_layer = partial(common_uuid.delete_publication, LAYER_TYPE)
 get_publication_uuid = partial(common_uuid.get_publication_uuid, LAYER_TYPE)
 assign_layer_uuid = partial(common_uuid.assign_publication_uuid, LAYER_TYPE)
+assign_layer_uuids = partial(common_uuid.assign_publication_uuids, LAYER_TYPE)
 
 
 def get_layer_uuid(username, layername):
@@ -6,7 +6,7 @@ from flask import g
 from geoserver import util as gs_util, GS_REST_WORKSPACES
 from layman.http import LaymanError
 from layman import settings, util as layman_util
-from layman.common import bbox as bbox_util, geoserver as gs_common, empty_method
+from layman.common import bbox as bbox_util, geoserver as gs_common, empty_method, empty_method_returns_dict
 from layman.layer import LAYER_TYPE
 from layman.layer.qgis import wms as qgis_wms
 from . import wms
@@ -23,6 +23,7 @@ headers_xml = {
 }
 
 check_new_layername = empty_method
+check_new_layernames = empty_method_returns_dict
 
 
 def ensure_whole_user(username, auth=settings.LAYMAN_GS_AUTH):
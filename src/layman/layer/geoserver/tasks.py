@@ -3,16 +3,15 @@ from celery.utils.log import get_task_logger
 from geoserver import util as gs_util
 from layman.celery import AbortedException
 from layman import celery_app, settings
-from layman.common import empty_method_returns_true
 from . import wms, wfs, sld
-from .. import geoserver
+from .. import geoserver, db
 
 logger = get_task_logger(__name__)
 
 
-refresh_wms_needed = empty_method_returns_true
-refresh_wfs_needed = empty_method_returns_true
-refresh_sld_needed = empty_method_returns_true
+refresh_wms_needed = db.is_refresh_needed_unless_swap
+refresh_wfs_needed = db.is_refresh_needed_unless_swap
+refresh_sld_needed = db.is_refresh_needed_unless_swap
 
 
 @celery_app.task(
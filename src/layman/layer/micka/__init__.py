@@ -1,4 +1,4 @@
-from layman.common import empty_method
+from layman.common import empty_method, empty_method_returns_dict
 
 ensure_whole_user = empty_method
 delete_whole_user = empty_method
@@ -6,6 +6,7 @@ ensure_workspace = empty_method
 delete_workspace = empty_method
 check_username = empty_method
 check_new_layername = empty_method
+check_new_layernames = empty_method_returns_dict
 
 
 def get_usernames():
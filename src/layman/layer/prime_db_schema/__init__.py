@@ -5,6 +5,7 @@ get_usernames = prime_db_schema.get_usernames
 get_workspaces = prime_db_schema.get_workspaces
 check_username = prime_db_schema.check_username
 check_new_layername = prime_db_schema.check_new_layername
+check_new_layernames = prime_db_schema.check_new_layernames
 delete_whole_user = prime_db_schema.delete_whole_user
 ensure_whole_user = prime_db_schema.ensure_whole_user
 delete_workspace = prime_db_schema.delete_workspace
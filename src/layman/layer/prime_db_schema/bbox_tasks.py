@@ -1,10 +1,11 @@
 from celery.utils.log import get_task_logger
 
 from layman.celery import AbortedException
+from layman.common import bbox as bbox_util
 from layman import celery_app
 from .. import LAYER_TYPE
-from ..db import get_bbox as db_get_bbox
-from ...common.prime_db_schema.publications import set_bbox
+from .. import db
+from ...common.prime_db_schema.publications import get_bbox, set_bbox
 
 logger = get_task_logger(__name__)
 
@@ -22,12 +23,24 @@ def patch_after_feature_change(
     if self.is_aborted():
         raise AbortedException
 
-    bbox = db_get_bbox(username, layername)
+    bbox = None
+    changes = db.get_bbox_changes(username, layername)
+    if changes is not None:
+        added_bbox, removed_bbox, changes_version = changes
+        bbox = bbox_util.get_bbox_after_change(get_bbox(username, LAYER_TYPE, layername), added_bbox, removed_bbox)
+    if bbox is not None:
+        logger.info(f'Incremental bbox update of {username}.{layername}: added={added_bbox}, removed={removed_bbox}')
+    else:
+        reason = 'no changes recorded' if changes is None else f'removed features may touch boundary, removed={removed_bbox}'
+        logger.info(f'Full bbox recompute of {username}.{layername}: {reason}')
+        bbox = db.get_bbox(username, layername)
 
     if self.is_aborted():
         raise AbortedException
 
     set_bbox(username, LAYER_TYPE, layername, bbox, )
+    if changes is not None:
+        db.delete_bbox_changes(username, layername, changes_version)
 
     if self.is_aborted():
         raise AbortedException
@@ -1,15 +1,14 @@
 from celery.utils.log import get_task_logger
 
 from layman.celery import AbortedException
-from layman.common import empty_method_returns_true
 from layman import celery_app
 from .. import LAYER_TYPE
-from ..db import get_bbox as db_get_bbox
+from .. import db
 from ...common.prime_db_schema.publications import set_bbox
 
 logger = get_task_logger(__name__)
 
-refresh_bbox_needed = empty_method_returns_true
+refresh_bbox_needed = db.is_refresh_needed_unless_swap
 
 
 @celery_app.task(
@@ -25,7 +24,7 @@ def refresh_bbox(
     if self.is_aborted():
         raise AbortedException
 
-    bbox = db_get_bbox(username, layername)
+    bbox = tuple(db.get_table_inspection(username, layername)['bbox'])
 
     if self.is_aborted():
         raise AbortedException
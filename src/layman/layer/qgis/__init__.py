@@ -4,7 +4,7 @@ import shutil
 from functools import partial
 
 from layman import settings
-from layman.common import empty_method
+from layman.common import empty_method, empty_method_returns_dict
 from layman.util import get_publication_types
 from layman.layer import LAYER_TYPE
 
@@ -12,6 +12,7 @@ PUBL_TYPE_DEF_KEY = __name__
 
 check_username = empty_method
 check_new_layername = empty_method
+check_new_layernames = empty_method_returns_dict
 
 
 def get_workspaces_dir():
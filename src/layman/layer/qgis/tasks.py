@@ -1,14 +1,14 @@
 from celery.utils.log import get_task_logger
 
 from layman import celery_app
-from layman.common import empty_method_returns_true
 from layman.celery import AbortedException
 from . import wms
+from .. import db
 
 
 logger = get_task_logger(__name__)
 
-refresh_wms_needed = empty_method_returns_true
+refresh_wms_needed = db.is_refresh_needed_unless_swap
 
 
 @celery_app.task(
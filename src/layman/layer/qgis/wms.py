@@ -58,14 +58,15 @@ def save_qgs_file(workspace, layer):
     info = layer_util.get_layer_info(workspace, layer)
     uuid = info['uuid']
     qgis.ensure_layer_dir(workspace, layer)
-    layer_bbox = db.get_bbox(workspace, layer)
+    table_inspection = db.get_table_inspection(workspace, layer)
+    layer_bbox = tuple(table_inspection['bbox'])
     layer_bbox = layer_bbox if not bbox_util.is_empty(layer_bbox) else settings.LAYMAN_DEFAULT_OUTPUT_BBOX
     qml = util.get_original_style_xml(workspace, layer)
     qml_geometry = util.get_qml_geometry_from_qml(qml)
-    db_types = db.get_geometry_types(workspace, layer)
+    db_types = table_inspection['geometry_types']
     db_cols = [
-        col for col in db.get_all_column_infos(workspace, layer)
-        if col.name not in ['wkb_geometry', 'ogc_fid']
+        db.ColumnInfo(*col) for col in table_inspection['columns']
+        if col[0] not in ['wkb_geometry', 'ogc_fid']
     ]
     source_type = util.get_source_type(db_types, qml_geometry)
     layer_qml = util.fill_layer_template(workspace, layer, uuid, layer_bbox, qml, source_type, db_cols)
@@ -6,7 +6,8 @@ from layman.util import check_username_decorator
 from layman import settings, authn, util as layman_util
 from layman.authn import authenticate
 from layman.authz import authorize_workspace_publications_decorator
-from . import util, LAYER_REST_PATH_NAME
+from . import util, LAYER_REST_PATH_NAME, STYLE_TYPES_DEF, NO_STYLE_DEF
+from .db import DB_PATCH_IMPORT_MODE_SWAP
 from .filesystem import input_file, input_style, input_chunk
 
 bp = Blueprint('rest_workspace_layer', __name__)
@@ -17,6 +18,7 @@ bp = Blueprint('rest_workspace_layer', __name__)
 @util.check_layername_decorator
 @authenticate
 @authorize_workspace_publications_decorator
+@util.conditional_get_decorator
 @util.info_decorator
 def before_request():
     pass
@@ -113,13 +115,23 @@ def patch(workspace, layername):
 
     if delete_from is not None:
         request_method = request.method.lower()
-        deleted = util.delete_layer(workspace, layername, source=delete_from, http_method=request_method)
-        if style_file is None:
-            try:
-                style_file = deleted['style']['file']
-            except KeyError:
-                pass
-        style_type = input_style.get_style_type_from_file_storage(style_file)
+        # new style needs republishing, so only data without style can be replaced by swap
+        replace_by_swap = delete_from == 'layman.layer.filesystem.input_file' and style_file is None \
+            and settings.LAYMAN_DB_PATCH_IMPORT_MODE == DB_PATCH_IMPORT_MODE_SWAP
+        if replace_by_swap:
+            # DB table is replaced by asynchronous task after the new data is imported, everything published from it
+            # is patched in place afterwards; current input files are kept aside until then
+            input_file.backup_layer(workspace, layername)
+            style_type_code = util.get_layer_info(workspace, layername, context={'keys': ['style_type'], })['style_type']
+            style_type = next((sd for sd in STYLE_TYPES_DEF if sd.code == style_type_code), NO_STYLE_DEF)
+        else:
+            deleted = util.delete_layer(workspace, layername, source=delete_from, http_method=request_method)
+            if style_file is None:
+                try:
+                    style_file = deleted['style']['file']
+                except KeyError:
+                    pass
+            style_type = input_style.get_style_type_from_file_storage(style_file)
         kwargs['style_type'] = style_type
         kwargs['store_in_geoserver'] = style_type.store_in_geoserver
         if style_file:
@@ -130,22 +142,28 @@ def patch(workspace, layername):
             'ensure_user': False,
             'http_method': request_method,
             'metadata_properties_to_refresh': props_to_refresh,
+            'replace_by_swap': replace_by_swap,
         })
 
         if delete_from == 'layman.layer.filesystem.input_file':
 
-            if use_chunk_upload:
-                files_to_upload = input_chunk.save_layer_files_str(
-                    workspace, layername, files, check_crs)
-                layer_result.update({
-                    'files_to_upload': files_to_upload,
-                })
-                kwargs.update({
-                    'check_crs': check_crs,
-                })
-            else:
-                input_file.save_layer_files(
-                    workspace, layername, files, check_crs)
+            try:
+                if use_chunk_upload:
+                    files_to_upload = input_chunk.save_layer_files_str(
+                        workspace, layername, files, check_crs)
+                    layer_result.update({
+                        'files_to_upload': files_to_upload,
+                    })
+                    kwargs.update({
+                        'check_crs': check_crs,
+                    })
+                else:
+                    input_file.save_layer_files(
+                        workspace, layername, files, check_crs)
+            except BaseException:
+                if replace_by_swap:
+                    input_file.restore_layer_backup(workspace, layername)
+                raise
     kwargs.update({'actor_name': authn.get_authn_username()})
 
     rest_util.setup_patch_access_rights(request.form, kwargs)
@@ -30,22 +30,41 @@ def post(workspace, layername):
     app.logger.info(f"POST Layer Chunk, user={g.user}")
 
     total_chunks = request.form.get('resumableTotalChunks', type=int)
-    if total_chunks > 999:
+    if total_chunks is None or not 1 <= total_chunks <= input_chunk.MAX_TOTAL_CHUNKS:
         raise LaymanError(2, {
             'parameter': 'resumableTotalChunks',
-            'expected value': 'number from 0 to 999',
+            'expected value': f'number from 1 to {input_chunk.MAX_TOTAL_CHUNKS}',
         })
     chunk_number = request.form.get('resumableChunkNumber', default=1,
                                     type=int)
+    if not 1 <= chunk_number <= total_chunks:
+        raise LaymanError(2, {
+            'parameter': 'resumableChunkNumber',
+            'expected value': f'number from 1 to resumableTotalChunks ({total_chunks})',
+        })
     filename = request.form.get('resumableFilename', default='error',
                                 type=str)
     parameter_name = request.form.get('layman_original_parameter', default='error',
                                       type=str)
+    chunk_size = request.form.get('resumableChunkSize', type=int)
+    total_size = request.form.get('resumableTotalSize', type=int)
+    if chunk_size is not None or total_size is not None:
+        if chunk_size is None or chunk_size <= 0:
+            raise LaymanError(2, {
+                'parameter': 'resumableChunkSize',
+                'expected value': 'positive number, together with resumableTotalSize',
+            })
+        if total_size is None or total_size < 0:
+            raise LaymanError(2, {
+                'parameter': 'resumableTotalSize',
+                'expected value': 'non-negative number, together with resumableChunkSize',
+            })
     chunk = request.files['file']
 
     input_chunk.save_layer_file_chunk(workspace, layername, parameter_name,
                                       filename, chunk,
-                                      chunk_number, total_chunks)
+                                      chunk_number, total_chunks,
+                                      chunk_size=chunk_size, total_size=total_size)
     # time.sleep(5)
 
     return jsonify({
@@ -59,6 +78,11 @@ def get(workspace, layername):
 
     chunk_number = request.args.get('resumableChunkNumber', default=1,
                                     type=int)
+    if not 1 <= chunk_number <= input_chunk.MAX_TOTAL_CHUNKS:
+        raise LaymanError(2, {
+            'parameter': 'resumableChunkNumber',
+            'expected value': f'number from 1 to {input_chunk.MAX_TOTAL_CHUNKS}',
+        })
     filename = request.args.get('resumableFilename', default='error',
                                 type=str)
     parameter_name = request.args.get('layman_original_parameter', default='error',
@@ -16,6 +16,7 @@ bp = Blueprint('rest_workspace_layer_style', __name__)
 @util.check_layername_decorator
 @authenticate
 @authorize_workspace_publications_decorator
+@util.conditional_get_decorator
 @util.info_decorator
 def before_request():
     pass
@@ -42,3 +42,38 @@ def test_style_value():
     assert r_del.status_code >= 400, (r_del.text, style_url)
 
     process_client.delete_workspace_layer(username, layername)
+
+
+@pytest.mark.usefixtures('ensure_layman')
+def test_conditional_get():
+    workspace = 'test_conditional_get_workspace'
+    layername = 'test_conditional_get_layer'
+
+    process_client.publish_workspace_layer(workspace, layername)
+
+    etags = dict()
+    for endpoint in ['rest_workspace_layer.get', 'rest_workspace_layer_thumbnail.get', 'rest_workspace_layer_style.get', ]:
+        with app.app_context():
+            url = url_for(endpoint, workspace=workspace, layername=layername)
+        response = requests.get(url)
+        assert response.status_code == 200, response.text
+        etag = response.headers['ETag']
+        etags[endpoint] = etag
+        assert response.headers['Last-Modified']
+
+        response = requests.get(url, headers={'If-None-Match': etag})
+        assert response.status_code == 304, (endpoint, response.text)
+        assert response.headers['ETag'] == etag
+        assert not response.content
+
+        response = requests.get(url, headers={'If-None-Match': '"other"'})
+        assert response.status_code == 200, response.text
+
+    process_client.patch_workspace_layer(workspace, layername, title='New title')
+    with app.app_context():
+        url = url_for('rest_workspace_layer.get', workspace=workspace, layername=layername)
+    response = requests.get(url, headers={'If-None-Match': etags['rest_workspace_layer.get']})
+    assert response.status_code == 200, response.text
+    assert response.headers.get('ETag') != etags['rest_workspace_layer.get']
+
+    process_client.delete_workspace_layer(workspace, layername)
@@ -7,17 +7,21 @@ from layman import LaymanError, util as layman_util
 from layman.util import check_username_decorator
 from layman.authn import authenticate
 from layman.authz import authorize_workspace_publications_decorator
-from . import util, LAYER_REST_PATH_NAME
+from . import util, LAYER_REST_PATH_NAME, LAYER_TYPE
 from .filesystem import thumbnail
 
 bp = Blueprint('rest_workspace_layer_thumbnail', __name__)
 
+conditional_get_decorator = layman_util.create_conditional_get_decorator(LAYER_TYPE, 'layername',
+                                                                       thumbnail.get_layer_thumbnail_path)
+
 
 @bp.before_request
 @check_username_decorator
 @util.check_layername_decorator
 @authenticate
 @authorize_workspace_publications_decorator
+@conditional_get_decorator
 @util.info_decorator
 def before_request():
     pass
@@ -1,3 +1,5 @@
+import time
+
 from flask import Blueprint, jsonify, request, g
 from flask import current_app as app
 
@@ -7,7 +9,7 @@ from layman import settings, authn, util as layman_util
 from layman.authn import authenticate, get_authn_username
 from layman.authz import authorize_workspace_publications_decorator
 from layman.common import redis as redis_util, rest as rest_common
-from . import util, LAYER_TYPE, LAYER_REST_PATH_NAME
+from . import util, db, LAYER_TYPE, LAYER_REST_PATH_NAME
 from .filesystem import input_file, input_style, input_chunk, uuid
 
 bp = Blueprint('rest_workspace_layers', __name__)
@@ -54,23 +56,37 @@ def post(workspace):
         ]
         if len(files) > 0:
             use_chunk_upload = True
-    if len(files) == 0:
+
+    # DB TABLE
+    db_table = request.form.get('db_table', '')
+    if len(files) > 0 and len(db_table) > 0:
+        raise LaymanError(48, f'Parameters "file" and "db_table" can not be used together.')
+    if len(files) == 0 and len(db_table) == 0:
         raise LaymanError(1, {'parameter': 'file'})
 
+    if request.form.get('bulk', '').lower() == 'true':
+        if len(db_table) > 0:
+            raise LaymanError(48, f'Parameter "db_table" can not be used together with parameter "bulk".')
+        return _post_bulk(workspace, files, use_chunk_upload)
+
     # NAME
     unsafe_layername = request.form.get('name', '')
     if len(unsafe_layername) == 0:
-        unsafe_layername = input_file.get_unsafe_layername(files)
+        unsafe_layername = db_table.split('.')[-1] if db_table else input_file.get_unsafe_layername(files)
     layername = util.to_safe_layer_name(unsafe_layername)
     util.check_layername(layername)
     info = util.get_layer_info(workspace, layername)
     if info:
         raise LaymanError(17, {'layername': layername})
     util.check_new_layername(workspace, layername)
+    if db_table:
+        db.get_external_table_info(workspace, db_table)
 
     # CRS
     crs_id = None
     if len(request.form.get('crs', '')) > 0:
+        if db_table:
+            raise LaymanError(48, f'Parameters "crs" and "db_table" can not be used together.')
         crs_id = request.form['crs']
         if crs_id not in settings.INPUT_SRS_LIST:
             raise LaymanError(2, {'parameter': 'crs', 'supported_values': settings.INPUT_SRS_LIST})
@@ -104,6 +120,7 @@ def post(workspace):
         'actor_name': actor_name,
         'style_type': style_type,
         'store_in_geoserver': style_type.store_in_geoserver,
+        'db_table': db_table or None,
     }
 
     rest_common.setup_post_access_rights(request.form, task_options, actor_name)
@@ -124,7 +141,8 @@ def post(workspace):
         filenames = files
     else:
         filenames = [f.filename for f in files]
-    input_file.check_filenames(workspace, layername, filenames, check_crs)
+    if not db_table:
+        input_file.check_filenames(workspace, layername, filenames, check_crs)
 
     redis_util.create_lock(workspace, LAYER_TYPE, layername, 19, request.method)
 
@@ -138,7 +156,9 @@ def post(workspace):
 
         # save files
         input_style.save_layer_file(workspace, layername, style_file, style_type)
-        if use_chunk_upload:
+        if db_table:
+            start_async_at = 'layman.layer.db.table'
+        elif use_chunk_upload:
             files_to_upload = input_chunk.save_layer_files_str(
                 workspace, layername, files, check_crs)
             layer_result.update({
@@ -147,15 +167,17 @@ def post(workspace):
             task_options.update({
                 'check_crs': check_crs,
             })
+            start_async_at = 'layman.layer.filesystem.input_chunk'
         else:
             input_file.save_layer_files(
                 workspace, layername, files, check_crs)
+            start_async_at = 'layman.layer.filesystem.input_file'
 
         util.post_layer(
             workspace,
             layername,
             task_options,
-            'layman.layer.filesystem.input_chunk' if use_chunk_upload else 'layman.layer.filesystem.input_file'
+            start_async_at,
         )
     except Exception as exc:
         try:
@@ -169,6 +191,172 @@ def post(workspace):
     return jsonify([layer_result]), 200
 
 
+def _post_bulk(workspace, files, use_chunk_upload):
+    """Publishes one layer from each main file. Names are validated, UUIDs registered and workspace prepared once for
+    all layers, then each layer is published by its own asynchronous chain. Layers that can not be published are
+    reported by error object in the response and do not prevent publishing of other layers."""
+    start = time.time()
+    for param in ['name', 'title', ]:
+        if len(request.form.get(param, '')) > 0:
+            raise LaymanError(48, f'Parameter "{param}" can not be used together with parameter "bulk".')
+    for param in ['style', 'sld', ]:
+        if param in request.files and request.files[param].filename != '':
+            raise LaymanError(48, f'Parameter "{param}" can not be used together with parameter "bulk".')
+
+    file_groups, orphan_files = input_file.group_files_by_main_file(files)
+    if orphan_files:
+        raise LaymanError(2, {'parameter': 'file',
+                              'message': 'Every file must belong to some file with any of extensions: '
+                                         + ', '.join(settings.MAIN_FILE_EXTENSIONS),
+                              'files': [f if use_chunk_upload else f.filename for f in orphan_files]})
+
+    # CRS
+    crs_id = None
+    if len(request.form.get('crs', '')) > 0:
+        crs_id = request.form['crs']
+        if crs_id not in settings.INPUT_SRS_LIST:
+            raise LaymanError(2, {'parameter': 'crs', 'supported_values': settings.INPUT_SRS_LIST})
+    check_crs = crs_id is None
+
+    description = request.form.get('description', '')
+    style_type = input_style.get_style_type_from_file_storage(None)
+    actor_name = authn.get_authn_username()
+
+    common_task_options = {
+        'crs_id': crs_id,
+        'description': description,
+        # workspace is prepared once for all layers below
+        'ensure_user': False,
+        'check_crs': False,
+        'actor_name': actor_name,
+        'style_type': style_type,
+        'store_in_geoserver': style_type.store_in_geoserver,
+    }
+    rest_common.setup_post_access_rights(request.form, common_task_options, actor_name)
+
+    # NAMES
+    layer_files = {}
+    errors = {}
+    for main_filename, group in file_groups.items():
+        layername = util.to_safe_layer_name(input_file.get_unsafe_layername(group))
+        if layername in layer_files or layername in errors:
+            errors[layername] = LaymanError(17, {'layername': layername})
+            continue
+        layer_files[layername] = group
+    errors.update(util.check_new_layernames(workspace, [name for name in layer_files if name not in errors]))
+
+    # FILE NAMES
+    for layername, group in layer_files.items():
+        if layername in errors:
+            continue
+        filenames = group if use_chunk_upload else [f.filename for f in group]
+        try:
+            input_file.check_filenames(workspace, layername, filenames, check_crs)
+        except LaymanError as exc:
+            errors[layername] = exc
+
+    # LOCKS
+    # all layers are locked before UUIDs are registered, so that no other request can publish the same names meanwhile
+    locked_layernames = []
+    for layername in layer_files:
+        if layername in errors:
+            continue
+        try:
+            redis_util.create_lock(workspace, LAYER_TYPE, layername, 19, request.method)
+        except LaymanError as exc:
+            errors[layername] = exc
+            continue
+        except Exception as exc:
+            for locked_layername in locked_layernames:
+                redis_util.unlock_publication(workspace, LAYER_TYPE, locked_layername)
+            raise exc
+        locked_layernames.append(layername)
+
+    # layers not processed yet, they are cleaned up if unexpected exception occurs
+    unprocessed_layernames = list(locked_layernames)
+    try:
+        if locked_layernames:
+            # access rights are the same for all layers, so they are checked only once
+            util.pre_publication_action_check(workspace, locked_layernames[0],
+                                              {**common_task_options, 'title': locked_layernames[0]})
+            util.ensure_workspace(workspace)
+            uuids = uuid.assign_layer_uuids(workspace, locked_layernames)
+        else:
+            uuids = {}
+        layer_results = _publish_bulk_layers(workspace, layer_files, errors, uuids, unprocessed_layernames,
+                                             common_task_options, style_type, use_chunk_upload, check_crs)
+    except Exception as exc:
+        for layername in unprocessed_layernames:
+            try:
+                util.delete_layer(workspace, layername)
+            finally:
+                redis_util.unlock_publication(workspace, LAYER_TYPE, layername)
+        raise exc
+
+    duration = time.time() - start
+    num_published = len([r for r in layer_results if 'error' not in r])
+    app.logger.info(f'Bulk POST Layers: {num_published} of {len(layer_results)} layers sent to publishing in {duration:.2f} s'
+                    f' ({num_published / duration if duration else 0:.1f} layers/s)')
+    return jsonify(layer_results), 200
+
+
+def _publish_bulk_layers(workspace, layer_files, errors, uuids, unprocessed_layernames, common_task_options, style_type,
+                         use_chunk_upload, check_crs):
+    """Publishes already locked layers one by one. Name of each layer is removed from unprocessed_layernames as soon as
+    the layer is taken over by its own chain or cleaned up."""
+    layer_results = []
+    for layername, group in layer_files.items():
+        if layername in errors:
+            layer_results.append({
+                'name': layername,
+                'error': errors[layername].to_dict(),
+            })
+            continue
+        task_options = {
+            **common_task_options,
+            'access_rights': {k: list(v) for k, v in common_task_options['access_rights'].items()},
+            'title': layername,
+            'uuid': uuids[layername],
+        }
+        layer_result = {
+            'name': layername,
+            'url': url_for('rest_workspace_layer.get', layername=layername, workspace=workspace),
+            'uuid': uuids[layername],
+        }
+        try:
+            input_style.save_layer_file(workspace, layername, None, style_type)
+            if use_chunk_upload:
+                layer_result['files_to_upload'] = input_chunk.save_layer_files_str(workspace, layername, group, check_crs)
+                task_options['check_crs'] = check_crs
+            else:
+                input_file.save_layer_files(workspace, layername, group, check_crs)
+            util.post_layer(
+                workspace,
+                layername,
+                task_options,
+                'layman.layer.filesystem.input_chunk' if use_chunk_upload else 'layman.layer.filesystem.input_file'
+            )
+        except LaymanError as exc:
+            app.logger.warning(f'Bulk POST Layers: layer {workspace}.{layername} not published: {exc}')
+            util.delete_layer(workspace, layername)
+            layer_result = {
+                'name': layername,
+                'error': exc.to_dict(),
+            }
+        except Exception as exc:
+            if util.is_layer_chain_ready(workspace, layername):
+                # no chain was started, layer is cleaned up by caller
+                raise exc
+            unprocessed_layernames.remove(layername)
+            redis_util.unlock_publication(workspace, LAYER_TYPE, layername)
+            raise exc
+        unprocessed_layernames.remove(layername)
+        if util.is_layer_chain_ready(workspace, layername):
+            redis_util.unlock_publication(workspace, LAYER_TYPE, layername)
+        layer_results.append(layer_result)
+    return layer_results
+
+
 @bp.route(f"/{LAYER_REST_PATH_NAME}", methods=['DELETE'])
 def delete(workspace):
     app.logger.info(f"DELETE Layers, user={g.user}")
@@ -16,6 +16,7 @@ import pytest
 
 del sys.modules['layman']
 
+from db import util as db_util
 from geoserver.util import get_feature_type
 from layman import app
 from layman import settings
@@ -279,7 +280,6 @@ def test_post_layers_simple(client):
         # For some reason this hangs forever on get() if run (either with src/layman/authz/read_everyone_write_owner_auth2_test.py::test_authn_map_access_rights or src/layman/authn/oauth2_test.py::test_patch_current_user_without_username) and with src/layman/common/metadata/util.csw_insert
         # last_task['last'].get()
         # e.g. python3 -m pytest -W ignore::DeprecationWarning -xsvv src/layman/authn/oauth2_test.py::test_patch_current_user_without_username src/layman/layer/rest_workspace_test.py::test_post_layers_simple
-        # this can badly affect also .get(propagate=False) in layman.celery.abort_task_chain
         # but hopefully this is only related to magic flask&celery test suite
         flask_client.wait_till_layer_ready(username, layername)
 
@@ -1205,3 +1205,118 @@ def test_layer_with_different_geometry():
                              )
     assert response.status_code == 200, f"HTTP Error {response.status_code}\n{response.text}"
     process_client.delete_workspace_layer(username, layername)
+
+
+@pytest.mark.usefixtures('ensure_layman')
+def test_post_layers_bulk(client):
+    workspace = 'test_post_layers_bulk_workspace'
+    file_paths = [
+        'sample/layman.layer/small_layer.geojson',
+        'sample/layman.layer/single_point.dbf',
+        'sample/layman.layer/single_point.prj',
+        'sample/layman.layer/single_point.shp',
+        'sample/layman.layer/single_point.shx',
+    ]
+    with app.app_context():
+        rest_path = url_for('rest_workspace_layers.post', workspace=workspace)
+    files = []
+    try:
+        files = [(open(fp, 'rb'), os.path.basename(fp)) for fp in file_paths]
+        response = client.post(rest_path, data={
+            'file': files,
+            'bulk': 'true',
+        })
+        assert response.status_code == 200, response.get_json()
+        resp_json = response.get_json()
+        assert sorted(layer['name'] for layer in resp_json) == ['single_point', 'small_layer']
+        assert all('error' not in layer and layer['uuid'] for layer in resp_json), resp_json
+    finally:
+        for file_path in files:
+            file_path[0].close()
+
+    for layername in ['single_point', 'small_layer']:
+        flask_client.wait_till_layer_ready(workspace, layername)
+        with app.app_context():
+            info = util.get_layer_info(workspace, layername)
+        assert all('status' not in info[key] for key in ['db_table', 'wms', 'wfs', 'thumbnail', 'metadata']), info
+
+    try:
+        files = [(open(fp, 'rb'), os.path.basename(fp)) for fp in file_paths[:1]]
+        response = client.post(rest_path, data={
+            'file': files,
+            'bulk': 'true',
+            'name': 'small_layer_2',
+        })
+        assert response.status_code == 400
+        assert response.get_json()['code'] == 48
+    finally:
+        for file_path in files:
+            file_path[0].close()
+
+    try:
+        files = [(open(fp, 'rb'), os.path.basename(fp)) for fp in file_paths[:1]]
+        response = client.post(rest_path, data={
+            'file': files,
+            'bulk': 'true',
+        })
+        assert response.status_code == 200, response.get_json()
+        resp_json = response.get_json()
+        assert len(resp_json) == 1
+        assert resp_json[0]['name'] == 'small_layer'
+        assert resp_json[0]['error']['code'] == 17
+    finally:
+        for file_path in files:
+            file_path[0].close()
+
+    process_client.delete_workspace_layers(workspace)
+
+
+@pytest.mark.usefixtures('ensure_layman')
+def test_post_layer_db_table(client):
+    workspace = 'test_post_layer_db_table_workspace'
+    source_layer = 'source_layer'
+    # table not managed by Layman, name needs quoting
+    source_table = 'Source Table'
+    layername = 'layer_from_table'
+    flask_client.publish_layer(workspace, source_layer, client,
+                               file_paths=['sample/layman.layer/small_layer.geojson', ])
+    with app.app_context():
+        rest_path = url_for('rest_workspace_layers.post', workspace=workspace)
+        db_util.run_statement(f'''
+CREATE TABLE {workspace}."{source_table}" AS SELECT * FROM {workspace}.{source_layer};
+ALTER TABLE {workspace}."{source_table}" ADD PRIMARY KEY (ogc_fid);
+ANALYZE {workspace}."{source_table}";
+''')
+
+    for data, exp_code in [
+        ({'db_table': 'non_existing_table', 'name': layername}, 2),
+        ({'db_table': f'{settings.LAYMAN_PRIME_SCHEMA}.publications', 'name': layername}, 2),
+        # view over table of another layer would be dropped together with the table
+        ({'db_table': source_layer, 'name': layername}, 2),
+        ({'db_table': source_table, 'name': layername, 'crs': 'EPSG:4326'}, 48),
+    ]:
+        response = client.post(rest_path, data=data)
+        assert response.status_code == 400, response.get_json()
+        assert response.get_json()['code'] == exp_code, response.get_json()
+
+    response = client.post(rest_path, data={
+        'db_table': source_table,
+        'name': layername,
+    })
+    assert response.status_code == 200, response.get_json()
+    flask_client.wait_till_layer_ready(workspace, layername)
+
+    with app.app_context():
+        info = util.get_layer_info(workspace, layername)
+        assert info['db_table']['external_table'] == f'{workspace}.{source_table}'
+        assert 'file' not in info
+        assert all('status' not in info[key] for key in ['db_table', 'wms', 'wfs', 'thumbnail', 'metadata']), info
+        # bounding box is estimated from statistics of the source table
+        assert info['bounding_box'] == pytest.approx(util.get_layer_info(workspace, source_layer)['bounding_box'], rel=1e-3)
+        assert db.get_number_of_features(workspace, layername) == db.get_number_of_features(workspace, source_layer)
+
+    flask_client.delete_layer(workspace, layername, client)
+    with app.app_context():
+        assert db_util.run_query(f'''SELECT count(*) FROM {workspace}."{source_table}"''')[0][0] == 4
+        db_util.run_statement(f'''DROP TABLE {workspace}."{source_table}"''')
+    flask_client.delete_layer(workspace, source_layer, client)
@@ -1,12 +1,14 @@
 from functools import wraps, partial
 import re
 
+from celery import states
 from flask import current_app, request, g
 
 from layman import LaymanError, patch_mode, util as layman_util
 from layman.util import call_modules_fn, get_providers_from_source_names, get_internal_sources, \
     to_safe_name, url_for
 from layman import celery as celery_util, common
+from layman.cache import publication_info as publication_info_cache
 from layman.common import redis as redis_util, tasks as tasks_util, metadata as metadata_common
 from layman.common.util import PUBLICATION_NAME_PATTERN, clear_publication_info
 from . import get_layer_sources, LAYER_TYPE, get_layer_type_def
@@ -73,6 +75,32 @@ def check_new_layername(workspace, layername):
     call_modules_fn(providers, 'check_new_layername', [workspace, layername])
 
 
+def check_new_layernames(workspace, layernames):
+    """Bulk variant of check_new_layername, each provider checks all names at once. Returns dict
+    layername -> LaymanError for names that can not be used for new layers."""
+    errors = {}
+    for layername in layernames:
+        try:
+            check_layername(layername)
+        except LaymanError as exc:
+            errors[layername] = exc
+    existing_layernames = {name for (_, _, name) in layman_util.get_publication_infos(workspace, LAYER_TYPE).keys()}
+    for layername in layernames:
+        if layername not in errors and layername in existing_layernames:
+            errors[layername] = LaymanError(17, {'layername': layername})
+    layernames = [layername for layername in layernames if layername not in errors]
+    providers = get_providers()
+    for provider_errors in call_modules_fn(providers, 'check_new_layernames', [workspace, layernames]).values():
+        for layername, exc in provider_errors.items():
+            errors.setdefault(layername, exc)
+    return errors
+
+
+def ensure_workspace(workspace):
+    providers = get_providers()
+    call_modules_fn(providers, 'ensure_workspace', [workspace])
+
+
 def get_layer_info(workspace, layername, context=None):
     partial_info = layman_util.get_publication_info(workspace, LAYER_TYPE, layername, context)
 
@@ -80,25 +108,31 @@ def get_layer_info(workspace, layername, context=None):
     if chain_info is None or celery_util.is_chain_successful(chain_info):
         return partial_info
 
+    # tasks of stages following the stage with failed task will never run
     failed = False
-    for res in chain_info['by_order']:
-        task_name = next(k for k, v in chain_info['by_name'].items() if v == res)
-        source_state = {
-            'status': res.state if not failed else 'NOT_AVAILABLE'
-        }
-        if res.failed():
-            failed = True
-            res_exc = res.get(propagate=False)
-            # current_app.logger.info(f"Exception catched: {str(res_exc)}")
-            if isinstance(res_exc, LaymanError):
-                source_state.update({
-                    'error': res_exc.to_dict()
-                })
-        if task_name not in TASKS_TO_LAYER_INFO_KEYS:
-            continue
-        for layerinfo_key in TASKS_TO_LAYER_INFO_KEYS[task_name]:
-            if layerinfo_key not in partial_info or not res.successful():
-                partial_info[layerinfo_key] = source_state
+    for stage in chain_info['stages']:
+        stage_failed = False
+        for res in stage:
+            task_name = next(k for k, v in chain_info['by_name'].items() if v == res)
+            source_state = {
+                'status': res.state if not failed else 'NOT_AVAILABLE'
+            }
+            if source_state['status'] in [states.PENDING, states.STARTED]:
+                source_state['queue'] = tasks_util.get_task_queue(task_name)
+            if res.failed():
+                stage_failed = True
+                res_exc = res.get(propagate=False)
+                # current_app.logger.info(f"Exception catched: {str(res_exc)}")
+                if isinstance(res_exc, LaymanError):
+                    source_state.update({
+                        'error': res_exc.to_dict()
+                    })
+            if task_name not in TASKS_TO_LAYER_INFO_KEYS:
+                continue
+            for layerinfo_key in TASKS_TO_LAYER_INFO_KEYS[task_name]:
+                if layerinfo_key not in partial_info or not res.successful():
+                    partial_info[layerinfo_key] = source_state
+        failed = failed or stage_failed
 
     return partial_info
 
@@ -107,12 +141,20 @@ def get_complete_layer_info(username=None, layername=None, cached=False):
     assert (username is not None and layername is not None) or cached
     if cached:
         return g.get(FLASK_INFO_KEY)
+    return publication_info_cache.get(username, LAYER_TYPE, layername,
+                                      lambda: _create_complete_layer_info(username, layername))
+
+
+def _create_complete_layer_info(username, layername):
     partial_info = get_layer_info(username, layername)
 
     if not any(partial_info):
         raise LaymanError(15, {'layername': layername})
 
     item_keys = ['wms', 'wfs', 'thumbnail', 'file', 'db_table', 'metadata', 'style', ]
+    if partial_info.get('db_table', {}).get('external_table'):
+        # layer published from existing DB table has no input file
+        item_keys.remove('file')
 
     complete_info = {
         'name': layername,
@@ -126,8 +168,10 @@ def get_complete_layer_info(username=None, layername=None, cached=False):
 
     complete_info.update(partial_info)
 
-    complete_info['layman_metadata'] = {'publication_status': layman_util.get_publication_status(username, LAYER_TYPE, layername,
-                                                                                                 complete_info, item_keys)}
+    complete_info['layman_metadata'] = {
+        'publication_status': layman_util.get_publication_status(username, LAYER_TYPE, layername, complete_info, item_keys),
+        'publication_status_timings': celery_util.get_publication_chain_timings(username, LAYER_TYPE, layername),
+    }
 
     complete_info = clear_publication_info(complete_info)
 
@@ -141,17 +185,27 @@ def pre_publication_action_check(workspace, layername, task_options):
     call_modules_fn(sources, 'pre_publication_action_check', [workspace, layername], kwargs=task_options)
 
 
+def _run_layer_chain(workspace, layername, task_stages, task_id_stages, task_chain, start_async_at):
+    if start_async_at == 'layman.layer.filesystem.input_chunk':
+        # Chain is sent to broker only after all chunks are uploaded, so no worker waits for them
+        from .filesystem import input_chunk, tasks as filesystem_tasks
+        input_chunk.touch_upload_activity(workspace, layername)
+        celery_util.defer_publication_chain(workspace, LAYER_TYPE, layername, task_stages, task_id_stages, task_chain)
+        filesystem_tasks.schedule_chunk_upload_activity_check(workspace, layername)
+    elif task_stages:
+        # res = task_chain.apply_async()
+        task_chain()
+        celery_util.set_publication_chain_stages_info(workspace, LAYER_TYPE, layername, task_stages, task_id_stages)
+
+
 def post_layer(workspace, layername, task_options, start_async_at):
     # sync processing
     sources = get_sources()
     call_modules_fn(sources, 'post_layer', [workspace, layername], kwargs=task_options)
 
-    post_tasks = tasks_util.get_task_methods(get_layer_type_def(), workspace, layername, task_options, start_async_at)
-    post_chain = tasks_util.get_chain_of_methods(workspace, layername, post_tasks, task_options, 'layername')
-    # res = post_chain.apply_async()
-    res = post_chain()
-
-    celery_util.set_publication_chain_info(workspace, LAYER_TYPE, layername, post_tasks, res)
+    post_stages = tasks_util.get_task_stages(get_layer_type_def(), workspace, layername, task_options, start_async_at)
+    post_chain, post_id_stages = tasks_util.get_chain_of_stages(workspace, layername, post_stages, task_options, 'layername')
+    _run_layer_chain(workspace, layername, post_stages, post_id_stages, post_chain, start_async_at)
 
 
 def patch_layer(workspace, layername, task_options, stop_sync_at, start_async_at):
@@ -161,12 +215,10 @@ def patch_layer(workspace, layername, task_options, stop_sync_at, start_async_at
     sources = sources[:stop_idx]
     call_modules_fn(sources, 'patch_layer', [workspace, layername], kwargs=task_options)
 
-    patch_tasks = tasks_util.get_task_methods(get_layer_type_def(), workspace, layername, task_options, start_async_at)
-    patch_chain = tasks_util.get_chain_of_methods(workspace, layername, patch_tasks, task_options, 'layername')
-    # res = patch_chain.apply_async()
-    res = patch_chain()
-
-    celery_util.set_publication_chain_info(workspace, LAYER_TYPE, layername, patch_tasks, res)
+    patch_stages = tasks_util.get_task_stages(get_layer_type_def(), workspace, layername, task_options, start_async_at)
+    patch_chain, patch_id_stages = tasks_util.get_chain_of_stages(workspace, layername, patch_stages, task_options,
+                                                                  'layername')
+    _run_layer_chain(workspace, layername, patch_stages, patch_id_stages, patch_chain, start_async_at)
 
 
 TASKS_TO_LAYER_INFO_KEYS = {
@@ -180,8 +232,8 @@ TASKS_TO_LAYER_INFO_KEYS = {
 }
 
 
-def patch_after_feature_change(workspace, layername, **kwargs):
-    layman_util.patch_after_feature_change(workspace, LAYER_TYPE, layername, **kwargs)
+def patch_after_feature_change(workspace, layername):
+    layman_util.schedule_patch_after_feature_change(workspace, LAYER_TYPE, layername)
 
 
 def delete_layer(workspace, layername, source=None, http_method='delete'):
@@ -212,8 +264,8 @@ def _get_layer_chain(username, layername):
     return chain_info
 
 
-def abort_layer_chain(username, layername):
-    celery_util.abort_publication_chain(username, LAYER_TYPE, layername)
+def abort_layer_chain(username, layername, wait=True):
+    return celery_util.abort_publication_chain(username, LAYER_TYPE, layername, wait=wait)
 
 
 def is_layer_chain_ready(username, layername):
@@ -223,6 +275,8 @@ def is_layer_chain_ready(username, layername):
 
 lock_decorator = redis_util.create_lock_decorator(LAYER_TYPE, 'layername', 19, is_layer_chain_ready)
 
+conditional_get_decorator = layman_util.create_conditional_get_decorator(LAYER_TYPE, 'layername')
+
 
 def layer_info_to_metadata_properties(info):
     result = {
@@ -41,7 +41,7 @@ def make_celery(app):
 
 
 def get_task_modules():
-    task_modules = []
+    task_modules = ['layman.common.feature_change_tasks', 'layman.common.housekeeping_tasks']
     for publ_module in get_modules_from_names(settings.PUBLICATION_MODULES):
         for type_def in publ_module.PUBLICATION_TYPES.values():
             task_modules += type_def['task_modules']
@@ -52,6 +52,30 @@ def get_task_modules():
     return task_modules
 
 
+@signals.after_task_publish.connect
+def on_after_task_publish(sender=None, headers=None, body=None, **_kwargs):
+    task_name = sender
+    from layman import app
+    from layman.util import get_publication_types
+    from layman.celery import task_published
+    with app.app_context():
+        publication_type = next(
+            (
+                v['type'] for k, v in get_publication_types().items()
+                if task_name.startswith(k)
+            ),
+            None
+        )
+        if publication_type is None:
+            return
+        # task message protocol 2, body is tuple (args, kwargs, embed)
+        args = body[0]
+        username = args[0]
+        publication_name = args[1]
+        task_id = headers['id']
+        task_published(username, publication_type, publication_name, task_id)
+
+
 @signals.task_prerun.connect
 def on_task_prerun(**kwargs):
     task_name = kwargs['task'].name
@@ -71,7 +95,7 @@ def on_task_prerun(**kwargs):
         username = kwargs['args'][0]
         publication_name = kwargs['args'][1]
         task_id = kwargs['task_id']
-        task_prerun(username, publication_type, publication_name, task_id, task_name)
+        task_prerun(username, publication_type, publication_name, task_id, task_name, kwargs['task'].request.hostname)
 
 
 @signals.task_postrun.connect
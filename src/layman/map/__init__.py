@@ -50,6 +50,11 @@ PUBLICATION_TYPES = {
             ('layman.map.filesystem.thumbnail', InternalSourceTypeDef(info_items=['thumbnail', ]),),
             ('layman.map.micka.soap', InternalSourceTypeDef(info_items=['metadata', ]),),
         ]),
+        # see layman.layer.PUBLICATION_TYPES
+        'internal_source_dependencies': {
+            'layman.map.filesystem.thumbnail': ['layman.map.filesystem.input_file', ],
+            'layman.map.micka.soap': ['layman.map.prime_db_schema.bbox', ],
+        },
         'task_modules': {
             'layman.map.filesystem.tasks',
             'layman.map.micka.tasks',
@@ -6,14 +6,11 @@ get_metadata_comparison = empty_method_returns_dict
 
 
 def get_publication_uuid(workspace, publication_type, publication_name):
-    infos = pubs_util.get_publication_infos(workspace, publication_type)
-    return infos.get((workspace, publication_type, publication_name), dict()).get("uuid")
+    return pubs_util.get_publication_info(workspace, publication_type, publication_name).get("uuid")
 
 
 def get_map_info(workspace, mapname):
-    maps = pubs_util.get_publication_infos(workspace, MAP_TYPE)
-    info = maps.get((workspace, MAP_TYPE, mapname), dict())
-    return info
+    return pubs_util.get_publication_info(workspace, MAP_TYPE, mapname)
 
 
 def patch_map(workspace,
@@ -20,6 +20,7 @@ bp = Blueprint('rest_workspace_map', __name__)
 @util.check_mapname_decorator
 @authenticate
 @authorize_workspace_publications_decorator
+@util.conditional_get_decorator
 @util.info_decorator
 def before_request():
     pass
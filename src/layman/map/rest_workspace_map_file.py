@@ -4,16 +4,20 @@ from layman import LaymanError, util as layman_util
 from layman.util import check_username_decorator
 from layman.authn import authenticate
 from layman.authz import authorize_workspace_publications_decorator
-from . import util, MAP_REST_PATH_NAME
+from . import util, MAP_REST_PATH_NAME, MAP_TYPE
+from .filesystem import input_file
 
 bp = Blueprint('rest_workspace_map_file', __name__)
 
+conditional_get_decorator = layman_util.create_conditional_get_decorator(MAP_TYPE, 'mapname', input_file.get_map_file)
+
 
 @bp.before_request
 @check_username_decorator
 @util.check_mapname_decorator
 @authenticate
 @authorize_workspace_publications_decorator
+@conditional_get_decorator
 @util.info_decorator
 def before_request():
     pass
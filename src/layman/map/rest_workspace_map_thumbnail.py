@@ -6,17 +6,21 @@ from layman.util import check_username_decorator
 from layman.authn import authenticate
 from layman.authz import authorize_workspace_publications_decorator
 from layman.common.filesystem.util import get_workspace_dir
-from . import util, MAP_REST_PATH_NAME
+from . import util, MAP_REST_PATH_NAME, MAP_TYPE
 from .filesystem import thumbnail
 
 bp = Blueprint('rest_workspace_map_thumbnail', __name__)
 
+conditional_get_decorator = layman_util.create_conditional_get_decorator(MAP_TYPE, 'mapname',
+                                                                       thumbnail.get_map_thumbnail_path)
+
 
 @bp.before_request
 @check_username_decorator
 @util.check_mapname_decorator
 @authenticate
 @authorize_workspace_publications_decorator
+@conditional_get_decorator
 @util.info_decorator
 def before_request():
     pass
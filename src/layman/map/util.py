@@ -4,11 +4,13 @@ import os
 import re
 import subprocess
 from jsonschema import validate, Draft7Validator
+from celery import states
 from flask import current_app, request, g
 
 from layman import LaymanError, util as layman_util, celery as celery_util, settings
 from layman.authn.filesystem import get_authn_info
 from layman.common.micka import util as micka_util
+from layman.cache import publication_info as publication_info_cache
 from layman.common import redis as redis_util, tasks as tasks_util, metadata as metadata_common
 from layman.common.util import PUBLICATION_NAME_PATTERN, clear_publication_info
 from layman.util import call_modules_fn, get_providers_from_source_names, get_internal_sources, \
@@ -89,24 +91,30 @@ def get_map_info(workspace, mapname, context=None):
     if chain_info is None or celery_util.is_chain_successful(chain_info):
         return partial_info
 
+    # tasks of stages following the stage with failed task will never run
     failed = False
-    for res in chain_info['by_order']:
-        task_name = next(k for k, v in chain_info['by_name'].items() if v == res)
-        source_state = {
-            'status': res.state if not failed else 'NOT_AVAILABLE'
-        }
-        if res.failed():
-            failed = True
-            res_exc = res.get(propagate=False)
-            if isinstance(res_exc, LaymanError):
-                source_state.update({
-                    'error': res_exc.to_dict()
-                })
-        if task_name not in TASKS_TO_MAP_INFO_KEYS:
-            continue
-        for mapinfo_key in TASKS_TO_MAP_INFO_KEYS[task_name]:
-            if mapinfo_key not in partial_info or not res.successful():
-                partial_info[mapinfo_key] = source_state
+    for stage in chain_info['stages']:
+        stage_failed = False
+        for res in stage:
+            task_name = next(k for k, v in chain_info['by_name'].items() if v == res)
+            source_state = {
+                'status': res.state if not failed else 'NOT_AVAILABLE'
+            }
+            if source_state['status'] in [states.PENDING, states.STARTED]:
+                source_state['queue'] = tasks_util.get_task_queue(task_name)
+            if res.failed():
+                stage_failed = True
+                res_exc = res.get(propagate=False)
+                if isinstance(res_exc, LaymanError):
+                    source_state.update({
+                        'error': res_exc.to_dict()
+                    })
+            if task_name not in TASKS_TO_MAP_INFO_KEYS:
+                continue
+            for mapinfo_key in TASKS_TO_MAP_INFO_KEYS[task_name]:
+                if mapinfo_key not in partial_info or not res.successful():
+                    partial_info[mapinfo_key] = source_state
+        failed = failed or stage_failed
 
     return partial_info
 
@@ -123,12 +131,13 @@ def post_map(workspace, mapname, task_options, start_at):
     call_modules_fn(sources, 'post_map', [workspace, mapname], kwargs=task_options)
 
     # async processing
-    post_tasks = tasks_util.get_task_methods(get_map_type_def(), workspace, mapname, task_options, start_at)
-    post_chain = tasks_util.get_chain_of_methods(workspace, mapname, post_tasks, task_options, 'mapname')
-    # res = post_chain.apply_async()
-    res = post_chain()
+    post_stages = tasks_util.get_task_stages(get_map_type_def(), workspace, mapname, task_options, start_at)
+    post_chain, post_id_stages = tasks_util.get_chain_of_stages(workspace, mapname, post_stages, task_options, 'mapname')
+    if post_stages:
+        # res = post_chain.apply_async()
+        post_chain()
 
-    celery_util.set_publication_chain_info(workspace, MAP_TYPE, mapname, post_tasks, res)
+    celery_util.set_publication_chain_stages_info(workspace, MAP_TYPE, mapname, post_stages, post_id_stages)
 
 
 def patch_map(workspace, mapname, task_options, start_at):
@@ -137,12 +146,13 @@ def patch_map(workspace, mapname, task_options, start_at):
     call_modules_fn(sources, 'patch_map', [workspace, mapname], kwargs=task_options)
 
     # async processing
-    patch_tasks = tasks_util.get_task_methods(get_map_type_def(), workspace, mapname, task_options, start_at)
-    patch_chain = tasks_util.get_chain_of_methods(workspace, mapname, patch_tasks, task_options, 'mapname')
-    # res = patch_chain.apply_async()
-    res = patch_chain()
+    patch_stages = tasks_util.get_task_stages(get_map_type_def(), workspace, mapname, task_options, start_at)
+    patch_chain, patch_id_stages = tasks_util.get_chain_of_stages(workspace, mapname, patch_stages, task_options, 'mapname')
+    if patch_stages:
+        # res = patch_chain.apply_async()
+        patch_chain()
 
-    celery_util.set_publication_chain_info(workspace, MAP_TYPE, mapname, patch_tasks, res)
+    celery_util.set_publication_chain_stages_info(workspace, MAP_TYPE, mapname, patch_stages, patch_id_stages)
 
 
 def delete_map(workspace, mapname, kwargs=None):
@@ -155,6 +165,11 @@ def get_complete_map_info(username=None, mapname=None, cached=False):
     assert (username is not None and mapname is not None) or cached
     if cached:
         return g.get(FLASK_INFO_KEY)
+    return publication_info_cache.get(username, MAP_TYPE, mapname,
+                                      lambda: _create_complete_map_info(username, mapname))
+
+
+def _create_complete_map_info(username, mapname):
     partial_info = get_map_info(username, mapname)
 
     if not any(partial_info):
@@ -174,8 +189,10 @@ def get_complete_map_info(username=None, mapname=None, cached=False):
 
     complete_info.update(partial_info)
 
-    complete_info['layman_metadata'] = {'publication_status': layman_util.get_publication_status(username, MAP_TYPE, mapname,
-                                                                                                 complete_info, item_keys)}
+    complete_info['layman_metadata'] = {
+        'publication_status': layman_util.get_publication_status(username, MAP_TYPE, mapname, complete_info, item_keys),
+        'publication_status_timings': celery_util.get_publication_chain_timings(username, MAP_TYPE, mapname),
+    }
 
     complete_info = clear_publication_info(complete_info)
 
@@ -220,8 +237,8 @@ def _get_map_chain(username, mapname):
     return chain_info
 
 
-def abort_map_chain(username, mapname):
-    celery_util.abort_publication_chain(username, MAP_TYPE, mapname)
+def abort_map_chain(username, mapname, wait=True):
+    return celery_util.abort_publication_chain(username, MAP_TYPE, mapname, wait=wait)
 
 
 def is_map_chain_ready(username, mapname):
@@ -242,6 +259,8 @@ def get_map_owner_info(username):
 
 lock_decorator = redis_util.create_lock_decorator(MAP_TYPE, 'mapname', 29, is_map_chain_ready)
 
+conditional_get_decorator = layman_util.create_conditional_get_decorator(MAP_TYPE, 'mapname')
+
 get_syncable_prop_names = partial(metadata_common.get_syncable_prop_names, MAP_TYPE)
 
 
@@ -50,9 +50,9 @@ def find_maps_containing_layer(layer_workspace, layer_name):
 def update_related_publications_after_change(workspace, publication_type, publication):
     from layman.layer import LAYER_TYPE
     from layman.map import MAP_TYPE
-    from layman.util import patch_after_feature_change
+    from layman.util import schedule_patch_after_feature_change
 
     if publication_type == LAYER_TYPE:
         maps = find_maps_containing_layer(workspace, publication)
         for map_workspace, map_name in maps:
-            patch_after_feature_change(map_workspace, MAP_TYPE, map_name)
+            schedule_patch_after_feature_change(map_workspace, MAP_TYPE, map_name)
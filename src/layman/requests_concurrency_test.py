@@ -61,3 +61,29 @@ def test_patch_after_feature_change_concurrency(publication_type):
     assert not queue, queue
     lock = redis.get_publication_lock(workspace, publication_type, publication)
     assert not lock
+
+
+@pytest.mark.usefixtures('ensure_layman')
+def test_schedule_patch_after_feature_change_coalescing():
+    workspace = 'test_wfst_coalescing_workspace'
+    publication_type = process_client.LAYER_TYPE
+    publication = 'test_wfst_coalescing_layer'
+
+    process_client.publish_workspace_publication(publication_type, workspace, publication, )
+
+    with app.app_context():
+        stats_before = celery.get_feature_change_stats()
+        for _ in range(3):
+            layman_util.schedule_patch_after_feature_change(workspace, publication_type, publication)
+        assert celery.is_feature_change_pending(workspace, publication_type, publication)
+    lock = redis.get_publication_lock(workspace, publication_type, publication)
+    assert not lock
+
+    process_client.wait_for_publication_status(workspace, publication_type, publication)
+    with app.app_context():
+        assert not celery.is_feature_change_pending(workspace, publication_type, publication)
+        stats = celery.get_feature_change_stats()
+    assert stats['feature_changes'] - stats_before['feature_changes'] == 3
+    assert stats['patch_chains'] - stats_before['patch_chains'] == 1
+
+    process_client.delete_workspace_publication(publication_type, workspace, publication, )
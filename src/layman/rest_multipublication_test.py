@@ -591,6 +591,42 @@ class TestGetPublications:
         response = process_client.get_workspace_publications_response(publication_type, workspace, headers=headers, query_params=query_params)
         TestGetPublications.assert_response(response, expected_publications, expected_headers)
 
+    @staticmethod
+    @pytest.mark.parametrize('query_params', [
+        {},
+        {'order_by': 'title'},
+        {'order_by': 'last_change'},
+        {'full_text_filter': 'prilis yellow'},
+        {'order_by': 'bbox', 'ordering_bbox': ','.join(str(c) for c in (2999, 2999, 5001, 5001))},
+    ])
+    @pytest.mark.parametrize('publication_type', process_client.PUBLICATION_TYPES)
+    @pytest.mark.usefixtures('liferay_mock', 'ensure_layman', 'provide_data')
+    def test_get_publications_cursor(publication_type, query_params):
+        headers = TestGetPublications.authn_headers_user2
+        response = process_client.get_publications_response(publication_type, headers=headers, query_params=query_params)
+        all_publications = [(info['workspace'], info['name']) for info in response.json()]
+        total_count = response.headers['X-Total-Count']
+
+        cursor_publications = []
+        page_params = {**query_params, 'limit': 2}
+        while True:
+            response = process_client.get_publications_response(publication_type, headers=headers, query_params=page_params)
+            page = [(info['workspace'], info['name']) for info in response.json()]
+            if page:
+                start = len(cursor_publications) + 1
+                assert response.headers['Content-Range'] == f'items {start}-{start + len(page) - 1}/{total_count}'
+            cursor_publications += page
+            if 'X-Next-Cursor' not in response.headers:
+                break
+            page_params['cursor'] = response.headers['X-Next-Cursor']
+        assert cursor_publications == all_publications
+
+        response = process_client.get_publications_response(publication_type, headers=headers,
+                                                            query_params={**query_params, 'total_count': 'estimate'})
+        assert 'X-Total-Count' not in response.headers
+        assert int(response.headers['X-Total-Count-Estimate']) >= 0
+        assert response.headers['Content-Range'].endswith('/*')
+
 
 @pytest.mark.parametrize('query_params, error_code, error_specification,', [
     ({'order_by': 'gdasfda'}, (2, 400), {'parameter': 'order_by'}),
@@ -607,6 +643,9 @@ class TestGetPublications:
     ({'limit': '-7'}, (2, 400), {'parameter': 'limit'}),
     ({'offset': 'dasda'}, (2, 400), {'parameter': 'offset'}),
     ({'offset': '-7'}, (2, 400), {'parameter': 'offset'}),
+    ({'cursor': 'dasda'}, (2, 400), {'parameter': 'cursor'}),
+    ({'cursor': 'eyJrIjogW251bGwsICJhIiwgImIiXSwgInAiOiAyLCAiaCI6ICIwMDAwMDAwMCJ9'}, (48, 400), dict()),
+    ({'total_count': 'dasda'}, (2, 400), {'parameter': 'total_count'}),
 ])
 @pytest.mark.parametrize('publication_type', process_client.PUBLICATION_TYPES)
 @pytest.mark.usefixtures('ensure_layman', )
@@ -87,7 +87,7 @@ class TestResponsesClass:
 
     expected_common = {
         'access_rights': {'read': ['EVERYONE'], 'write': ['EVERYONE']},
-        'layman_metadata': {'publication_status': 'COMPLETE'},
+        'layman_metadata': {'publication_status': 'COMPLETE', 'publication_status_timings': None},
         'description': description,
         'name': publication,
         'title': publication,
@@ -2,7 +2,7 @@ import logging
 import psycopg2
 
 from db import util as db_util
-from layman.upgrade import upgrade_v1_8, upgrade_v1_9, upgrade_v1_10, upgrade_v1_12, upgrade_v1_13
+from layman.upgrade import upgrade_v1_8, upgrade_v1_9, upgrade_v1_10, upgrade_v1_12, upgrade_v1_13, upgrade_v1_14
 from layman import settings
 from . import consts
 
@@ -35,6 +35,10 @@ MIGRATIONS = {
         ((1, 13, 0), [
             upgrade_v1_13.rename_users_directory,
         ]),
+        ((1, 14, 0), [
+            upgrade_v1_14.adjust_prime_db_schema_for_principal_arrays,
+            upgrade_v1_14.create_bbox_change_tracking,
+        ]),
     ],
     consts.MIGRATION_TYPE_DATA: [
         ((1, 12, 0), [
@@ -42,6 +46,10 @@ MIGRATIONS = {
             upgrade_v1_12.migrate_layer_metadata,
             upgrade_v1_12.adjust_data_for_bbox_search,
         ]),
+        ((1, 14, 0), [
+            upgrade_v1_14.adjust_data_for_principal_arrays,
+            upgrade_v1_14.ensure_bbox_change_triggers,
+        ]),
     ],
 }
 
@@ -0,0 +1,89 @@
+import logging
+
+from db import util as db_util
+from layman import settings
+from layman.common.prime_db_schema import rights
+from layman.layer import LAYER_TYPE, db
+from layman.layer.db import table as db_table
+
+logger = logging.getLogger(__name__)
+DB_SCHEMA = settings.LAYMAN_PRIME_SCHEMA
+
+
+def adjust_prime_db_schema_for_principal_arrays():
+    logger.info(f'    Alter DB prime schema for denormalised read/write principal arrays')
+    statement = f'''ALTER TABLE {DB_SCHEMA}.publications ADD COLUMN IF NOT EXISTS
+        read_users VARCHAR(256)[] COLLATE pg_catalog."default" not null default '{{}}';
+    ALTER TABLE {DB_SCHEMA}.publications ADD COLUMN IF NOT EXISTS
+        write_users VARCHAR(256)[] COLLATE pg_catalog."default" not null default '{{}}';
+    CREATE INDEX IF NOT EXISTS publications_read_users_idx ON {DB_SCHEMA}.publications USING GIN (read_users);
+    CREATE INDEX IF NOT EXISTS publications_write_users_idx ON {DB_SCHEMA}.publications USING GIN (write_users);
+    '''
+    db_util.run_statement(statement)
+
+
+def adjust_data_for_principal_arrays():
+    logger.info(f'    Starting - Set read_users and write_users for all publications')
+    rights.refresh_principal_arrays()
+    logger.info(f'    DONE - Set read_users and write_users for all publications')
+
+
+def create_bbox_change_tracking():
+    logger.info(f'    Create DB table and trigger function tracking bounding boxes of changed features')
+    statement = f'''CREATE TABLE IF NOT EXISTS {DB_SCHEMA}.bbox_changes
+    (
+        workspace VARCHAR(256) COLLATE pg_catalog."default" not null,
+        layername VARCHAR(256) COLLATE pg_catalog."default" not null,
+        added_bbox box2d,
+        removed_bbox box2d,
+        version integer not null default 1,
+        CONSTRAINT bbox_changes_pkey PRIMARY KEY (workspace, layername)
+    )
+    TABLESPACE pg_default;
+
+    CREATE OR REPLACE FUNCTION {DB_SCHEMA}.track_bbox_change() RETURNS trigger AS $$
+    DECLARE
+        added box2d;
+        removed box2d;
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            SELECT ST_Extent(n.wkb_geometry) INTO added FROM new_rows n;
+        ELSIF TG_OP = 'DELETE' THEN
+            SELECT ST_Extent(o.wkb_geometry) INTO removed FROM old_rows o;
+        ELSE
+            SELECT ST_Extent(n.wkb_geometry), ST_Extent(o.wkb_geometry) INTO added, removed
+            FROM old_rows o INNER JOIN new_rows n ON n.ogc_fid = o.ogc_fid
+            WHERE ST_AsEWKB(o.wkb_geometry) IS DISTINCT FROM ST_AsEWKB(n.wkb_geometry);
+        END IF;
+        IF added IS NULL AND removed IS NULL THEN
+            RETURN NULL;
+        END IF;
+        INSERT INTO {DB_SCHEMA}.bbox_changes AS c (workspace, layername, added_bbox, removed_bbox)
+        VALUES (TG_TABLE_SCHEMA, TG_TABLE_NAME, added, removed)
+        ON CONFLICT (workspace, layername) DO UPDATE SET
+            added_bbox = (SELECT ST_Extent(b::geometry) FROM (VALUES (c.added_bbox), (excluded.added_bbox)) v(b)),
+            removed_bbox = (SELECT ST_Extent(b::geometry) FROM (VALUES (c.removed_bbox), (excluded.removed_bbox)) v(b)),
+            version = c.version + 1;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql SECURITY DEFINER;
+    '''
+    db_util.run_statement(statement)
+
+
+def ensure_bbox_change_triggers():
+    logger.info(f'    Starting - Create triggers tracking bounding boxes of changed features for all layers')
+    query = f'''
+    select  w.name,
+            p.name
+    from {DB_SCHEMA}.publications p inner join
+         {DB_SCHEMA}.workspaces w on w.id = p.id_workspace
+    where p.type = %s
+    '''
+    layers = db_util.run_query(query, (LAYER_TYPE, ))
+    for (workspace, layer) in layers:
+        if not db_table.get_layer_info(workspace, layer):
+            logger.warning(f'      Layer DB table {workspace}.{layer} not available, not creating triggers.')
+            continue
+        db.ensure_bbox_change_triggers(workspace, layer)
+    logger.info(f'    DONE - Create triggers tracking bounding boxes of changed features for all layers')
@@ -0,0 +1,36 @@
+from test import prime_db_schema_client
+
+from db import util as db_util
+from layman import app, settings
+from layman.layer import LAYER_TYPE
+from . import upgrade_v1_14
+
+DB_SCHEMA = settings.LAYMAN_PRIME_SCHEMA
+
+
+def test_adjust_data_for_principal_arrays():
+    workspace = 'test_adjust_data_for_principal_arrays_workspace'
+    workspace2 = 'test_adjust_data_for_principal_arrays_workspace2'
+    layer = 'test_adjust_data_for_principal_arrays_layer'
+    prime_db_schema_client.ensure_user(workspace)
+    prime_db_schema_client.ensure_user(workspace2)
+    prime_db_schema_client.post_workspace_publication(LAYER_TYPE, workspace, layer, actor=workspace,
+                                                      access_rights={'read': {workspace, workspace2},
+                                                                     'write': {workspace}})
+
+    select_arrays = f'''select p.read_users, p.write_users
+    from {DB_SCHEMA}.publications p inner join
+         {DB_SCHEMA}.workspaces w on w.id = p.id_workspace
+    where w.name = %s
+      and p.type = %s
+      and p.name = %s;'''
+    with app.app_context():
+        assert db_util.run_query(select_arrays, (workspace, LAYER_TYPE, layer))[0] == ([workspace2], [])
+
+        db_util.run_statement(f'''update {DB_SCHEMA}.publications set read_users = '{{}}', write_users = '{{}}';''')
+        assert db_util.run_query(select_arrays, (workspace, LAYER_TYPE, layer))[0] == ([], [])
+
+        upgrade_v1_14.adjust_data_for_principal_arrays()
+        assert db_util.run_query(select_arrays, (workspace, LAYER_TYPE, layer))[0] == ([workspace2], [])
+
+    prime_db_schema_client.clear_workspace(workspace)
@@ -1,17 +1,25 @@
+from concurrent import futures
+import datetime
 from functools import wraps
+import hashlib
 import importlib
 import inspect
+import os
 import re
+import threading
+import time
 import unicodedata
 import urllib.parse
 from collections import OrderedDict
 import logging
 
-from flask import current_app, request, url_for as flask_url_for, jsonify
+from flask import current_app, g, request, url_for as flask_url_for, jsonify, after_this_request
 from unidecode import unidecode
+from werkzeug.http import is_resource_modified
 
 from layman import settings, celery as celery_util, common
 from layman.common import tasks as tasks_util, redis
+from layman.cache import publication_info as publication_info_cache
 from layman.http import LaymanError
 
 logger = logging.getLogger(__name__)
@@ -24,6 +32,12 @@ FLASK_PROVIDERS_KEY = f'{__name__}:PROVIDERS'
 FLASK_PUBLICATION_TYPES_KEY = f'{__name__}:PUBLICATION_TYPES'
 FLASK_PUBLICATION_MODULES_KEY = f'{__name__}:PUBLICATION_MODULES'
 
+_THREAD_LOCAL = threading.local()
+_EXECUTOR = None
+_EXECUTOR_LOCK = threading.Lock()
+_MODULES_FN_DISPATCH_TABLE = dict()
+_MODULES_FN_TIMING_HOOK = None
+
 
 def slugify(value):
     value = unidecode(value)
@@ -213,37 +227,165 @@ def get_modules_from_names(module_names):
     return modules
 
 
+def set_modules_fn_timing_hook(hook):
+    """Sets function called as hook(module, fn_name, seconds) after each function called by call_modules_fn.
+
+    Use None to unset the hook.
+    """
+    global _MODULES_FN_TIMING_HOOK
+    _MODULES_FN_TIMING_HOOK = hook
+
+
+def _get_modules_fn_dispatch(modules, fn_name, omit_duplicate_calls=True):
+    """Returns list of (source module, function, names of function arguments, module owning function).
+
+    The list is resolved only once per process for each combination of modules and function name.
+    """
+    modules = tuple(modules)
+    key = (modules, fn_name, omit_duplicate_calls)
+    dispatch = _MODULES_FN_DISPATCH_TABLE.get(key)
+    if dispatch is None:
+        dispatch = []
+        functions = set()
+        for module in modules:
+            func = getattr(module, fn_name, None)
+            if func is None:
+                raise Exception(
+                    f'Module {module.__name__} does not have {fn_name} method.')
+            if func not in functions or not omit_duplicate_calls:
+                functions.add(func)
+                fn_arg_names = frozenset(inspect.getfullargspec(func)[0])
+                dispatch.append((module, func, fn_arg_names, inspect.getmodule(func)))
+        _MODULES_FN_DISPATCH_TABLE[key] = dispatch
+    return dispatch
+
+
 def call_modules_fn(modules, fn_name, args=None, kwargs=None, omit_duplicate_calls=True, until=None):
     if args is None:
         args = []
     if kwargs is None:
         kwargs = {}
 
-    functions = []
-    for module in modules:
-        func = getattr(module, fn_name, None)
-        if func is None:
-            raise Exception(
-                f'Module {module.__name__} does not have {fn_name} method.')
-        if func not in functions or not omit_duplicate_calls:
-            functions.append(func)
-
+    timing_hook = _MODULES_FN_TIMING_HOOK
     results = dict()
-    for func in functions:
-        fullargspec = inspect.getfullargspec(func)
-        fn_arg_names = fullargspec[0]
+    for module, func, fn_arg_names, fn_module in _get_modules_fn_dispatch(modules, fn_name, omit_duplicate_calls):
         final_kwargs = {
             k: v for k, v in kwargs.items()
             if k in fn_arg_names
         }
-        res = func(*args, **final_kwargs)
-        results[inspect.getmodule(func)] = res
+        if timing_hook is None:
+            res = func(*args, **final_kwargs)
+        else:
+            start = time.time()
+            res = func(*args, **final_kwargs)
+            timing_hook(module, fn_name, time.time() - start)
+        results[fn_module] = res
         if until is not None and until(res):
             return results
 
     return results
 
 
+def _is_in_concurrent_call():
+    return getattr(_THREAD_LOCAL, 'in_concurrent_call', False)
+
+
+def _get_executor():
+    # One executor per process, so that threads of sources that did not finish in time are reused by next calls instead
+    # of piling up. Such threads outlive the request that started them, but each of them is bounded by timeouts of
+    # requests inside the source (e.g. GeoServer, Micka).
+    global _EXECUTOR
+    with _EXECUTOR_LOCK:
+        if _EXECUTOR is None or _EXECUTOR[0] != os.getpid():
+            _EXECUTOR = (os.getpid(), futures.ThreadPoolExecutor(
+                max_workers=settings.LAYMAN_PUBLICATION_INFO_MAX_WORKERS,
+                thread_name_prefix='publication_info',
+            ))
+        return _EXECUTOR[1]
+
+
+def call_modules_fn_concurrently(modules, fn_name, args=None, kwargs=None, max_workers=None, timeout=None, wait_for=None):
+    """Same as call_modules_fn, but functions are called in parallel threads of one executor per process, each within its
+    own app context.
+
+    Each thread gets copy of the caller's flask.g, and it shares the caller's DB connection through its own cursor.
+    Results are returned in order of `modules`. Function that does not finish within `timeout` seconds is not part of
+    results, unless its module is in `wait_for`; such functions are called directly in the caller's thread, so they never
+    wait for free thread. Returns tuple (results, latencies), where latencies are in seconds, latency of function that is
+    not part of results is None. Function that did not finish in time keeps running after return.
+    """
+    from db import util as db_util
+    args = args or []
+    kwargs = kwargs or {}
+    wait_for = wait_for or []
+    max_workers = max_workers if max_workers is not None else settings.LAYMAN_PUBLICATION_INFO_MAX_WORKERS
+    timeout = timeout if timeout is not None else settings.LAYMAN_PUBLICATION_INFO_SOURCE_TIMEOUT
+
+    # the same function can be exposed by more modules, call it only once as call_modules_fn does
+    modules = [module for module, *_ in _get_modules_fn_dispatch(modules, fn_name)]
+
+    def call_directly(module):
+        start = time.time()
+        result = next(iter(call_modules_fn([module], fn_name, args, kwargs).values()))
+        return result, time.time() - start
+
+    if max_workers <= 1 or len(modules) <= 1 or _is_in_concurrent_call():
+        results = {}
+        latencies = {}
+        for module in modules:
+            results[module], latencies[module] = call_directly(module)
+        return results, latencies
+
+    from layman.common.prime_db_schema import publications
+    app = current_app._get_current_object()  # pylint: disable=protected-access
+    conn, _ = db_util.get_connection_cursor()
+    # create memo before g is copied, so that all threads share it
+    publications.get_info_memo()
+    parent_g = {key: g.get(key) for key in g if key != db_util.FLASK_CONN_CUR_KEY}
+
+    def call_in_thread(module):
+        start = time.time()
+        _THREAD_LOCAL.in_concurrent_call = True
+        try:
+            with app.app_context():
+                for key, value in parent_g.items():
+                    g.setdefault(key, value)
+                # psycopg2 connection can be shared by threads, its cursors can not
+                cursor = conn.cursor()
+                g.setdefault(db_util.FLASK_CONN_CUR_KEY, (conn, cursor))
+                try:
+                    result = next(iter(call_modules_fn([module], fn_name, args, kwargs).values()))
+                finally:
+                    cursor.close()
+        finally:
+            _THREAD_LOCAL.in_concurrent_call = False
+        return result, time.time() - start
+
+    executor = _get_executor()
+    submitted_at = time.time()
+    module_futures = [(module, executor.submit(call_in_thread, module)) for module in modules if module not in wait_for]
+    results = {}
+    latencies = {}
+    _THREAD_LOCAL.in_concurrent_call = True
+    try:
+        for module in modules:
+            if module in wait_for:
+                results[module], latencies[module] = call_directly(module)
+    finally:
+        _THREAD_LOCAL.in_concurrent_call = False
+    futures.wait([future for _, future in module_futures], timeout=max(0, submitted_at + timeout - time.time()))
+
+    for module, future in module_futures:
+        if not future.done():
+            future.cancel()
+            logger.warning(f'{module.__name__}.{fn_name} did not finish within {timeout} seconds, skipping its result')
+            latencies[module] = None
+            continue
+        results[module], latencies[module] = future.result()
+    return {module: results[module] for module in modules if module in results}, \
+        {module: latencies[module] for module in modules}
+
+
 DUMB_MAP_ADAPTER = None
 
 
@@ -302,7 +444,16 @@ def get_publication_info(workspace, publ_type, publ_name, context=None):
         LAYER_TYPE: 'get_layer_info',
         MAP_TYPE: 'get_map_info',
     }[publ_type]
-    partial_infos = call_modules_fn(sources, info_method, [workspace, publ_name])
+    # existence of the publication and authorization depend on sources of access rights, so they are never skipped
+    access_rights_sources = [source for source, source_def in get_publication_types()[publ_type]['internal_sources'].items()
+                             if 'access_rights' in source_def.info_items]
+    wait_for = [s for s in sources if s.__name__ in access_rights_sources]
+    partial_infos, latencies = call_modules_fn_concurrently(sources, info_method, [workspace, publ_name], wait_for=wait_for)
+    if any(latency is None for latency in latencies.values()):
+        publication_info_cache.mark_uncacheable()
+    logger.debug(f'{info_method} latencies of {workspace}.{publ_name}: ' + ', '.join(
+        f'{module.__name__}={latency if latency is None else round(latency, 3)}' for module, latency in latencies.items()
+    ))
 
     result = {}
     for partial_info in partial_infos.values():
@@ -328,6 +479,8 @@ def get_publication_infos_with_metainfo(workspace=None, publ_type=None, context=
                                         order_by_list=None,
                                         ordering_full_text=None,
                                         ordering_bbox=None,
+                                        after_keys=None,
+                                        exact_count=True,
                                         ):
     from layman.common.prime_db_schema import publications
     context = context or {}
@@ -342,6 +495,8 @@ def get_publication_infos_with_metainfo(workspace=None, publ_type=None, context=
                                                              order_by_list=order_by_list,
                                                              ordering_full_text=ordering_full_text,
                                                              ordering_bbox=ordering_bbox,
+                                                             after_keys=after_keys,
+                                                             exact_count=exact_count,
                                                              )
 
     return infos
@@ -373,20 +528,38 @@ def delete_publications(user,
     actor_name = authn.get_authn_username()
     whole_infos = get_publication_infos(user, publ_type, {'actor_name': actor_name, 'access_type': 'write'})
 
+    # Chains of all publications are aborted first and then their running tasks are awaited together, so that waiting
+    # time does not grow with number of publications.
+    publications = []
+    running_task_ids = []
+    lock_exc = None
     for (_, _, publication) in whole_infos.keys():
-        redis.create_lock(user, publ_type, publication, error_code, method)
         try:
-            abort_publication_fn(user, publication)
+            redis.create_lock(user, publ_type, publication, error_code, method)
+        except Exception as exc:
+            lock_exc = exc
+            break
+        publications.append(publication)
+        try:
+            running_task_ids += abort_publication_fn(user, publication, wait=False)
+        except Exception as exc:
+            for locked_publication in publications:
+                redis.unlock_publication(user, publ_type, locked_publication)
+            raise exc
+    celery_util.wait_for_aborted_tasks(running_task_ids)
+
+    for idx, publication in enumerate(publications):
+        try:
             delete_publication_fn(user, publication)
             if is_chain_ready_fn(user, publication):
                 redis.unlock_publication(user, publ_type, publication)
         except Exception as exc:
-            try:
-                if is_chain_ready_fn(user, publication):
-                    redis.unlock_publication(user, publ_type, publication)
-            finally:
-                redis.unlock_publication(user, publ_type, publication)
+            # publications not deleted yet were locked and their chains aborted above, none of them may stay locked
+            for locked_publication in publications[idx:]:
+                redis.unlock_publication(user, publ_type, locked_publication)
             raise exc
+    if lock_exc is not None:
+        raise lock_exc
 
     infos = [
         {
@@ -401,7 +574,24 @@ def delete_publications(user,
     return jsonify(infos)
 
 
+def schedule_patch_after_feature_change(workspace, publication_type, publication):
+    """Debounced variant of patch_after_feature_change. Feature changes of one publication are coalesced into one
+    patch_after_feature_change that runs after LAYMAN_FEATURE_CHANGE_QUIET_PERIOD seconds without other feature change,
+    but at latest LAYMAN_FEATURE_CHANGE_MAX_DELAY seconds after the first change."""
+    if not settings.LAYMAN_FEATURE_CHANGE_QUIET_PERIOD:
+        patch_after_feature_change(workspace, publication_type, publication)
+        return
+    needs_flush = celery_util.register_feature_change(workspace, publication_type, publication,
+                                                      settings.LAYMAN_FEATURE_CHANGE_MAX_DELAY)
+    publication_info_cache.delete(workspace, publication_type, publication)
+    if needs_flush:
+        from layman.common import feature_change_tasks
+        feature_change_tasks.schedule_flush(workspace, publication_type, publication,
+                                            settings.LAYMAN_FEATURE_CHANGE_QUIET_PERIOD)
+
+
 def patch_after_feature_change(workspace, publication_type, publication, **kwargs):
+    publication_info_cache.delete(workspace, publication_type, publication)
     try:
         redis.create_lock(workspace, publication_type, publication, 19, common.PUBLICATION_LOCK_FEATURE_CHANGE)
     except LaymanError as exc:
@@ -416,6 +606,87 @@ def patch_after_feature_change(workspace, publication_type, publication, **kwarg
     celery_util.set_publication_chain_info(workspace, publication_type, publication, task_methods, res)
 
 
+def get_publication_etag(workspace, publication_type, publication_name, file_path=None):
+    """Returns tuple (etag, last_modified) of publication resource served by current request endpoint.
+
+    Evaluation needs one indexed lookup to prime DB schema and three lookups to Redis, no publication info is assembled.
+    Last-Modified is the latest of `updated_at` of the publication, finish time of its last chain, and modification
+    time of `file_path`.
+    Returns (None, None) if the publication does not exist or is being updated.
+    """
+    from layman.common.prime_db_schema import publications
+    publ_info = publications.get_publication_info(workspace, publication_type, publication_name)
+    if not publ_info:
+        return None, None
+    chain_info = celery_util.get_publication_chain_info_dict(workspace, publication_type, publication_name)
+    if chain_info is not None and not chain_info['finished']:
+        return None, None
+    if redis.get_publication_lock(workspace, publication_type, publication_name) \
+            or celery_util.is_follow_up_pending(workspace, publication_type, publication_name):
+        return None, None
+
+    last_modified = publ_info['updated_at']
+    if chain_info and chain_info.get('finished_at'):
+        last_modified = max(last_modified, datetime.datetime.fromtimestamp(chain_info['finished_at'], datetime.timezone.utc))
+    etag_parts = [
+        request.endpoint,
+        publ_info['uuid'],
+        last_modified.isoformat(),
+        chain_info['last'] if chain_info else '',
+        chain_info.get('state', '') if chain_info else '',
+    ]
+    if file_path is not None:
+        try:
+            file_stat = os.stat(file_path)
+        except FileNotFoundError:
+            return None, None
+        etag_parts += [str(file_stat.st_mtime_ns), str(file_stat.st_size)]
+        last_modified = max(last_modified, datetime.datetime.fromtimestamp(file_stat.st_mtime, datetime.timezone.utc))
+
+    etag = hashlib.sha1(':'.join(etag_parts).encode('utf-8')).hexdigest()
+    # werkzeug works with naive datetimes in UTC
+    last_modified = last_modified.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return etag, last_modified
+
+
+def create_conditional_get_decorator(publication_type, publication_name_key, get_file_path_fn=None):
+    """Creates decorator of before_request function, that answers GET request by 304 Not Modified if resource
+    was not modified since it was sent to the client, and sets ETag and Last-Modified headers of 200 responses.
+
+    It has to be placed after authorization and before publication info is assembled.
+    """
+    def conditional_get_decorator(func):
+        @wraps(func)
+        def decorated_function(*args, **kwargs):
+            if request.method.lower() != common.REQUEST_METHOD_GET:
+                return func(*args, **kwargs)
+            workspace = request.view_args['workspace']
+            publication_name = request.view_args[publication_name_key]
+            file_path = get_file_path_fn(workspace, publication_name) if get_file_path_fn else None
+            etag, last_modified = get_publication_etag(workspace, publication_type, publication_name, file_path)
+            if etag is None:
+                return func(*args, **kwargs)
+
+            if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                response.last_modified = last_modified
+                return response
+
+            # pylint: disable=unused-variable
+            @after_this_request
+            def set_conditional_headers(response):
+                if response.status_code == 200:
+                    response.set_etag(etag)
+                    response.last_modified = last_modified
+                return response
+            return func(*args, **kwargs)
+
+        return decorated_function
+
+    return conditional_get_decorator
+
+
 def get_publication_status(workspace, publication_type, publication_name, complete_info, item_keys, ):
     chain_info = celery_util.get_publication_chain_info(workspace, publication_type, publication_name)
     current_lock = redis.get_publication_lock(
@@ -424,7 +695,8 @@ def get_publication_status(workspace, publication_type, publication_name, comple
         publication_name,
     )
 
-    if (chain_info and not celery_util.is_chain_ready(chain_info)) or current_lock:
+    if (chain_info and not celery_util.is_chain_ready(chain_info)) or current_lock \
+            or celery_util.is_follow_up_pending(workspace, publication_type, publication_name):
         publication_status = 'UPDATING'
     elif any(complete_info.get(v, dict()).get('status') for v in item_keys):
         publication_status = 'INCOMPLETE'
@@ -1,5 +1,7 @@
 from test import process_client
 import importlib
+import time
+import types
 import pytest
 
 from layman.layer import LAYER_TYPE
@@ -98,6 +100,7 @@ def test_publication_interface_methods():
             'modules_getter': provider_modules_getter,
             'methods': publication_provider_methods.union({
                 'check_new_layername',
+                'check_new_layernames',
             }),
         },
         {
@@ -216,3 +219,63 @@ def test_get_publication_info_items(publication_type):
 def test_url_for(endpoint, internal, params, expected_url):
     with app.app_context():
         assert util.url_for(endpoint, internal=internal, **params) == expected_url
+
+
+def test_call_modules_fn_concurrently():
+    def create_module(name, sleep, result):
+        module = types.ModuleType(name)
+
+        def get_info(value):
+            time.sleep(sleep)
+            return {name: (result, value)}
+
+        module.get_info = get_info
+        return module
+
+    modules = [
+        create_module('slow_module', 0.6, 1),
+        create_module('fast_module', 0.1, 2),
+        create_module('other_slow_module', 0.6, 3),
+    ]
+    with app.app_context():
+        start = time.time()
+        results, latencies = util.call_modules_fn_concurrently(modules, 'get_info', ['x'], max_workers=3)
+        duration = time.time() - start
+    assert duration < 1.2, duration
+    assert list(results.values()) == [
+        {'slow_module': (1, 'x')},
+        {'fast_module': (2, 'x')},
+        {'other_slow_module': (3, 'x')},
+    ]
+    assert [module.__name__ for module in latencies] == ['slow_module', 'fast_module', 'other_slow_module']
+    assert all(latency is not None for latency in latencies.values())
+
+    with app.app_context():
+        results, latencies = util.call_modules_fn_concurrently(modules, 'get_info', ['x'], max_workers=3, timeout=0.3)
+    assert list(results.values()) == [{'fast_module': (2, 'x')}]
+    assert [latency is None for latency in latencies.values()] == [True, False, True]
+
+    with app.app_context():
+        results, latencies = util.call_modules_fn_concurrently(modules, 'get_info', ['x'], max_workers=3, timeout=0.3,
+                                                               wait_for=[modules[0]])
+    assert list(results.values()) == [{'slow_module': (1, 'x')}, {'fast_module': (2, 'x')}]
+    assert [latency is None for latency in latencies.values()] == [False, False, True]
+
+
+def test_call_modules_fn_timing_hook():
+    def get_info(value, keyword=None):
+        return value, keyword
+
+    module = types.ModuleType('module_with_get_info')
+    module.get_info = get_info
+    module2 = types.ModuleType('module2_with_get_info')
+    module2.get_info = get_info
+
+    timings = []
+    util.set_modules_fn_timing_hook(lambda module, fn_name, seconds: timings.append((module.__name__, fn_name)))
+    try:
+        results = util.call_modules_fn([module, module2], 'get_info', ['x'], {'keyword': 'y', 'other': 'z'})
+    finally:
+        util.set_modules_fn_timing_hook(None)
+    assert list(results.values()) == [('x', 'y')]
+    assert timings == [('module_with_get_info', 'get_info')]
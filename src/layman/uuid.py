@@ -76,6 +76,47 @@ def register_publication_uuid(username, publication_type, publication_name, uuid
     return uuid_str
 
 
+def register_publication_uuids(username, publication_type, publication_names):
+    """Bulk variant of register_publication_uuid, UUIDs of all publications are registered by one Redis transaction.
+    Returns dict publication_name -> uuid."""
+    uuids = {publication_name: generate_uuid() for publication_name in publication_names}
+    if not uuids:
+        return uuids
+    user_type_names_key = get_user_type_names_key(username, publication_type)
+
+    with settings.LAYMAN_REDIS.pipeline() as pipe:
+        while True:
+            try:
+                pipe.watch(user_type_names_key)
+                existing_names = [
+                    publication_name for publication_name, uuid_str
+                    in zip(uuids.keys(), pipe.hmget(user_type_names_key, list(uuids.keys())))
+                    if uuid_str is not None
+                ]
+                if existing_names:
+                    raise LaymanError(23, {
+                        'message': f'Redis already contains publication type/user/names {publication_type}/{username}/{existing_names}'})
+
+                pipe.multi()
+                pipe.sadd(UUID_SET_KEY, *uuids.values())
+                for publication_name, uuid_str in uuids.items():
+                    pipe.hmset(
+                        get_uuid_metadata_key(uuid_str),
+                        {
+                            'username': username,
+                            'publication_type': publication_type,
+                            'publication_name': publication_name,
+                        }
+                    )
+                pipe.hmset(user_type_names_key, uuids)
+                pipe.execute()
+                break
+            except WatchError:
+                continue
+
+    return uuids
+
+
 def delete_publication_uuid(username, publication_type, publication_name, uuid_str):
     user_type_names_key = get_user_type_names_key(username, publication_type)
     uuid_metadata_key = get_uuid_metadata_key(uuid_str)
@@ -159,10 +200,12 @@ def check_redis_consistency(expected_publ_num_by_type=None):
         chain_info = celery_util.get_publication_chain_info(username, publ_type_name, pubname)
         is_ready = celery_util.is_chain_ready(chain_info)
         assert chain_info['finished'] is is_ready
+        # deferred chain (e.g. waiting for chunks) is not ready, but none of its tasks is running
+        is_deferred = celery_util.is_publication_chain_deferred(username, publ_type_name, pubname)
         assert (next((
             t for t in task_names_tuples
             if t[1] == username and t[2] == pubname and t[0].startswith(publ_type_name)
-        ), None) is None) is is_ready, f"{username}, {publ_type_name}, {pubname}: {is_ready}, {task_names_tuples}"
+        ), None) is None) is (is_ready or is_deferred), f"{username}, {publ_type_name}, {pubname}: {is_ready}, {task_names_tuples}"
         assert (redis.hget(celery_util.LAST_TASK_ID_IN_CHAIN_TO_PUBLICATION, chain_info['last'].task_id) is None) is is_ready
 
     # publication locks
@@ -111,6 +111,60 @@ LAYMAN_PG_TEMPLATE_DBNAME = os.getenv('LAYMAN_PG_TEMPLATE_DBNAME')
 
 LAYMAN_CELERY_QUEUE = os.environ['LAYMAN_CELERY_QUEUE']
 
+# classes of Celery tasks that can be sent to dedicated queues, see LAYMAN_CELERY_TASK_QUEUES
+LAYMAN_CELERY_TASK_CLASSES = {
+    'import': [
+        'layman.layer.db.table.refresh',
+    ],
+    'thumbnail': [
+        'layman.layer.filesystem.thumbnail.refresh',
+        'layman.layer.filesystem.thumbnail.patch_after_feature_change',
+        'layman.map.filesystem.thumbnail.refresh',
+    ],
+    'metadata': [
+        'layman.layer.micka.csw.refresh',
+        'layman.layer.micka.soap.refresh',
+        'layman.map.micka.csw.refresh',
+        'layman.map.micka.soap.refresh',
+    ],
+}
+
+# dedicated Celery queues of task classes, e.g. `import:layman_import,thumbnail:layman_thumbnail`
+# tasks of other classes are sent to LAYMAN_CELERY_QUEUE
+LAYMAN_CELERY_TASK_QUEUES = {
+    task_class: queue for task_class, queue in (
+        item.split(':') for item in os.getenv('LAYMAN_CELERY_TASK_QUEUES', '').split(',') if item
+    )
+}
+assert all(task_class in LAYMAN_CELERY_TASK_CLASSES for task_class in LAYMAN_CELERY_TASK_QUEUES), \
+    f"Unknown task class in LAYMAN_CELERY_TASK_QUEUES, expected some of {set(LAYMAN_CELERY_TASK_CLASSES)}"
+
+# profile of importing vector files into PostGIS by ogr2ogr, one of LAYMAN_DB_IMPORT_PROFILES
+# `high_throughput` uses COPY in one transaction into unlogged table without spatial index, index is created,
+# table is set to logged and analyzed after import
+LAYMAN_DB_IMPORT_PROFILES = ['default', 'high_throughput', ]
+LAYMAN_DB_IMPORT_PROFILE = os.getenv('LAYMAN_DB_IMPORT_PROFILE', '') or 'default'
+assert LAYMAN_DB_IMPORT_PROFILE in LAYMAN_DB_IMPORT_PROFILES, \
+    f"Unknown LAYMAN_DB_IMPORT_PROFILE, expected one of {LAYMAN_DB_IMPORT_PROFILES}"
+
+# how PATCH Workspace Layer with new data file replaces data of the layer, one of LAYMAN_DB_PATCH_IMPORT_MODES
+# `delete` deletes DB table and everything published from it before the import
+# `swap` imports data into shadow table and swaps it with the current table in one transaction, so the layer is served
+# with the old data until the swap
+LAYMAN_DB_PATCH_IMPORT_MODES = ['delete', 'swap', ]
+LAYMAN_DB_PATCH_IMPORT_MODE = os.getenv('LAYMAN_DB_PATCH_IMPORT_MODE', '') or 'delete'
+assert LAYMAN_DB_PATCH_IMPORT_MODE in LAYMAN_DB_PATCH_IMPORT_MODES, \
+    f"Unknown LAYMAN_DB_PATCH_IMPORT_MODE, expected one of {LAYMAN_DB_PATCH_IMPORT_MODES}"
+
+# schemas, in addition to the workspace schema, whose existing tables and views can be published as layers
+# by `db_table` parameter of POST Workspace Layers, e.g. `gis_data,cadastre`
+LAYMAN_DB_EXTERNAL_TABLE_SCHEMAS = [
+    schema for schema in os.getenv('LAYMAN_DB_EXTERNAL_TABLE_SCHEMAS', '').split(',')
+    if len(schema) > 0
+]
+assert LAYMAN_PRIME_SCHEMA not in LAYMAN_DB_EXTERNAL_TABLE_SCHEMAS, \
+    "LAYMAN_PRIME_SCHEMA can not be used in LAYMAN_DB_EXTERNAL_TABLE_SCHEMAS"
+
 PUBLICATION_MODULES = [
     'layman.layer',
     'layman.map',
@@ -212,3 +266,20 @@ LAYMAN_DEFAULT_OUTPUT_BBOX = (
 # E.g. if bbox is [5, 100, 5, 200] and NO_AREA_BBOX_PADDING = 10,
 # thumbnail will be rendered with bbox [-5, 100, 15, 200].
 NO_AREA_BBOX_PADDING = 10
+
+# Max number of threads used to get info about one publication from its internal sources concurrently.
+# If set to 1, internal sources are asked one after another.
+LAYMAN_PUBLICATION_INFO_MAX_WORKERS = int(os.getenv('LAYMAN_PUBLICATION_INFO_MAX_WORKERS', '') or 16)
+
+# max time (in seconds) to wait for one internal source when getting publication info concurrently
+LAYMAN_PUBLICATION_INFO_SOURCE_TIMEOUT = float(os.getenv('LAYMAN_PUBLICATION_INFO_SOURCE_TIMEOUT', '') or 30)
+
+# feature changes of one publication (e.g. by WFS-T) coming within this time (in seconds) are coalesced into one
+# asynchronous update of the publication, 0 disables coalescing
+LAYMAN_FEATURE_CHANGE_QUIET_PERIOD = float(os.getenv('LAYMAN_FEATURE_CHANGE_QUIET_PERIOD', '') or 2)
+
+# max time (in seconds) between first coalesced feature change and start of the asynchronous update
+LAYMAN_FEATURE_CHANGE_MAX_DELAY = float(os.getenv('LAYMAN_FEATURE_CHANGE_MAX_DELAY', '') or 30)
+
+# max time (in seconds) to cache complete info of layer or map (GET Workspace Layer/Map), 0 disables the cache
+LAYMAN_PUBLICATION_INFO_CACHE_TIMEOUT = int(os.getenv('LAYMAN_PUBLICATION_INFO_CACHE_TIMEOUT', '') or 60)